@@ -153,6 +153,8 @@ install -p -D -m 644 dci/systemd/dci-worker.service %{buildroot}%{_unitdir}/dci-
 %{_bindir}/dci-dbsync
 %{_bindir}/dci-dbinit
 %{_bindir}/dci-esindex
+%{_bindir}/dci-jobsstats
+%{_bindir}/dci-junitingest
 %license LICENSE
 %doc
 %{python2_sitelib}/dci
@@ -165,6 +167,8 @@ install -p -D -m 644 dci/systemd/dci-worker.service %{buildroot}%{_unitdir}/dci-
 %{_bindir}/dci-dbsync
 %{_bindir}/dci-dbinit
 %{_bindir}/dci-esindex
+%{_bindir}/dci-jobsstats
+%{_bindir}/dci-junitingest
 %files -n dci-api-python3
 %doc
 %{python3_sitelib}/dci
@@ -0,0 +1,40 @@
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add (created_at, id) indexes for cursor pagination
+
+Revision ID: 2b6a2aa7f5c1
+Revises: cb17d5871504
+Create Date: 2017-07-10 10:12:31.204519
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '2b6a2aa7f5c1'
+down_revision = 'cb17d5871504'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index('jobs_created_at_id_idx', 'jobs', ['created_at', 'id'])
+    op.create_index('files_created_at_id_idx', 'files', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('jobs_created_at_id_idx', 'jobs')
+    op.drop_index('files_created_at_id_idx', 'files')
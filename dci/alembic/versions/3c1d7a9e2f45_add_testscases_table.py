@@ -0,0 +1,67 @@
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add testscases table
+
+Revision ID: 3c1d7a9e2f45
+Revises: 8f3e6b0c4a21
+Create Date: 2017-07-31 10:12:45.207316
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3c1d7a9e2f45'
+down_revision = '8f3e6b0c4a21'
+branch_labels = None
+depends_on = None
+
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql as pg
+
+
+def upgrade():
+    op.create_table(
+        'testscases',
+        sa.Column('id', pg.UUID(as_uuid=True), primary_key=True),
+        sa.Column('created_at', sa.DateTime(),
+                  default=datetime.datetime.utcnow, nullable=False),
+        sa.Column('position', sa.Integer, nullable=False),
+        sa.Column('name', sa.Text, nullable=False),
+        sa.Column('classname', sa.Text, nullable=False),
+        sa.Column('time', sa.Float),
+        sa.Column('action', sa.String(32), nullable=False),
+        sa.Column('type', sa.Text),
+        sa.Column('message', sa.Text),
+        sa.Column('value', sa.Text),
+        sa.Column('job_id', pg.UUID(as_uuid=True),
+                  sa.ForeignKey('jobs.id', ondelete='CASCADE'),
+                  nullable=False),
+        sa.Column('tests_result_id', pg.UUID(as_uuid=True),
+                  sa.ForeignKey('tests_results.id', ondelete='CASCADE'),
+                  nullable=False)
+    )
+    op.create_index('testscases_job_id_classname_name_idx', 'testscases',
+                    ['job_id', 'classname', 'name'])
+    op.create_index('testscases_job_id_action_idx', 'testscases',
+                    ['job_id', 'action'])
+    op.create_index('testscases_tests_result_id_position_idx', 'testscases',
+                    ['tests_result_id', 'position'])
+
+
+def downgrade():
+    op.drop_table('testscases')
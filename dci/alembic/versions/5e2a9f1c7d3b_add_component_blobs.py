@@ -0,0 +1,61 @@
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add component blobs
+
+Revision ID: 5e2a9f1c7d3b
+Revises: 2b6a2aa7f5c1
+Create Date: 2017-07-17 14:21:08.635124
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5e2a9f1c7d3b'
+down_revision = '2b6a2aa7f5c1'
+branch_labels = None
+depends_on = None
+
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql as pg
+
+
+def upgrade():
+    op.create_table(
+        'component_blobs',
+        sa.Column('digest', sa.String(64), primary_key=True),
+        sa.Column('created_at', sa.DateTime(),
+                  default=datetime.datetime.utcnow, nullable=False),
+        sa.Column('topic_id', pg.UUID(as_uuid=True), nullable=False),
+        sa.Column('component_id', pg.UUID(as_uuid=True), nullable=False),
+        sa.Column('file_id', pg.UUID(as_uuid=True), nullable=False),
+        sa.Column('size', sa.BIGINT, nullable=True)
+    )
+
+    op.add_column(
+        'component_files',
+        sa.Column('digest', sa.String(64),
+                  sa.ForeignKey('component_blobs.digest'), nullable=True)
+    )
+    op.create_index('component_files_digest_idx', 'component_files',
+                    ['digest'])
+
+
+def downgrade():
+    op.drop_index('component_files_digest_idx', 'component_files')
+    op.drop_column('component_files', 'digest')
+    op.drop_table('component_blobs')
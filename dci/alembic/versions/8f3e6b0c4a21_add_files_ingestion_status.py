@@ -0,0 +1,45 @@
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add files ingestion status
+
+Revision ID: 8f3e6b0c4a21
+Revises: 5e2a9f1c7d3b
+Create Date: 2017-07-24 09:42:13.518302
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '8f3e6b0c4a21'
+down_revision = '5e2a9f1c7d3b'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    statuses = sa.Enum('pending', 'complete', 'error',
+                       name='ingestion_statuses')
+    statuses.create(op.get_bind(), checkfirst=False)
+
+    op.add_column('files',
+                  sa.Column('ingestion_status', statuses, nullable=True))
+
+
+def downgrade():
+    op.drop_column('files', 'ingestion_status')
+    sa.Enum(name='ingestion_statuses').drop(op.get_bind(), checkfirst=False)
@@ -0,0 +1,45 @@
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add components schedule index
+
+Revision ID: a4e1c9d27b86
+Revises: 3c1d7a9e2f45
+Create Date: 2017-08-02 15:03:27.841106
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'a4e1c9d27b86'
+down_revision = '3c1d7a9e2f45'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_index(
+        'components_topic_id_type_state_export_control_created_at_idx',
+        'components',
+        ['topic_id', 'type', 'state', 'export_control',
+         sa.text('created_at DESC')])
+
+
+def downgrade():
+    op.drop_index(
+        'components_topic_id_type_state_export_control_created_at_idx',
+        'components')
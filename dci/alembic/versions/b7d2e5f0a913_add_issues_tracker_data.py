@@ -0,0 +1,46 @@
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add issues tracker data
+
+Revision ID: b7d2e5f0a913
+Revises: a4e1c9d27b86
+Create Date: 2017-08-07 11:26:52.390514
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e5f0a913'
+down_revision = 'a4e1c9d27b86'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql as pg
+
+
+def upgrade():
+    op.add_column('issues',
+                  sa.Column('tracker_data', pg.JSON, nullable=True))
+    op.add_column('issues',
+                  sa.Column('refreshed_at', sa.DateTime(), nullable=True))
+    op.create_index('issues_refreshed_at_idx', 'issues', ['refreshed_at'])
+
+
+def downgrade():
+    op.drop_index('issues_refreshed_at_idx', 'issues')
+    op.drop_column('issues', 'refreshed_at')
+    op.drop_column('issues', 'tracker_data')
@@ -0,0 +1,39 @@
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add jobs_components component_id index
+
+Revision ID: c5a8f1e3d720
+Revises: b7d2e5f0a913
+Create Date: 2017-08-09 14:12:05.218367
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'c5a8f1e3d720'
+down_revision = 'b7d2e5f0a913'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index('jobs_components_component_id_idx', 'jobs_components',
+                    ['component_id'])
+
+
+def downgrade():
+    op.drop_index('jobs_components_component_id_idx', 'jobs_components')
@@ -0,0 +1,62 @@
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""create jobs_stats table
+
+Revision ID: d2f9b4a6c831
+Revises: c5a8f1e3d720
+Create Date: 2017-08-10 16:45:31.604128
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'd2f9b4a6c831'
+down_revision = 'c5a8f1e3d720'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql as pg
+
+
+def upgrade():
+    statuses = pg.ENUM('new', 'pre-run', 'running', 'post-run', 'success',
+                       'failure', 'killed', 'product-failure',
+                       'deployment-failure', name='statuses',
+                       create_type=False)
+
+    op.create_table(
+        'jobs_stats',
+        sa.Column('day', sa.Date, nullable=False, primary_key=True),
+        sa.Column('topic_id', pg.UUID(as_uuid=True),
+                  sa.ForeignKey('topics.id', ondelete='CASCADE'),
+                  nullable=False, primary_key=True),
+        sa.Column('remoteci_id', pg.UUID(as_uuid=True),
+                  sa.ForeignKey('remotecis.id', ondelete='CASCADE'),
+                  nullable=False, primary_key=True),
+        sa.Column('component_id', pg.UUID(as_uuid=True),
+                  sa.ForeignKey('components.id', ondelete='CASCADE'),
+                  nullable=False, primary_key=True),
+        sa.Column('status', statuses, nullable=False, primary_key=True),
+        sa.Column('nb_jobs', sa.Integer, nullable=False, default=0),
+        sa.Index('jobs_stats_topic_id_day_idx', 'topic_id', 'day'),
+        sa.Index('jobs_stats_remoteci_id_day_idx', 'remoteci_id', 'day'),
+        sa.Index('jobs_stats_component_id_day_idx', 'component_id', 'day')
+    )
+
+
+def downgrade():
+    op.drop_table('jobs_stats')
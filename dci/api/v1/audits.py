@@ -47,5 +47,6 @@ def get_logs(user):
     nb_rows = query.get_number_of_rows()
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'], None)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'audits': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'audits': rows, '_meta': meta})
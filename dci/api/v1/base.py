@@ -29,7 +29,8 @@ def get_resource_by_id(user, resource, table, embed_many, ignore_columns=None):
     resource_id = resource['id']
     columns = v1_utils.get_columns_name_with_objects(table)
 
-    query = v1_utils.QueryBuilder(table, args, columns, ignore_columns)
+    query = v1_utils.QueryBuilder(table, args, columns, ignore_columns,
+                                  embed_many)
 
     if not auth.is_admin(user) and 'team_id' in resource:
         query.add_extra_condition(table.c.team_id == user['team_id'])
@@ -62,6 +63,14 @@ def get_to_purge_archived_resources(user, table):
     where_clause = sql.and_(
         table.c.state == 'archived'
     )
+
+    args = schemas.args(flask.request.args.to_dict())
+    if args['stream']:
+        columns = v1_utils.get_columns_name_with_objects(table)
+        query = v1_utils.QueryBuilder(table, {}, columns)
+        query.add_extra_condition(where_clause)
+        return query.stream(table.name, query.get_number_of_rows())
+
     query = sql.select([table]).where(where_clause)
     result = flask.g.db_conn.execute(query).fetchall()
 
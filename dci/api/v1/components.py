@@ -20,6 +20,7 @@ import flask
 from flask import json
 from sqlalchemy import exc as sa_exc
 from sqlalchemy import sql
+from sqlalchemy.dialects import postgresql as pg
 
 from dci import dci_config
 from dci.api.v1 import api
@@ -61,6 +62,7 @@ def create_components(user):
         flask.g.db_conn.execute(query)
     except sa_exc.IntegrityError:
         raise dci_exc.DCICreationConflict(_TABLE.name, 'name')
+    v1_utils.invalidate_schedule(values['topic_id'])
 
     result = json.dumps({'component': values})
     return flask.Response(result, 201, content_type='application/json')
@@ -72,7 +74,7 @@ def update_components(user, c_id):
     if not auth.is_admin(user):
         raise auth.UNAUTHORIZED
 
-    v1_utils.verify_existence_and_get(c_id, _TABLE)
+    component = v1_utils.verify_existence_and_get(c_id, _TABLE)
     if_match_etag = utils.check_and_get_etag(flask.request.headers)
 
     values = schemas.component.put(flask.request.json)
@@ -88,6 +90,7 @@ def update_components(user, c_id):
     result = flask.g.db_conn.execute(query)
     if not result.rowcount:
         raise dci_exc.DCIConflict('Component', c_id)
+    v1_utils.invalidate_schedule(component['topic_id'])
 
     return flask.Response(None, 204, headers={'ETag': values['etag']},
                           content_type='application/json')
@@ -100,7 +103,8 @@ def get_all_components(user, topic_id):
 
     v1_utils.verify_team_in_topic(user, topic_id)
 
-    query = v1_utils.QueryBuilder(_TABLE, args, _C_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _C_COLUMNS,
+                                  embed_many=_EMBED_MANY)
 
     query.add_extra_condition(sql.and_(
         _TABLE.c.topic_id == topic_id,
@@ -110,13 +114,14 @@ def get_all_components(user, topic_id):
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
     # Return only the component which have the export_control flag set to true
     #
     if not (auth.is_admin(user)):
         rows = [row for row in rows if row['export_control']]
 
-    return flask.jsonify({'components': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'components': rows, '_meta': meta})
 
 
 @api.route('/components/<uuid:c_id>', methods=['GET'])
@@ -135,7 +140,7 @@ def delete_component_by_id(user, c_id):
     if not auth.is_admin(user):
         raise auth.UNAUTHORIZED
 
-    v1_utils.verify_existence_and_get(c_id, _TABLE)
+    component = v1_utils.verify_existence_and_get(c_id, _TABLE)
 
     values = {'state': 'archived'}
     where_clause = sql.and_(
@@ -147,6 +152,7 @@ def delete_component_by_id(user, c_id):
 
     if not result.rowcount:
         raise dci_exc.DCIDeleteConflict('Component', c_id)
+    v1_utils.invalidate_schedule(component['topic_id'])
 
     return flask.Response(None, 204, content_type='application/json')
 
@@ -178,9 +184,9 @@ def list_components_files(user, c_id):
                                        models.COMPONENTFILES.c.component_id == c_id)  # noqa
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, models.COMPONENTFILES.name, None, None)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'component_files': rows,
-                          '_meta': {'count': nb_rows}})
+    return flask.jsonify({'component_files': rows, '_meta': meta})
 
 
 @api.route('/components/<uuid:c_id>/files/<uuid:f_id>', methods=['GET'])
@@ -212,14 +218,20 @@ def download_component_file(user, c_id, f_id):
     swift = dci_config.get_store('components')
     component = v1_utils.verify_existence_and_get(c_id, _TABLE)
     v1_utils.verify_team_in_topic(user, component['topic_id'])
-    v1_utils.verify_existence_and_get(f_id, models.COMPONENT_FILES)
+    component_file = v1_utils.verify_existence_and_get(
+        f_id, models.COMPONENT_FILES)
     auth.check_export_control(user, component)
-    file_path = swift.build_file_path(component['topic_id'], c_id, f_id)
+    file_path = _get_component_file_path(swift, component, component_file)
 
     # Check if file exist on the storage engine
-    swift.head(file_path)
+    s_file = swift.head(file_path)
 
-    return flask.Response(swift.get_object(file_path))
+    return v1_utils.send_store_file(
+        swift, file_path,
+        component_file['mime'] or 'application/octet-stream',
+        int(s_file['content-length']),
+        etag=s_file['etag'],
+        last_modified=component_file['created_at'])
 
 
 @api.route('/components/<uuid:c_id>/files', methods=['POST'])
@@ -237,25 +249,40 @@ def upload_component_file(user, c_id):
     file_id = utils.gen_uuid()
     file_path = swift.build_file_path(component['topic_id'], c_id, file_id)
 
-    swift = dci_config.get_store('components')
-    swift.upload(file_path, flask.request.stream)
-    s_file = swift.head(file_path)
-
-    values = dict.fromkeys(['md5', 'mime', 'component_id', 'name'])
+    stream = utils.HashedStream(flask.request.stream)
+    swift.upload(file_path, stream)
 
-    values.update({
-        'id': file_id,
-        'component_id': c_id,
-        'name': file_id,
-        'created_at': datetime.datetime.utcnow().isoformat(),
-        'md5': s_file['etag'],
-        'mime': s_file['content-type'],
-        'size': s_file['content-length']
-    })
-
-    query = COMPONENT_FILES.insert().values(**values)
+    try:
+        s_file = swift.head(file_path)
+
+        values = dict.fromkeys(['md5', 'mime', 'component_id', 'name'])
+
+        values.update({
+            'id': file_id,
+            'component_id': c_id,
+            'name': file_id,
+            'created_at': datetime.datetime.utcnow().isoformat(),
+            'md5': s_file['etag'],
+            'mime': s_file['content-type'],
+            'size': s_file['content-length'],
+            'digest': stream.hexdigest()
+        })
+
+        query = COMPONENT_FILES.insert().values(**values)
+
+        with flask.g.db_conn.begin():
+            blob = _get_or_create_blob(values['digest'], component, file_id,
+                                       values['size'])
+            flask.g.db_conn.execute(query)
+    except Exception:
+        # nothing references the uploaded content
+        swift.delete(file_path)
+        raise
+
+    # the same content is already stored
+    if str(blob.file_id) != file_id:
+        swift.delete(file_path)
 
-    flask.g.db_conn.execute(query)
     result = json.dumps({'component_file': values})
     return flask.Response(result, 201, content_type='application/json')
 
@@ -267,23 +294,82 @@ def delete_component_file(user, c_id, f_id):
         raise auth.UNAUTHORIZED
 
     COMPONENT_FILES = models.COMPONENT_FILES
+    BLOBS = models.COMPONENT_BLOBS
     component = v1_utils.verify_existence_and_get(c_id, _TABLE)
-    v1_utils.verify_existence_and_get(f_id, COMPONENT_FILES)
+    component_file = v1_utils.verify_existence_and_get(f_id, COMPONENT_FILES)
+    digest = component_file['digest']
+
+    swift = dci_config.get_store('components')
+    file_path = swift.build_file_path(component['topic_id'], c_id, f_id)
 
     where_clause = COMPONENT_FILES.c.id == f_id
 
     query = COMPONENT_FILES.delete().where(where_clause)
 
-    result = flask.g.db_conn.execute(query)
+    with flask.g.db_conn.begin():
+        if digest is not None:
+            # the blob is locked so that no upload references it while its
+            # last reference goes
+            blob = flask.g.db_conn.execute(
+                sql.select([BLOBS])
+                .where(BLOBS.c.digest == digest)
+                .with_for_update()).fetchone()
+            if blob is not None:
+                file_path = swift.build_file_path(blob.topic_id,
+                                                  blob.component_id,
+                                                  blob.file_id)
+
+        result = flask.g.db_conn.execute(query)
+
+        if not result.rowcount:
+            raise dci_exc.DCIDeleteConflict('Component File', f_id)
+
+        if digest is not None:
+            references = flask.g.db_conn.execute(
+                sql.select([sql.func.count(COMPONENT_FILES.c.id)])
+                .where(COMPONENT_FILES.c.digest == digest)).scalar()
+            if references:
+                file_path = None
+            else:
+                flask.g.db_conn.execute(
+                    BLOBS.delete().where(BLOBS.c.digest == digest))
+
+    if file_path is not None:
+        swift.delete(file_path)
 
-    if not result.rowcount:
-        raise dci_exc.DCIDeleteConflict('Component File', f_id)
+    return flask.Response(None, 204, content_type='application/json')
 
-    swift = dci_config.get_store('components')
-    file_path = swift.build_file_path(component['topic_id'], c_id, f_id)
-    swift.delete(file_path)
 
-    return flask.Response(None, 204, content_type='application/json')
+def _get_or_create_blob(digest, component, file_id, size):
+    """Returns the blob of this digest, created with the component file
+    file_id if it is not stored yet. The blob stays locked until the end of
+    the transaction."""
+
+    BLOBS = models.COMPONENT_BLOBS
+    query = pg.insert(BLOBS).values(
+        digest=digest, topic_id=component['topic_id'],
+        component_id=component['id'], file_id=file_id, size=size)
+    # the no-op update locks and returns the existing blob, unlike a
+    # select run after the insert it cannot miss a blob deleted meanwhile
+    query = query.on_conflict_do_update(
+        index_elements=[BLOBS.c.digest],
+        set_={'digest': query.excluded.digest})
+    return flask.g.db_conn.execute(query.returning(*BLOBS.c)).fetchone()
+
+
+def _get_component_file_path(store, component, component_file):
+    if component_file['digest'] is None:
+        return store.build_file_path(component['topic_id'],
+                                     component['id'], component_file['id'])
+
+    BLOBS = models.COMPONENT_BLOBS
+    blob = flask.g.db_conn.execute(
+        sql.select([BLOBS])
+        .where(BLOBS.c.digest == component_file['digest'])).fetchone()
+    if blob is None:
+        raise dci_exc.DCINotFound('Component File', component_file['id'])
+    return store.build_file_path(blob.topic_id, blob.component_id,
+                                 blob.file_id)
 
 
 @api.route('/components/<c_id>/issues', methods=['GET'])
@@ -22,7 +22,7 @@ from flask import json
 from dci.api.v1 import api
 from dci.api.v1 import base
 from dci.api.v1 import files_events
-from dci.api.v1 import transformations as tsfm
+from dci.api.v1 import junit
 from dci.api.v1 import utils as v1_utils
 from dci import auth
 from dci.common import exceptions as dci_exc
@@ -48,6 +48,7 @@ _EMBED_MANY = {
 
 @api.route('/files', methods=['POST'])
 @auth.login_required
+@auth.streamed_payload
 def create_files(user):
     # todo(yassine): use voluptuous for headers validation
     headers_values = v1_utils.flask_headers_to_dict(flask.request.headers)
@@ -87,15 +88,12 @@ def create_files(user):
                                       values['job_id'],
                                       file_id)
 
-    if flask.request.stream.tell():
-        v1_utils.log().info(
-            'Request stream already consumed. Storing file content '
-            'using in-memory data.')
-        swift.upload(file_path, flask.request.data)
-    else:
-        v1_utils.log().info(
-            'Storing file content using request stream.')
-        swift.upload(file_path, flask.request.stream)
+    swift.upload(file_path, auth.get_request_stream())
+    try:
+        auth.check_streamed_payload()
+    except dci_exc.DCIException:
+        swift.delete(file_path)
+        raise
     s_file = swift.head(file_path)
 
     etag = utils.gen_etag()
@@ -108,35 +106,25 @@ def create_files(user):
         'size': s_file['content-length'],
         'state': 'active',
         'etag': etag,
+        'ingestion_status': ('pending' if values['mime'] == 'application/junit'
+                             else None),
     })
 
     query = _TABLE.insert().values(**values)
 
     with flask.g.db_conn.begin():
-
         flask.g.db_conn.execute(query)
-        result = json.dumps({'file': values})
-
-        if values['mime'] == 'application/junit':
-            content_file = swift.get_object(file_path)
-            junit = tsfm.junit2dict(content_file)
-            query = models.TESTS_RESULTS.insert().values({
-                'id': utils.gen_uuid(),
-                'created_at': values['created_at'],
-                'updated_at': datetime.datetime.utcnow().isoformat(),
-                'file_id': file_id,
-                'job_id': values['job_id'],
-                'name': values['name'],
-                'success': junit['success'],
-                'failures': junit['failures'],
-                'errors': junit['errors'],
-                'skips': junit['skips'],
-                'total': junit['total'],
-                'time': junit['time']
-            })
-            flask.g.db_conn.execute(query)
         files_events.create_event(file_id, models.FILES_CREATE)
 
+    if values['ingestion_status'] == 'pending':
+        if flask.current_app.config['JUNIT_ASYNC_INGESTION']:
+            flask.g.sender.send_json({'event': 'junit_ingestion',
+                                      'file_id': file_id})
+        else:
+            values['ingestion_status'] = junit.try_ingest(flask.g.db_conn,
+                                                          swift, file_id)
+
+    result = json.dumps({'file': values})
     return flask.Response(result, 201, content_type='application/json')
 
 
@@ -147,7 +135,8 @@ def get_all_files(user, j_id=None):
     """
     args = schemas.args(flask.request.args.to_dict())
 
-    query = v1_utils.QueryBuilder(_TABLE, args, _FILES_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _FILES_COLUMNS,
+                                  embed_many=_EMBED_MANY)
 
     # If it's not an admin then restrict the view to the team's file
     if not auth.is_admin(user):
@@ -157,10 +146,15 @@ def get_all_files(user, j_id=None):
     query.add_extra_condition(_TABLE.c.state != 'archived')
 
     nb_rows = query.get_number_of_rows()
+    if args['stream']:
+        return query.stream('files', nb_rows)
+
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
-    return json.jsonify({'files': rows, '_meta': {'count': nb_rows}})
+    rows, meta = query.paginate(rows, nb_rows)
+
+    return json.jsonify({'files': rows, '_meta': meta})
 
 
 @api.route('/files/<uuid:file_id>', methods=['GET'])
@@ -176,10 +170,6 @@ def get_file_content(user, file_id):
     file = v1_utils.verify_existence_and_get(file_id, _TABLE)
     swift = dci_config.get_store('files')
 
-    def get_object(swift_object):
-        for block in swift.get(swift_object)[1]:
-            yield block
-
     if not (auth.is_admin(user) or auth.is_in_team(user, file['team_id'])):
         raise auth.UNAUTHORIZED
 
@@ -188,17 +178,16 @@ def get_file_content(user, file_id):
                                       file_id)
 
     # Check if file exist on the storage engine
-    swift.head(file_path)
+    s_file = swift.head(file_path)
     filename = file['name'].replace(' ', '_')
     headers = {
-        'Content-Length': file['size'],
         'Content-Disposition': 'attachment; filename="%s"' % filename
     }
-    return flask.Response(
-        get_object(file_path),
-        content_type=file['mime'] or 'text/plain',
-        headers=headers
-    )
+    return v1_utils.send_store_file(swift, file_path,
+                                    file['mime'] or 'text/plain',
+                                    file['size'], headers,
+                                    etag=s_file['etag'],
+                                    last_modified=file['created_at'])
 
 
 @api.route('/files/<uuid:file_id>', methods=['DELETE'])
@@ -16,6 +16,8 @@
 
 import datetime
 import flask
+import logging
+import requests
 
 from flask import json
 from sqlalchemy import sql
@@ -25,56 +27,81 @@ from dci.common import exceptions as dci_exc
 from dci.common import schemas
 from dci.common import utils
 from dci.db import models
+from dci.trackers import batch
 from dci.trackers import github
 from dci.trackers import bugzilla
 
 
 _TABLE = models.ISSUES
+_TRACKERS = {'github': github.Github, 'bugzilla': bugzilla.Bugzilla}
 
+LOG = logging.getLogger(__name__)
+
+
+def _store_tracker_data(db_conn, issue_id, tracker_data):
+    query = (_TABLE.update()
+             .where(_TABLE.c.id == issue_id)
+             .values(tracker_data=tracker_data,
+                     refreshed_at=datetime.datetime.utcnow()))
+    db_conn.execute(query)
+
+
+def _refresh_issue(db_conn, issue):
+    tracker = _TRACKERS[issue['tracker']](issue['url'])
+    _store_tracker_data(db_conn, issue['id'], tracker.dump())
+
+
+def refresh_issues(db_conn, max_age):
+    """Retrieve again the informations of the issues whose tracker data
+    is older than max_age seconds, run periodically by dci-worker.
+
+    The trackers are queried concurrently, the issues of a tracker which
+    does not answer are retried on the next run.
+    """
+
+    refreshed_before = (datetime.datetime.utcnow() -
+                        datetime.timedelta(seconds=max_age))
+    query = (sql.select([_TABLE.c.id, _TABLE.c.url, _TABLE.c.tracker])
+             .where(sql.or_(_TABLE.c.refreshed_at == None,  # noqa
+                            _TABLE.c.refreshed_at < refreshed_before))
+             .order_by(_TABLE.c.refreshed_at.asc().nullsfirst()))
+    issues = db_conn.execute(query).fetchall()
+    trackers_data = batch.retrieve([(issue['tracker'], issue['url'])
+                                    for issue in issues])
+    for issue in issues:
+        if issue['url'] in trackers_data:
+            _store_tracker_data(db_conn, issue['id'],
+                                trackers_data[issue['url']])
 
-def get_all_issues(resource_id, table):
-    """Get all issues for a specific job."""
+
+def get_issues_by_resource(resource_id, table):
+    """Get the issues of a job or a component as a list of dicts."""
 
     v1_utils.verify_existence_and_get(resource_id, table)
 
     # When retrieving the issues for a job, we actually retrieve
     # the issues attach to the job itself + the issues attached to
-    # the components the job has been run with.
+    # the components the job has been run with. The UNION removes the
+    # issues attached both to the job and to one of its components.
     if table.name == 'jobs':
         JJI = models.JOIN_JOBS_ISSUES
         JJC = models.JOIN_JOBS_COMPONENTS
         JCI = models.JOIN_COMPONENTS_ISSUES
 
-        # Get all the issues attach to all the components attach to a job
-        j1 = sql.join(
-            _TABLE,
-            sql.join(
-                JCI,
-                JJC,
-                sql.and_(
-                    JCI.c.component_id == JJC.c.component_id,
-                    JJC.c.job_id == resource_id,
-                ),
-            ),
-            _TABLE.c.id == JCI.c.issue_id,
+        issues_ids = sql.union(
+            sql.select([JCI.c.issue_id])
+            .select_from(JCI.join(
+                JJC, JCI.c.component_id == JJC.c.component_id))
+            .where(JJC.c.job_id == resource_id),
+            sql.select([JJI.c.issue_id])
+            .where(JJI.c.job_id == resource_id)
         )
 
-        query = sql.select([_TABLE]).select_from(j1)
-        rows = flask.g.db_conn.execute(query)
-        rows = [dict(row) for row in rows]
-
-        # Get all the issues attach to a job
-        j2 = sql.join(
-            _TABLE,
-            JJI,
-            sql.and_(
-                _TABLE.c.id == JJI.c.issue_id,
-                JJI.c.job_id == resource_id
-            )
-        )
-        query2 = sql.select([_TABLE]).select_from(j2)
-        rows2 = flask.g.db_conn.execute(query2)
-        rows += [dict(row) for row in rows2]
+        # the ids are deduplicated instead of the rows since the tracker
+        # data column has no equality operator
+        query = (sql.select([_TABLE])
+                 .where(_TABLE.c.id.in_(issues_ids))
+                 .order_by(_TABLE.c.created_at.asc()))
 
     # When retrieving the issues for a component, we only retrieve the
     # issues attached to the specified component.
@@ -85,16 +112,20 @@ def get_all_issues(resource_id, table):
                  .select_from(JCI.join(_TABLE))
                  .where(JCI.c.component_id == resource_id))
 
-        rows = flask.g.db_conn.execute(query)
-        rows = [dict(row) for row in rows]
+    rows = [dict(row) for row in flask.g.db_conn.execute(query)]
 
+    # the trackers are not queried, their informations are the ones stored
+    # when the issue was created or last refreshed by dci-worker
     for row in rows:
-        if row['tracker'] == 'github':
-            l_tracker = github.Github(row['url'])
-        elif row['tracker'] == 'bugzilla':
-            l_tracker = bugzilla.Bugzilla(row['url'])
-        row.update(l_tracker.dump())
+        row.update(row.pop('tracker_data') or {})
+
+    return rows
 
+
+def get_all_issues(resource_id, table):
+    """Get all issues for a specific job or component."""
+
+    rows = get_issues_by_resource(resource_id, table)
     return flask.jsonify({'issues': rows,
                           '_meta': {'count': len(rows)}})
 
@@ -152,6 +183,16 @@ def attach_issue(resource_id, table, user_id):
                  .where(_TABLE.c.url == values['url']))
         rows = list(flask.g.db_conn.execute(query))
         issue_id = rows[0][0]  # the 'id' field of the issues table.
+    else:
+        # the tracker is queried once for a new issue, dci-worker refreshes
+        # its informations afterwards
+        try:
+            _refresh_issue(flask.g.db_conn, values)
+        except (requests.exceptions.RequestException,
+                AttributeError, IndexError, ValueError):
+            # the tracker does not answer or the url is not the one of
+            # an issue, the issue is attached without its informations
+            LOG.exception('failed to retrieve the issue %s' % values['url'])
 
     # Second, insert a join record in the JOIN_JOBS_ISSUES or
     # JOIN_COMPONENTS_ISSUES database.
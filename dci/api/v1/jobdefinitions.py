@@ -51,6 +51,7 @@ def create_jobdefinitions(user):
     except sa_exc.IntegrityError as e:
         raise dci_exc.DCIException("Integrity error on 'test_id' field.",
                                    payload=str(e))
+    v1_utils.invalidate_schedule(values['topic_id'])
 
     result = json.dumps({'jobdefinition': values})
     return flask.Response(result, 201, headers={'ETag': values['etag']},
@@ -66,7 +67,8 @@ def list_jobdefinitions(user, topic_ids, by_topic):
     # get the diverse parameters
     args = schemas.args(flask.request.args.to_dict())
 
-    query = v1_utils.QueryBuilder(_TABLE, args, _JD_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _JD_COLUMNS,
+                                  embed_many=_EMBED_MANY)
 
     if by_topic or not auth.is_admin(user):
         query.add_extra_condition(_TABLE.c.topic_id.in_(topic_ids))
@@ -77,8 +79,9 @@ def list_jobdefinitions(user, topic_ids, by_topic):
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'jobdefinitions': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'jobdefinitions': rows, '_meta': meta})
 
 
 @api.route('/jobdefinitions')
@@ -106,7 +109,7 @@ def put_jobdefinition(user, jd_id):
     if not(auth.is_admin(user) or auth.is_admin_user(user, jd_id)):
         raise auth.UNAUTHORIZED
 
-    v1_utils.verify_existence_and_get(jd_id, _TABLE)
+    jobdefinition = v1_utils.verify_existence_and_get(jd_id, _TABLE)
 
     values['etag'] = utils.gen_etag()
     where_clause = sql.and_(
@@ -119,6 +122,7 @@ def put_jobdefinition(user, jd_id):
 
     if not result.rowcount:
         raise dci_exc.DCIConflict('Jobdefinition', jd_id)
+    v1_utils.invalidate_schedule(jobdefinition['topic_id'])
 
     return flask.Response(None, 204, headers={'ETag': values['etag']},
                           content_type='application/json')
@@ -130,7 +134,7 @@ def delete_jobdefinition_by_id(user, jd_id):
     # get If-Match header
     if_match_etag = utils.check_and_get_etag(flask.request.headers)
 
-    v1_utils.verify_existence_and_get(jd_id, _TABLE)
+    jobdefinition = v1_utils.verify_existence_and_get(jd_id, _TABLE)
 
     with flask.g.db_conn.begin():
         values = {'state': 'archived'}
@@ -149,6 +153,7 @@ def delete_jobdefinition_by_id(user, jd_id):
             query = model.update().where(model.c.jobdefinition_id == jd_id) \
                          .values(**values)
             flask.g.db_conn.execute(query)
+    v1_utils.invalidate_schedule(jobdefinition['topic_id'])
 
     return flask.Response(None, 204, content_type='application/json')
 
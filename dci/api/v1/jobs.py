@@ -24,7 +24,6 @@ from sqlalchemy import sql
 
 from dci.api.v1 import api
 from dci.api.v1 import base
-from dci.api.v1 import transformations as tsfm
 from dci.api.v1 import utils as v1_utils
 from dci import auth
 from dci.common import audits
@@ -37,7 +36,9 @@ from dci.db import models
 from dci.api.v1 import files
 from dci.api.v1 import issues
 from dci.api.v1 import jobstates
+from dci.api.v1 import junit
 from dci.api.v1 import metas
+from dci.api.v1 import metrics
 from dci import dci_config
 
 
@@ -46,6 +47,8 @@ _TABLE = models.JOBS
 _VALID_EMBED = embeds.jobs()
 # associate column names with the corresponding SA Column object
 _JOBS_COLUMNS = v1_utils.get_columns_name_with_objects(_TABLE)
+_TESTSCASES = models.TESTSCASES
+_TESTSCASES_COLUMNS = v1_utils.get_columns_name_with_objects(_TESTSCASES)
 _EMBED_MANY = {
     'files': True,
     'metas': True,
@@ -110,7 +113,8 @@ def search_jobs(user):
 
     args = schemas.args(flask.request.args.to_dict())
     query = v1_utils.QueryBuilder(_TABLE, args, _JOBS_COLUMNS,
-                                  ['configuration'])
+                                  ['configuration'],
+                                  embed_many=_EMBED_MANY)
 
     # If it's not an admin then restrict the view to the team's file
     if not auth.is_admin(user):
@@ -133,72 +137,121 @@ def search_jobs(user):
     query.add_extra_condition(sa_op(*filering_rules))
 
     nb_rows = query.get_number_of_rows()
+    if args['stream']:
+        return query.stream('jobs', nb_rows)
+
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
+
+    return flask.jsonify({'jobs': rows, '_meta': meta})
+
+
+def _get_components_to_schedule(topic_id, jobdefinition):
+    """Return the ids of the latest exported components of the topic, one
+    for each component type of the jobdefinition.
+    """
+
+    component_types = list(jobdefinition['component_types'])
+    if not component_types:
+        msg = ('Jobdefinition "%s" malformed: no component types provided.' %
+               jobdefinition['id'])
+        raise dci_exc.DCIException(msg, status_code=412)
+
+    for ct in component_types:
+        if component_types.count(ct) > 1:
+            msg = ('Jobdefinition "%s" malformed: type "%s" duplicated.' %
+                   (jobdefinition['id'], ct))
+            raise dci_exc.DCIException(msg, status_code=412)
+
+    # the latest component of each type in a single query, it walks the
+    # (topic_id, type, state, export_control, created_at DESC) index
+    COMPONENTS = models.COMPONENTS
+    query = (sql.select([COMPONENTS.c.type, COMPONENTS.c.id])
+             .where(sql.and_(COMPONENTS.c.topic_id == topic_id,
+                             COMPONENTS.c.type.in_(component_types),
+                             COMPONENTS.c.state == 'active',
+                             COMPONENTS.c.export_control == True))  # noqa
+             .distinct(COMPONENTS.c.type)
+             .order_by(COMPONENTS.c.type, COMPONENTS.c.created_at.desc()))
+    latest_components = dict(flask.g.db_conn.execute(query).fetchall())
+
+    for ct in component_types:
+        if ct not in latest_components:
+            msg = 'Component of type "%s" not found or not exported.' % ct
+            raise dci_exc.DCIException(msg, status_code=412)
+    return [latest_components[ct] for ct in component_types]
 
-    return flask.jsonify({'jobs': rows, '_meta': {'count': nb_rows}})
 
+def _get_schedule(topic_id):
+    """Return the jobdefinition and the components a new job of the topic
+    runs, they are cached by the application."""
+
+    schedule_cache = flask.current_app.schedule_cache
+    schedule = schedule_cache.get(str(topic_id))
+    if schedule is not None:
+        return schedule
 
-def _build_new_template(topic_id, remoteci, values, previous_job_id=None):
     # Get a jobdefinition
     q_jd = sql.select([models.JOBDEFINITIONS]).where(
         sql.and_(
             models.JOBDEFINITIONS.c.topic_id == topic_id,
             models.JOBDEFINITIONS.c.state == 'active'
         )).order_by(
-        sql.desc(models.JOBDEFINITIONS.c.created_at))
+        sql.desc(models.JOBDEFINITIONS.c.created_at)).limit(1)
     jd_to_run = flask.g.db_conn.execute(q_jd).fetchone()
 
     if jd_to_run is None:
         msg = 'No jobdefinition found in topic %s.' % topic_id
         raise dci_exc.DCIException(msg, status_code=412)
 
-    # Get the latest components according to the component_types of the
-    # jobdefinition.
-    component_types = tuple(jd_to_run['component_types'])
-    if not component_types:
-        msg = ('Jobdefinition "%s" malformed: no component types provided.' %
-               jd_to_run['id'])
-        raise dci_exc.DCIException(msg, status_code=412)
+    schedule = {
+        'topic_id': str(topic_id),
+        'jobdefinition_id': jd_to_run['id'],
+        'components_ids': _get_components_to_schedule(topic_id, jd_to_run)
+    }
+    schedule_cache.set(str(topic_id), schedule)
+    return schedule
 
-    # TODO(yassine): use a tricky join/group by to remove the for clause
-    schedule_components_ids = []
-    for ct in component_types:
-        where_clause = sql.and_(models.COMPONENTS.c.type == ct,
-                                models.COMPONENTS.c.topic_id == topic_id,
-                                models.COMPONENTS.c.export_control == True,
-                                models.COMPONENTS.c.state == 'active')  # noqa
-        query = (sql.select([models.COMPONENTS.c.id])
-                 .where(where_clause)
-                 .order_by(sql.desc(models.COMPONENTS.c.created_at)))
-        cmpt_id = flask.g.db_conn.execute(query).fetchone()
-
-        if cmpt_id is None:
-            msg = 'Component of type "%s" not found or not exported.' % ct
-            raise dci_exc.DCIException(msg, status_code=412)
 
-        cmpt_id = cmpt_id[0]
-        if cmpt_id in schedule_components_ids:
-            msg = ('Jobdefinition "%s" malformed: type "%s" duplicated.' %
-                   (jd_to_run['id'], ct))
-            raise dci_exc.DCIException(msg, status_code=412)
-        schedule_components_ids.append(cmpt_id)
+def _build_new_template(topic_id, remoteci, values, previous_job_id=None,
+                        kill_running_jobs=False):
+    schedule = _get_schedule(topic_id)
 
     values.update({
-        'jobdefinition_id': jd_to_run['id'],
+        'jobdefinition_id': schedule['jobdefinition_id'],
         'team_id': remoteci['team_id'],
         'previous_job_id': previous_job_id
     })
 
     with flask.g.db_conn.begin():
+        if kill_running_jobs:
+            # the remoteci is locked so that concurrent schedulings end
+            # with a single running job
+            flask.g.db_conn.execute(
+                sql.select([models.REMOTECIS.c.id])
+                .where(models.REMOTECIS.c.id == remoteci['id'])
+                .with_for_update())
+            where_clause = sql.and_(
+                _TABLE.c.remoteci_id == remoteci['id'],
+                _TABLE.c.status.in_(('new', 'pre-run', 'running',
+                                     'post-run'))
+            )
+            killed_jobs = flask.g.db_conn.execute(
+                _TABLE.update().where(where_clause).values(status='killed')
+                .returning(_TABLE.c.id))
+            metrics.update_jobs_stats(flask.g.db_conn,
+                                      [job['id'] for job in killed_jobs],
+                                      None, 'killed')
+
         # create the job
         flask.g.db_conn.execute(_TABLE.insert().values(**values))
 
         # Adds the components to the jobs using join_jobs_components
         job_components = [
             {'job_id': values['id'], 'component_id': sci}
-            for sci in schedule_components_ids
+            for sci in schedule['components_ids']
         ]
         flask.g.db_conn.execute(
             models.JOIN_JOBS_COMPONENTS.insert(), job_components
@@ -222,14 +275,6 @@ def _validate_input(values, user):
     remoteci = v1_utils.verify_existence_and_get(remoteci_id, models.REMOTECIS)
     v1_utils.verify_existence_and_get(topic_id, models.TOPICS)
 
-    # let's kill existing running jobs for the remoteci
-    where_clause = sql.expression.and_(
-        _TABLE.c.remoteci_id == remoteci_id,
-        _TABLE.c.status.in_(('new', 'pre-run', 'running', 'post-run'))
-    )
-    kill_query = _TABLE .update().where(where_clause).values(status='killed')
-    flask.g.db_conn.execute(kill_query)
-
     if remoteci['state'] != 'active':
         message = 'RemoteCI "%s" is disabled.' % remoteci_id
         raise dci_exc.DCIException(message, status_code=412)
@@ -242,7 +287,8 @@ def _validate_input(values, user):
 def _get_job(user, job_id, embed):
     # build the query thanks to the QueryBuilder class
     args = {'embed': embed}
-    query = v1_utils.QueryBuilder(_TABLE, args, _JOBS_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _JOBS_COLUMNS,
+                                  embed_many=_EMBED_MANY)
 
     if not auth.is_admin(user):
         query.add_extra_condition(_TABLE.c.team_id == user['team_id'])
@@ -281,7 +327,8 @@ def schedule_jobs(user):
     })
     topic_id, remoteci = _validate_input(values, user)
 
-    values = _build_new_template(topic_id, remoteci, values)
+    values = _build_new_template(topic_id, remoteci, values,
+                                 kill_running_jobs=True)
 
     # add upgrade flag to the job result
     values.update({'allow_upgrade_job': remoteci['allow_upgrade_job']})
@@ -359,7 +406,8 @@ def get_all_jobs(user, jd_id=None):
 
     # build the query thanks to the QueryBuilder class
     query = v1_utils.QueryBuilder(_TABLE, args, _JOBS_COLUMNS,
-                                  ['configuration'])
+                                  ['configuration'],
+                                  embed_many=_EMBED_MANY)
 
     # add extra conditions for filtering
 
@@ -375,11 +423,15 @@ def get_all_jobs(user, jd_id=None):
     query.add_extra_condition(_TABLE.c.state != 'archived')
 
     nb_rows = query.get_number_of_rows()
+    if args['stream']:
+        return query.stream('jobs', nb_rows)
+
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'jobs': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'jobs': rows, '_meta': meta})
 
 
 @api.route('/jobs/<uuid:job_id>/components', methods=['GET'])
@@ -402,12 +454,20 @@ def get_jobstates_by_job(user, j_id):
 def get_job_by_id(user, job_id):
     job = v1_utils.verify_existence_and_get(job_id, _TABLE)
     job_dict = dict(job)
-    job_dict['issues'] = json.loads(
-        issues.get_all_issues(job_id, _TABLE).response[0]
-    )['issues']
+    job_dict['issues'] = issues.get_issues_by_resource(job_id, _TABLE)
     return base.get_resource_by_id(user, job_dict, _TABLE, _EMBED_MANY)
 
 
+def _lock_job(job_id):
+    """Lock the job until the end of the transaction and return its status
+    and state, to move it in the jobs statistics."""
+
+    query = (sql.select([_TABLE.c.status, _TABLE.c.state])
+             .where(_TABLE.c.id == job_id)
+             .with_for_update())
+    return flask.g.db_conn.execute(query).fetchone()
+
+
 @api.route('/jobs/<uuid:job_id>', methods=['PUT'])
 @auth.login_required
 @audits.log
@@ -440,10 +500,19 @@ def update_job_by_id(user, job_id):
     values['etag'] = utils.gen_etag()
     query = _TABLE.update().where(where_clause).values(**values)
 
-    result = flask.g.db_conn.execute(query)
+    with flask.g.db_conn.begin():
+        # the jobstates change the status without the etag, it is read
+        # again while the job is locked
+        previous = _lock_job(job_id)
+        result = flask.g.db_conn.execute(query)
 
-    if not result.rowcount:
-        raise dci_exc.DCIConflict('Job', job_id)
+        if not result.rowcount:
+            raise dci_exc.DCIConflict('Job', job_id)
+
+        if (status and previous['status'] != status and
+                previous['state'] != 'archived'):
+            metrics.update_jobs_stats(flask.g.db_conn, [job_id],
+                                      previous['status'], status)
     if values.get('status') == "failure":
         _TEAMS = models.TEAMS
         where_clause = sql.expression.and_(
@@ -512,30 +581,160 @@ def get_all_results_from_jobs(user, j_id):
     if not(auth.is_admin(user) or auth.is_in_team(user, job['team_id'])):
         raise auth.UNAUTHORIZED
 
-    swift = dci_config.get_store('files')
-    job_files = json.loads(files.get_all_files(j_id).response[0])['files']
-    r_files = [file for file in job_files
-               if file['mime'] == 'application/junit']
-
+    # the testscases are filled when the JUnit files are ingested, they
+    # can be filtered, sorted and paginated like any other resource
+    args = schemas.args(flask.request.args.to_dict())
+    if not args['sort'] and args['after'] is None:
+        args['sort'] = ['created_at', 'position']
+    query = v1_utils.QueryBuilder(_TESTSCASES, args, _TESTSCASES_COLUMNS,
+                                  ['id', 'created_at', 'position', 'job_id'])
+    query.add_extra_condition(_TESTSCASES.c.job_id == j_id)
+    tests_results_ids = junit.active_tests_results(
+        models.TESTS_RESULTS.c.job_id == j_id)
+    query.add_extra_condition(
+        _TESTSCASES.c.tests_result_id.in_(tests_results_ids))
+
+    nb_testscases = query.get_number_of_rows()
+    rows = query.execute(fetchall=True)
+    rows = v1_utils.format_result(rows, _TESTSCASES.name)
+    rows, testscases_meta = query.paginate(rows, nb_testscases)
+
+    testscases = {}
+    for row in rows:
+        testscases.setdefault(row.pop('tests_result_id'), []).append(row)
+
+    # the JUnit files without results, pending or in error, are listed too
+    FILES = models.FILES
+    TESTS_RESULTS = models.TESTS_RESULTS
+    query = (sql.select([FILES.c.id, FILES.c.name, FILES.c.ingestion_status,
+                         TESTS_RESULTS])
+             .select_from(FILES.outerjoin(
+                 TESTS_RESULTS, TESTS_RESULTS.c.file_id == FILES.c.id))
+             .where(sql.and_(FILES.c.job_id == j_id,
+                             FILES.c.mime == 'application/junit',
+                             FILES.c.state != 'archived'))
+             .order_by(FILES.c.created_at))
     results = []
-    for file in r_files:
-        file_path = swift.build_file_path(file['team_id'],
-                                          j_id,
-                                          file['id'])
-        content_file = swift.get_object(file_path)
-        data = tsfm.junit2dict(content_file)
-        results.append({'filename': file['name'],
-                        'name': file['name'],
-                        'total': data['total'],
-                        'failures': data['failures'],
-                        'errors': data['errors'],
-                        'skips': data['skips'],
-                        'time': data['time'],
-                        'success': data['success'],
-                        'testscases': data['testscases']})
+    for result in flask.g.db_conn.execute(query):
+        results.append({'filename': result[FILES.c.name],
+                        'name': result[FILES.c.name],
+                        'file_id': result[FILES.c.id],
+                        'ingestion_status': result[FILES.c.ingestion_status],
+                        'total': result[TESTS_RESULTS.c.total],
+                        'failures': result[TESTS_RESULTS.c.failures],
+                        'errors': result[TESTS_RESULTS.c.errors],
+                        'skips': result[TESTS_RESULTS.c.skips],
+                        'time': result[TESTS_RESULTS.c.time],
+                        'success': result[TESTS_RESULTS.c.success],
+                        'testscases': testscases.get(
+                            result[TESTS_RESULTS.c.id], [])})
 
     return flask.jsonify({'results': results,
-                          '_meta': {'count': len(results)}})
+                          '_meta': {'count': len(results),
+                                    'testscases': testscases_meta}})
+
+
+def _get_job_to_compare(job, against):
+    """Return the id of the job to compare the results of job with."""
+
+    if against == 'previous':
+        job_id = job['previous_job_id']
+    elif against == 'last':
+        # the last job run before on the same remoteci and topic
+        JOBDEFINITIONS = models.JOBDEFINITIONS
+        topic_id = (sql.select([JOBDEFINITIONS.c.topic_id])
+                    .where(JOBDEFINITIONS.c.id == job['jobdefinition_id'])
+                    .as_scalar())
+        query = (sql.select([_TABLE.c.id])
+                 .select_from(_TABLE.join(
+                     JOBDEFINITIONS,
+                     JOBDEFINITIONS.c.id == _TABLE.c.jobdefinition_id))
+                 .where(sql.and_(_TABLE.c.remoteci_id == job['remoteci_id'],
+                                 JOBDEFINITIONS.c.topic_id == topic_id,
+                                 _TABLE.c.created_at < job['created_at'],
+                                 _TABLE.c.state != 'archived'))
+                 .order_by(_TABLE.c.created_at.desc())
+                 .limit(1))
+        job_id = flask.g.db_conn.execute(query).scalar()
+    else:
+        job_id = against
+
+    if job_id is None:
+        raise dci_exc.DCIException('No %s job to compare with' % against,
+                                   status_code=404)
+    return job_id
+
+
+def _get_job_testscases(job_id, name):
+    # one outcome per test, the last one if it is in several files
+    return (sql.select([_TESTSCASES.c.classname, _TESTSCASES.c.name,
+                        _TESTSCASES.c.action])
+            .where(sql.and_(
+                _TESTSCASES.c.job_id == job_id,
+                _TESTSCASES.c.tests_result_id.in_(junit.active_tests_results(
+                    models.TESTS_RESULTS.c.job_id == job_id))))
+            .distinct(_TESTSCASES.c.classname, _TESTSCASES.c.name)
+            .order_by(_TESTSCASES.c.classname, _TESTSCASES.c.name,
+                      _TESTSCASES.c.created_at.desc(),
+                      _TESTSCASES.c.position.desc())
+            .alias(name))
+
+
+@api.route('/jobs/<uuid:j_id>/results/diff', methods=['GET'])
+@auth.login_required
+def get_results_diff_from_jobs(user, j_id):
+    """Get the testscases whose outcome changed since another job.
+
+    The job to compare with is given by the against argument: a job id,
+    previous for the previous job or last for the last job on the same
+    remoteci and topic.
+    """
+
+    values = schemas.results_diff.post(flask.request.args.to_dict())
+    job = v1_utils.verify_existence_and_get(j_id, _TABLE)
+    if not(auth.is_admin(user) or auth.is_in_team(user, job['team_id'])):
+        raise auth.UNAUTHORIZED
+
+    against_id = _get_job_to_compare(job, values['against'])
+    against_job = v1_utils.verify_existence_and_get(against_id, _TABLE)
+    if not(auth.is_admin(user) or
+           auth.is_in_team(user, against_job['team_id'])):
+        raise auth.UNAUTHORIZED
+
+    job_tc = _get_job_testscases(j_id, 'job_testscases')
+    against_tc = _get_job_testscases(against_id, 'against_testscases')
+    classname = sql.func.coalesce(job_tc.c.classname, against_tc.c.classname)
+    name = sql.func.coalesce(job_tc.c.name, against_tc.c.name)
+    failed = ['failure', 'error']
+    status = sql.case([
+        (against_tc.c.action.is_(None), 'added'),
+        (job_tc.c.action.is_(None), 'removed'),
+        (sql.and_(job_tc.c.action.in_(failed),
+                  against_tc.c.action == 'passed'), 'regression'),
+        (sql.and_(job_tc.c.action == 'passed',
+                  against_tc.c.action.in_(failed)), 'fixed')],
+        else_='changed')
+
+    query = (sql.select([classname.label('classname'),
+                         name.label('name'),
+                         job_tc.c.action.label('action'),
+                         against_tc.c.action.label('against_action'),
+                         status.label('status')])
+             .select_from(job_tc.join(
+                 against_tc,
+                 sql.and_(job_tc.c.classname == against_tc.c.classname,
+                          job_tc.c.name == against_tc.c.name),
+                 full=True))
+             .where(job_tc.c.action.is_distinct_from(against_tc.c.action))
+             .order_by(classname, name))
+    if values['status'] is not None:
+        query = query.where(status == values['status'])
+
+    testscases = [dict(row) for row in flask.g.db_conn.execute(query)]
+    return flask.jsonify({'job_id': j_id,
+                          'against_job_id': against_id,
+                          'testscases': testscases,
+                          '_meta': {'count': len(testscases)}})
 
 
 @api.route('/jobs/<uuid:j_id>', methods=['DELETE'])
@@ -550,6 +749,7 @@ def delete_job_by_id(user, j_id):
         raise auth.UNAUTHORIZED
 
     with flask.g.db_conn.begin():
+        previous = _lock_job(j_id)
         values = {'state': 'archived'}
         where_clause = sql.and_(_TABLE.c.id == j_id,
                                 _TABLE.c.etag == if_match_etag)
@@ -560,6 +760,10 @@ def delete_job_by_id(user, j_id):
         if not result.rowcount:
             raise dci_exc.DCIDeleteConflict('Job', j_id)
 
+        if previous['state'] != 'archived':
+            metrics.update_jobs_stats(flask.g.db_conn, [j_id],
+                                      previous['status'], None)
+
         for model in [models.FILES]:
             query = model.update().where(model.c.job_id == j_id).values(
                 **values
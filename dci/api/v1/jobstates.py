@@ -18,9 +18,11 @@ import datetime
 
 import flask
 from flask import json
+from sqlalchemy import sql
 
 from dci.api.v1 import api
 from dci.api.v1 import base
+from dci.api.v1 import metrics
 from dci.api.v1 import utils as v1_utils
 from dci import auth
 from dci.common import exceptions as dci_exc
@@ -61,14 +63,28 @@ def create_jobstates(user):
     # Update job status
     job_id = values.get('job_id')
 
-    query_update_job = (models.JOBS.update()
-                        .where(models.JOBS.c.id == job_id)
-                        .values(status=values.get('status')))
+    with flask.g.db_conn.begin():
+        # the job is locked until its previous status is moved out of the
+        # jobs statistics
+        query_get_job = (sql.select([models.JOBS.c.status,
+                                     models.JOBS.c.state])
+                         .where(models.JOBS.c.id == job_id)
+                         .with_for_update())
+        job = flask.g.db_conn.execute(query_get_job).fetchone()
 
-    result = flask.g.db_conn.execute(query_update_job)
+        query_update_job = (models.JOBS.update()
+                            .where(models.JOBS.c.id == job_id)
+                            .values(status=values.get('status')))
 
-    if not result.rowcount:
-        raise dci_exc.DCIConflict('Job', job_id)
+        result = flask.g.db_conn.execute(query_update_job)
+
+        if not result.rowcount:
+            raise dci_exc.DCIConflict('Job', job_id)
+
+        if (job['status'] != values.get('status') and
+                job['state'] != 'archived'):
+            metrics.update_jobs_stats(flask.g.db_conn, [job_id],
+                                      job['status'], values.get('status'))
 
     result = json.dumps({'jobstate': values})
     return flask.Response(result, 201, content_type='application/json')
@@ -81,7 +97,8 @@ def get_all_jobstates(user, j_id=None):
     """
     args = schemas.args(flask.request.args.to_dict())
 
-    query = v1_utils.QueryBuilder(_TABLE, args, _JS_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _JS_COLUMNS,
+                                  embed_many=_EMBED_MANY)
     if not auth.is_admin(user):
         query.add_extra_condition(_TABLE.c.team_id == user['team_id'])
 
@@ -94,8 +111,9 @@ def get_all_jobstates(user, j_id=None):
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'jobstates': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'jobstates': rows, '_meta': meta})
 
 
 @api.route('/jobstates/<uuid:js_id>', methods=['GET'])
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Ingestion of the JUnit files, run by the worker once they are uploaded
+or by the API when JUNIT_ASYNC_INGESTION is disabled."""
+
+import datetime
+import itertools
+import logging
+
+from lxml import etree
+from sqlalchemy import sql
+
+from dci.api.v1 import transformations as tsfm
+from dci.common import exceptions as dci_exc
+from dci.common import utils
+from dci.db import models
+
+LOG = logging.getLogger(__name__)
+
+# number of testcases inserted per statement
+_CHUNK_SIZE = 1000
+# the message bodies, like the system-out of a test, are truncated
+_MAX_MESSAGE_SIZE = 64 * 1024
+
+
+def _testscases_values(testscases, job_id, tests_result_id, created_at):
+    for position, testcase in enumerate(testscases):
+        testcase.update({
+            'id': utils.gen_uuid(),
+            'created_at': created_at,
+            'position': position,
+            'job_id': job_id,
+            'tests_result_id': tests_result_id
+        })
+        yield testcase
+
+
+def active_tests_results(where_clause):
+    """Select the ids of the tests results matching where_clause whose
+    JUnit file was not deleted, the rows of an archived file are kept."""
+
+    TESTS_RESULTS = models.TESTS_RESULTS
+    FILES = models.FILES
+    return (sql.select([TESTS_RESULTS.c.id])
+            .select_from(TESTS_RESULTS.join(
+                FILES, FILES.c.id == TESTS_RESULTS.c.file_id))
+            .where(sql.and_(where_clause, FILES.c.state != 'archived')))
+
+
+def ingest(db_conn, store, file_id):
+    """Parses a JUnit file and fills the tests_results and testscases
+    tables with it, the previous results of the file are replaced.
+
+    The testcases are inserted by chunks while the file is downloaded and
+    parsed, the whole document is never held in memory.
+
+    Returns the new ingestion status of the file, 'complete' or 'error'
+    when it is not a valid JUnit document, DCINotFound is raised when the
+    file does not exist.
+    """
+
+    FILES = models.FILES
+    TESTS_RESULTS = models.TESTS_RESULTS
+    file = db_conn.execute(
+        sql.select([FILES]).where(FILES.c.id == file_id)).fetchone()
+    if file is None:
+        raise dci_exc.DCINotFound('File', file_id)
+    file_path = store.build_file_path(file['team_id'], file['job_id'],
+                                      file['id'])
+    junit = {}
+    testscases = tsfm.iter_testscases(store.get(file_path)[1], junit,
+                                      max_message_size=_MAX_MESSAGE_SIZE)
+
+    with db_conn.begin():
+        db_conn.execute(TESTS_RESULTS.delete()
+                        .where(TESTS_RESULTS.c.file_id == file_id))
+
+        # the results are dropped if the document turns out to be invalid
+        savepoint = db_conn.begin_nested()
+        tests_result_id = utils.gen_uuid()
+        db_conn.execute(TESTS_RESULTS.insert().values({
+            'id': tests_result_id,
+            'created_at': file['created_at'],
+            'updated_at': datetime.datetime.utcnow().isoformat(),
+            'file_id': file['id'],
+            'job_id': file['job_id'],
+            'name': file['name']
+        }))
+        values = _testscases_values(testscases, file['job_id'],
+                                    tests_result_id, file['created_at'])
+        try:
+            chunk = list(itertools.islice(values, _CHUNK_SIZE))
+            while chunk:
+                db_conn.execute(models.TESTSCASES.insert(), chunk)
+                chunk = list(itertools.islice(values, _CHUNK_SIZE))
+        except etree.XMLSyntaxError as e:
+            LOG.error('XMLSyntaxError %s' % str(e))
+            junit = {}
+
+        if junit:
+            db_conn.execute(
+                TESTS_RESULTS.update()
+                .where(TESTS_RESULTS.c.id == tests_result_id)
+                .values({key: junit[key]
+                         for key in ('success', 'failures', 'errors',
+                                     'skips', 'total', 'time')}))
+            savepoint.commit()
+            status = 'complete'
+        else:
+            savepoint.rollback()
+            status = 'error'
+
+        db_conn.execute(FILES.update()
+                        .where(FILES.c.id == file_id)
+                        .values(ingestion_status=status))
+    return status
+
+
+def try_ingest(db_conn, store, file_id):
+    """Ingests a JUnit file like ingest() but never raises, the file is
+    marked in error when its ingestion fails so that it does not stay
+    pending forever.
+    """
+
+    try:
+        return ingest(db_conn, store, file_id)
+    except Exception:
+        LOG.exception('failed to ingest the file %s' % file_id)
+
+    FILES = models.FILES
+    with db_conn.begin():
+        db_conn.execute(FILES.update()
+                        .where(FILES.c.id == file_id)
+                        .values(ingestion_status='error'))
+    return 'error'
+
+
+def get_files_to_ingest(db_conn):
+    """Returns the ids of the active JUnit files without testcases that
+    were never ingested or whose ingestion is still pending, like the
+    files uploaded before the testcases were stored."""
+
+    FILES = models.FILES
+    TESTS_RESULTS = models.TESTS_RESULTS
+    TESTSCASES = models.TESTSCASES
+    testscases = (sql.select([TESTSCASES.c.id])
+                  .select_from(TESTSCASES.join(
+                      TESTS_RESULTS,
+                      TESTS_RESULTS.c.id == TESTSCASES.c.tests_result_id))
+                  .where(TESTS_RESULTS.c.file_id == FILES.c.id))
+    query = (sql.select([FILES.c.id])
+             .where(sql.and_(
+                 FILES.c.mime == 'application/junit',
+                 FILES.c.state != 'archived',
+                 sql.or_(FILES.c.ingestion_status == None,  # noqa
+                         FILES.c.ingestion_status == 'pending'),
+                 ~sql.exists(testscases)))
+             .order_by(FILES.c.created_at))
+    return [row[FILES.c.id] for row in db_conn.execute(query)]
@@ -14,70 +14,228 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
+
 import flask
-from sqlalchemy import sql
+from sqlalchemy import sql, func, Date, DateTime, Integer
+from sqlalchemy.dialects import postgresql as pg
 
 from dci.api.v1 import api
 from dci import auth
+from dci.common import schemas
 from dci.db import models
 
 
-def _get_all_topics():
-    stmt = (sql.select([models.TOPICS.c.id,
-                        models.TOPICS.c.name])
-            .select_from(models.TOPICS)
-            .where(models.TOPICS.c.state == 'active')
-            .order_by(models.TOPICS.c.name))
-    return flask.g.db_conn.execute(stmt).fetchall()
+_JOBS_STATS_COLUMNS = ['day', 'topic_id', 'remoteci_id', 'component_id',
+                       'status', 'nb_jobs']
+_JOBS_METRICS_KEYS = ['date', 'topic_id', 'remoteci_id', 'component_id']
+
+
+def _get_delays(values):
+    """Get, for every active component of the active topics, the delays in
+    seconds between the creation of the component and the creation of the
+    jobs which ran it, with a single aggregate query."""
+
+    TOPICS = models.TOPICS
+    COMPONENTS = models.COMPONENTS
+    JJC = models.JOIN_JOBS_COMPONENTS
+    JOBS = models.JOBS
+
+    delay = sql.cast(
+        func.trunc(sql.extract('epoch',
+                               JOBS.c.created_at - COMPONENTS.c.created_at)),
+        Integer)
+    columns = [TOPICS.c.name.label('topic'),
+               COMPONENTS.c.id,
+               COMPONENTS.c.name.label('component'),
+               COMPONENTS.c.created_at.label('date'),
+               func.array_agg(pg.aggregate_order_by(delay, JOBS.c.created_at))
+               .filter(JOBS.c.id != None)  # noqa
+               .label('values')]
+    if values['percentiles']:
+        columns += [func.percentile_disc(0.5).within_group(delay).label('p50'),
+                    func.percentile_disc(0.9).within_group(delay).label('p90')]
+
+    components_clause = [COMPONENTS.c.topic_id == TOPICS.c.id,
+                         COMPONENTS.c.state == 'active']
+    if values['since']:
+        components_clause.append(COMPONENTS.c.created_at >= values['since'])
+    if values['until']:
+        components_clause.append(COMPONENTS.c.created_at < values['until'])
+
+    jobs = sql.join(JJC, JOBS, sql.and_(JOBS.c.id == JJC.c.job_id,
+                                        JOBS.c.state == 'active'))
+    components = sql.outerjoin(COMPONENTS, jobs,
+                               JJC.c.component_id == COMPONENTS.c.id)
+    # the topics without components are kept by the outer join
+    from_clause = sql.outerjoin(TOPICS, components,
+                                sql.and_(*components_clause))
+
+    where_clause = [TOPICS.c.state == 'active']
+    if values['topic_id']:
+        where_clause.append(TOPICS.c.id == values['topic_id'])
+
+    query = (sql.select(columns)
+             .select_from(from_clause)
+             .where(sql.and_(*where_clause))
+             .group_by(TOPICS.c.id, COMPONENTS.c.id)
+             .order_by(TOPICS.c.name, COMPONENTS.c.created_at))
+    return flask.g.db_conn.execute(query).fetchall()
+
 
+def _jobs_stats_query(where_clause, status=None, nb_jobs=1):
+    """Count the ended jobs matching where_clause per day, topic, remoteci,
+    component and status, or as the given status when status is set."""
 
-def _get_all_components_by_topic(topic_id):
-    stmt = (sql.select([models.COMPONENTS.c.id,
-                        models.COMPONENTS.c.name,
-                        models.COMPONENTS.c.created_at])
-            .select_from(models.COMPONENTS)
-            .where(
-                sql.and_(
-                    models.COMPONENTS.c.topic_id == topic_id,
-                    models.COMPONENTS.c.state == 'active'))
-            .order_by(models.COMPONENTS.c.created_at.asc()))
-    return flask.g.db_conn.execute(stmt).fetchall()
+    JOBS = models.JOBS
+    JD = models.JOBDEFINITIONS
+    JJC = models.JOIN_JOBS_COMPONENTS
 
+    keys = [sql.cast(JOBS.c.created_at, Date), JD.c.topic_id,
+            JOBS.c.remoteci_id, JJC.c.component_id]
+    if status is None:
+        keys.append(JOBS.c.status)
+        columns = keys
+    else:
+        columns = keys + [sql.cast(sql.literal(status), models.STATUSES)]
 
-def _get_all_jobs_by_component(component_id):
-    stmt = (sql.select([models.JOBS.c.created_at])
+    return (sql.select(columns + [func.count() * nb_jobs])
             .select_from(
-                sql.join(
-                    models.JOBS,
-                    models.JOIN_JOBS_COMPONENTS))
-            .where(
-                sql.and_(
-                    models.JOBS.c.state == 'active',
-                    models.JOIN_JOBS_COMPONENTS.c.component_id == component_id))  # noqa
-            .order_by(models.JOBS.c.created_at))
-    return flask.g.db_conn.execute(stmt).fetchall()
+                JOBS.join(JD, JD.c.id == JOBS.c.jobdefinition_id)
+                .join(JJC, JJC.c.job_id == JOBS.c.id))
+            .where(where_clause)
+            .group_by(*keys))
+
+
+def update_jobs_stats(db_conn, jobs_ids, previous_status, status):
+    """Move the given jobs from previous_status to status in the jobs
+    statistics, to be run with the update of the jobs status."""
+
+    JS = models.JOBS_STATS
+    jobs_ids = list(jobs_ids)
+    for stats_status, nb_jobs in ((previous_status, -1), (status, 1)):
+        if stats_status not in models.JOB_FINAL_STATUSES or not jobs_ids:
+            continue
+        query = _jobs_stats_query(models.JOBS.c.id.in_(jobs_ids),
+                                  stats_status, nb_jobs)
+        insert = pg.insert(JS).from_select(_JOBS_STATS_COLUMNS, query)
+        insert = insert.on_conflict_do_update(
+            index_elements=[c.name for c in JS.primary_key],
+            set_={'nb_jobs': JS.c.nb_jobs + insert.excluded.nb_jobs})
+        db_conn.execute(insert)
+
+
+def remove_jobs_stats(db_conn, jobs):
+    """Remove the jobs, rows with their id and status, from the jobs
+    statistics when they are archived."""
+
+    jobs_ids = collections.defaultdict(list)
+    for job in jobs:
+        jobs_ids[job['status']].append(job['id'])
+    for status, ids in jobs_ids.items():
+        update_jobs_stats(db_conn, ids, status, None)
+
+
+def rebuild_jobs_stats(db_conn):
+    """Compute again the whole jobs statistics from the jobs table, run by
+    dci-jobsstats to backfill them."""
+
+    JS = models.JOBS_STATS
+    JOBS = models.JOBS
+    with db_conn.begin():
+        # the status updates running meanwhile wait for the rebuild
+        db_conn.execute('LOCK TABLE jobs_stats IN EXCLUSIVE MODE')
+        db_conn.execute(JS.delete())
+        query = _jobs_stats_query(
+            sql.and_(JOBS.c.status.in_(models.JOB_FINAL_STATUSES),
+                     JOBS.c.state != 'archived'))
+        db_conn.execute(JS.insert().from_select(_JOBS_STATS_COLUMNS, query))
+
+
+@api.route('/metrics/caches', methods=['GET'])
+@auth.login_required
+def get_caches_metrics(user):
+    """Hits and misses of the caches of this process."""
+
+    if not auth.is_admin(user):
+        raise auth.UNAUTHORIZED
+
+    app = flask.current_app
+    return flask.jsonify({'caches': {
+        'users': app.users_cache.stats(),
+        'remotecis': app.remotecis_cache.stats(),
+        'schedule': app.schedule_cache.stats()
+    }})
 
 
 @api.route('/metrics/topics', methods=['GET'])
 @auth.login_required
 def get_all_metrics(user):
+    """Delays between the creation of the components and of their jobs.
+
+    The components can be filtered on their creation date with since
+    (included) and until (excluded), percentiles adds the p50 and p90 of
+    the delays of each component.
+    """
+
     if not auth.is_admin(user):
         raise auth.UNAUTHORIZED
 
+    values = schemas.metrics_topics.post(flask.request.args.to_dict())
+
     data = {}
-    topics = _get_all_topics()
-    for t in topics:
-        data[t['name']] = []
-        components = _get_all_components_by_topic(t['id'])
-        for c in components:
-            jobs = _get_all_jobs_by_component(c['id'])
-            values = []
-            for j in jobs:
-                delay = j['created_at'] - c['created_at']
-                values.append(int(delay.total_seconds()))
-            data[t['name']].append({'component': c['name'],
-                                    'date': c['created_at'],
-                                    'values': values})
+    for row in _get_delays(values):
+        components = data.setdefault(row['topic'], [])
+        if row['id'] is None:
+            continue
+        component = {'component': row['component'],
+                     'date': row['date'],
+                     'values': row['values'] or []}
+        if values['percentiles']:
+            component.update({'p50': row['p50'], 'p90': row['p90']})
+        components.append(component)
 
     return flask.jsonify({'topics': data,
-                          '_meta': {'count': len(topics)}})
+                          '_meta': {'count': len(data)}})
+
+
+@api.route('/metrics/jobs', methods=['GET'])
+@auth.login_required
+def get_jobs_metrics(user):
+    """Number of ended jobs per status, bucketed by day, week or month of
+    creation of the jobs, for every topic, remoteci and component."""
+
+    if not auth.is_admin(user):
+        raise auth.UNAUTHORIZED
+
+    values = schemas.metrics_jobs.post(flask.request.args.to_dict())
+
+    JS = models.JOBS_STATS
+    where_clause = [JS.c.nb_jobs != 0]
+    if values['since']:
+        where_clause.append(JS.c.day >= values['since'])
+    if values['until']:
+        where_clause.append(JS.c.day < values['until'])
+    for key in ('topic_id', 'remoteci_id', 'component_id'):
+        if values[key]:
+            where_clause.append(JS.c[key] == values[key])
+
+    date = func.date_trunc(values['bucket'], sql.cast(JS.c.day, DateTime))
+    keys = [date.label('date'), JS.c.topic_id, JS.c.remoteci_id,
+            JS.c.component_id]
+    query = (sql.select(keys + [JS.c.status,
+                                func.sum(JS.c.nb_jobs).label('nb_jobs')])
+             .where(sql.and_(*where_clause))
+             .group_by(*(keys + [JS.c.status]))
+             .order_by(*keys))
+
+    stats = []
+    for row in flask.g.db_conn.execute(query):
+        key = [row['date'], row['topic_id'], row['remoteci_id'],
+               row['component_id']]
+        if not stats or [stats[-1][k] for k in _JOBS_METRICS_KEYS] != key:
+            stats.append(dict(zip(_JOBS_METRICS_KEYS, key), statuses={}))
+        stats[-1]['statuses'][row['status']] = row['nb_jobs']
+
+    return flask.jsonify({'jobs': stats,
+                          '_meta': {'count': len(stats)}})
@@ -102,8 +102,9 @@ def get_all_permissions(user):
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'permissions': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'permissions': rows, '_meta': meta})
 
 
 @api.route('/permissions/<uuid:permission_id>', methods=['GET'])
@@ -20,6 +20,7 @@ from sqlalchemy import sql
 
 from dci.api.v1 import api
 from dci.api.v1 import base
+from dci.api.v1 import metrics
 from dci.api.v1 import utils as v1_utils
 from dci import auth
 from dci.common import exceptions as dci_exc
@@ -79,7 +80,8 @@ def get_all_remotecis(user, t_id=None):
     args = schemas.args(flask.request.args.to_dict())
 
     # build the query thanks to the QueryBuilder class
-    query = v1_utils.QueryBuilder(_TABLE, args, _R_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _R_COLUMNS,
+                                  embed_many=_EMBED_MANY)
 
     # If it's not an admin then restrict the view to the team's file
     if not auth.is_admin(user):
@@ -137,6 +139,8 @@ def put_remoteci(user, r_id):
     if not result.rowcount:
         raise dci_exc.DCIConflict('RemoteCI', r_id)
 
+    auth.invalidate_remoteci(r_id)
+
     return flask.Response(None, 204, headers={'ETag': values['etag']},
                           content_type='application/json')
 
@@ -165,10 +169,16 @@ def delete_remoteci_by_id(user, remoteci_id):
         if not result.rowcount:
             raise dci_exc.DCIDeleteConflict('RemoteCI', remoteci_id)
 
-        for model in [models.JOBS]:
-            query = model.update().where(model.c.remoteci_id == remoteci_id) \
-                         .values(**values)
-            flask.g.db_conn.execute(query)
+        JOBS = models.JOBS
+        query = (JOBS.update()
+                 .where(sql.and_(JOBS.c.remoteci_id == remoteci_id,
+                                 JOBS.c.state != 'archived'))
+                 .values(**values)
+                 .returning(JOBS.c.id, JOBS.c.status))
+        metrics.remove_jobs_stats(flask.g.db_conn,
+                                  flask.g.db_conn.execute(query))
+
+    auth.invalidate_remoteci(remoteci_id)
 
     return flask.Response(None, 204, content_type='application/json')
 
@@ -296,6 +306,8 @@ def put_api_secret(user, r_id):
     if not result.rowcount:
         raise dci_exc.DCIConflict('RemoteCI', r_id)
 
+    auth.invalidate_remoteci(r_id)
+
     res = flask.jsonify(({'id': r_id, 'etag': values['etag'],
                           'api_secret': values['api_secret']}))
     res.headers.add_header('ETag', values['etag'])
@@ -57,6 +57,8 @@ def create_roles(user):
     except sa_exc.IntegrityError:
         raise dci_exc.DCICreationConflict(_TABLE.name, 'name')
 
+    auth.refresh_roles()
+
     return flask.Response(
         json.dumps({'role': values}), 201,
         headers={'ETag': values['etag']}, content_type='application/json'
@@ -87,6 +89,8 @@ def update_role(user, role_id):
     if not result.rowcount:
         raise dci_exc.DCIConflict('Role', role_id)
 
+    auth.refresh_roles()
+
     return flask.Response(None, 204, headers={'ETag': values['etag']},
                           content_type='application/json')
 
@@ -95,7 +99,8 @@ def update_role(user, role_id):
 @auth.login_required
 def get_all_roles(user):
     args = schemas.args(flask.request.args.to_dict())
-    query = v1_utils.QueryBuilder(_TABLE, args, _T_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _T_COLUMNS,
+                                  embed_many=_EMBED_MANY)
 
     query.add_extra_condition(_TABLE.c.state != 'archived')
 
@@ -110,8 +115,9 @@ def get_all_roles(user):
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'roles': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'roles': rows, '_meta': meta})
 
 
 @api.route('/roles/<uuid:role_id>', methods=['GET'])
@@ -151,6 +157,8 @@ def delete_role_by_id(user, role_id):
     if not result.rowcount:
         raise dci_exc.DCIDeleteConflict('Role', role_id)
 
+    auth.refresh_roles()
+
     return flask.Response(None, 204, content_type='application/json')
 
 
@@ -163,7 +171,9 @@ def get_to_purge_archived_roles(user):
 @api.route('/roles/purge', methods=['POST'])
 @auth.login_required
 def purge_archived_roles(user):
-    return base.purge_archived_resources(user, _TABLE)
+    result = base.purge_archived_resources(user, _TABLE)
+    auth.refresh_roles()
+    return result
 
 
 @api.route('/roles/<uuid:role_id>/permissions', methods=['POST'])
@@ -20,6 +20,7 @@ from sqlalchemy import sql
 
 from dci.api.v1 import api
 from dci.api.v1 import base
+from dci.api.v1 import metrics
 from dci.api.v1 import remotecis
 from dci.api.v1 import tests
 from dci.api.v1 import utils as v1_utils
@@ -69,7 +70,8 @@ def create_teams(user):
 def get_all_teams(user):
     args = schemas.args(flask.request.args.to_dict())
 
-    query = v1_utils.QueryBuilder(_TABLE, args, _T_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _T_COLUMNS,
+                                  embed_many=_EMBED_MANY)
 
     if not auth.is_admin(user):
         query.add_extra_condition(_TABLE.c.id == user['team_id'])
@@ -80,8 +82,9 @@ def get_all_teams(user):
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'teams': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'teams': rows, '_meta': meta})
 
 
 @api.route('/teams/<uuid:t_id>', methods=['GET'])
@@ -132,6 +135,8 @@ def put_team(user, t_id):
     if not result.rowcount:
         raise dci_exc.DCIConflict('Team', t_id)
 
+    auth.invalidate_team(t_id)
+
     return flask.Response(None, 204, headers={'ETag': values['etag']},
                           content_type='application/json')
 
@@ -160,12 +165,23 @@ def delete_team_by_id(user, t_id):
             raise dci_exc.DCIDeleteConflict('Team', t_id)
 
         for model in [models.FILES, models.TESTS, models.REMOTECIS,
-                      models.USERS, models.JOBS]:
+                      models.USERS]:
             query = model.update().where(model.c.team_id == t_id).values(
                 **values
             )
             flask.g.db_conn.execute(query)
 
+        JOBS = models.JOBS
+        query = (JOBS.update()
+                 .where(sql.and_(JOBS.c.team_id == t_id,
+                                 JOBS.c.state != 'archived'))
+                 .values(**values)
+                 .returning(JOBS.c.id, JOBS.c.status))
+        metrics.remove_jobs_stats(flask.g.db_conn,
+                                  flask.g.db_conn.execute(query))
+
+    auth.invalidate_team(t_id)
+
     return flask.Response(None, 204, content_type='application/json')
 
 
@@ -92,7 +92,8 @@ def get_all_tests(user, team_id):
     if not(auth.is_admin(user) or auth.is_in_team(user, team_id)):
         raise auth.UNAUTHORIZED
 
-    query = v1_utils.QueryBuilder(_TABLE, args, _T_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _T_COLUMNS,
+                                  embed_many=_EMBED_MANY)
     query.add_extra_condition(_TABLE.c.team_id == team_id)
     query.add_extra_condition(_TABLE.c.state != 'archived')
 
@@ -101,8 +102,9 @@ def get_all_tests(user, team_id):
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'tests': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'tests': rows, '_meta': meta})
 
 
 @api.route('/tests/<uuid:t_id>', methods=['GET'])
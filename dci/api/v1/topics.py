@@ -22,6 +22,7 @@ from dci.api.v1 import api
 from dci.api.v1 import base
 from dci.api.v1 import components
 from dci.api.v1 import jobdefinitions
+from dci.api.v1 import junit
 from dci.api.v1 import utils as v1_utils
 from dci import auth
 from dci.common import exceptions as dci_exc
@@ -79,7 +80,8 @@ def get_topic_by_id(user, topic_id):
 def get_all_topics(user):
     args = schemas.args(flask.request.args.to_dict())
     # if the user is an admin then he can get all the topics
-    query = v1_utils.QueryBuilder(_TABLE, args, _T_COLUMNS)
+    query = v1_utils.QueryBuilder(_TABLE, args, _T_COLUMNS,
+                                  embed_many=_EMBED_MANY)
 
     if not auth.is_admin(user):
         if 'teams' in args['embed']:
@@ -93,8 +95,9 @@ def get_all_topics(user):
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'topics': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'topics': rows, '_meta': meta})
 
 
 @api.route('/topics/<uuid:topic_id>', methods=['PUT'])
@@ -242,6 +245,57 @@ def get_jobs_status_from_components(user, topic_id, type_id):
                           '_meta': {'count': nb_row}})
 
 
+@api.route('/topics/<uuid:topic_id>/results/flaky', methods=['GET'])
+@auth.login_required
+def get_flaky_tests(user, topic_id):
+    """Get the tests which both passed and failed over the last jobs of
+    the topic.
+    """
+
+    values = schemas.flaky_tests.post(flask.request.args.to_dict())
+    topic_id = v1_utils.verify_existence_and_get(topic_id, _TABLE, get_id=True)
+    v1_utils.verify_team_in_topic(user, topic_id)
+
+    JOBS = models.JOBS
+    JOBDEFINITIONS = models.JOBDEFINITIONS
+    TESTSCASES = models.TESTSCASES
+
+    jobs = (sql.select([JOBS.c.id])
+            .select_from(JOBS.join(
+                JOBDEFINITIONS,
+                JOBDEFINITIONS.c.id == JOBS.c.jobdefinition_id))
+            .where(sql.and_(JOBDEFINITIONS.c.topic_id == topic_id,
+                            JOBS.c.state != 'archived'))
+            .order_by(JOBS.c.created_at.desc())
+            .limit(values['jobs']))
+    if not auth.is_admin(user):
+        jobs = jobs.where(JOBS.c.team_id == user['team_id'])
+    if values['remoteci_id'] is not None:
+        jobs = jobs.where(JOBS.c.remoteci_id == values['remoteci_id'])
+    jobs = jobs.alias('jobs')
+
+    nb_jobs = func.count(sql.distinct(TESTSCASES.c.job_id))
+    passed = nb_jobs.filter(TESTSCASES.c.action == 'passed')
+    failed = nb_jobs.filter(TESTSCASES.c.action.in_(['failure', 'error']))
+    query = (sql.select([TESTSCASES.c.classname,
+                         TESTSCASES.c.name,
+                         nb_jobs.label('jobs'),
+                         passed.label('passed'),
+                         failed.label('failed')])
+             .where(TESTSCASES.c.tests_result_id.in_(
+                 junit.active_tests_results(
+                     models.TESTS_RESULTS.c.job_id.in_(
+                         sql.select([jobs.c.id])))))
+             .group_by(TESTSCASES.c.classname, TESTSCASES.c.name)
+             .having(sql.and_(passed > 0, failed > 0))
+             .order_by(failed.desc(), TESTSCASES.c.classname,
+                       TESTSCASES.c.name))
+    rows = flask.g.db_conn.execute(query).fetchall()
+
+    return flask.jsonify({'tests': rows,
+                          '_meta': {'count': len(rows)}})
+
+
 @api.route('/topics/<uuid:topic_id>/jobdefinitions', methods=['GET'])
 @auth.login_required
 def get_all_jobdefinitions_by_topic(user, topic_id):
@@ -18,6 +18,8 @@ import logging
 from lxml import etree
 from datetime import timedelta
 
+import six
+
 LOG = logging.getLogger(__name__)
 
 
@@ -39,56 +41,121 @@ def parse_action(root):
     }
 
 
-def parse_testscases(root):
-    testscases = []
-    for testcase in root.findall('testcase'):
-        testcase_dict = {
-            'action': 'passed',
-            'message': '',
-            'type': '',
-            'value': ''
-        }
-        testcase_dict.update(parse_testcase(testcase))
-        if len(testcase) > 0:
-            action = parse_action(testcase[0])
-            testcase_dict.update(action)
-        testscases.append(testcase_dict)
-    return testscases
+def _as_chunks(data):
+    if isinstance(data, (six.binary_type, six.text_type)):
+        data = [data]
+    for chunk in data:
+        if isinstance(chunk, six.text_type):
+            chunk = chunk.encode('utf-8')
+        if chunk:
+            yield chunk
 
 
-def junit2dict(string):
-    if not string:
-        return {}
-    results = {
-        'success': 0,
-        'errors': 0,
-        'failures': 0,
-        'skips': 0,
-        'total': 0,
-        'testscases': []
-    }
-    try:
-        root = etree.fromstring(string)
-        testscases = parse_testscases(root)
+def _parse_events(data):
+    """Parses the XML data, a string or an iterable of chunks, and yields
+    the elements as soon as they end.
+
+    Returns without any element if data is empty.
+    """
+    parser = None
+    for chunk in _as_chunks(data):
+        if parser is None:
+            parser = etree.XMLPullParser(events=('end',))
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            yield element
+    if parser is not None:
+        parser.close()
+        for _, element in parser.read_events():
+            yield element
+
+
+def _truncate(text, max_size):
+    if text is None or max_size is None:
+        return text
+    return text[:max_size]
+
+
+def iter_testscases(data, results, max_message_size=None):
+    """Yields the testcases of a JUnit document, a string or an iterable of
+    chunks like the blocks of a store, as soon as they are parsed.
+
+    The totals of the document are filled in results as the testcases are
+    consumed, results stays empty when the document is empty. The message
+    bodies of the testcases are truncated to max_message_size characters.
+    Raises etree.XMLSyntaxError when the document is not valid.
+    """
+    test_duration = timedelta(seconds=0)
+    for element in _parse_events(data):
+        if not results:
+            results.update({'success': 0, 'errors': 0, 'failures': 0,
+                            'skips': 0, 'total': 0, 'time': 0})
+        parent = element.getparent()
+        # only the children of the root element are processed, the
+        # testcases among them count
+        if parent is None or parent.getparent() is not None:
+            continue
+        if element.tag == 'testcase':
+            testcase = {
+                'action': 'passed',
+                'message': '',
+                'type': '',
+                'value': ''
+            }
+            testcase.update(parse_testcase(element))
+            if len(element) > 0:
+                testcase.update(parse_action(element[0]))
+                testcase['value'] = _truncate(testcase['value'],
+                                              max_message_size)
 
-        test_duration = timedelta(seconds=0)
-        for testcase in testscases:
             results['total'] += 1
-            test_duration += timedelta(seconds=float(testcase['time']))
+            test_duration += timedelta(seconds=testcase['time'])
             if testcase['action'] == 'skipped':
                 results['skips'] += 1
             if testcase['action'] == 'error':
                 results['errors'] += 1
             if testcase['action'] == 'failure':
                 results['failures'] += 1
+            results['success'] = (results['total'] -
+                                  results['failures'] -
+                                  results['errors'] -
+                                  results['skips'])
+            results['time'] = int(test_duration.total_seconds() * 1000)
+            yield testcase
+
+        # drop what has been processed
+        parent.remove(element)
+
 
-        results['testscases'] = testscases
-        results['success'] = (results['total'] -
-                              results['failures'] -
-                              results['errors'] -
-                              results['skips'])
-        results['time'] = int(test_duration.total_seconds() * 1000)
+def junit2dict(data, with_testscases=True, max_message_size=None):
+    """Computes the results of a JUnit document, a string or an iterable of
+    chunks like the blocks of a store.
+
+    The document is parsed incrementally and the processed testcases are
+    dropped, with_testscases=False only computes the totals. The message
+    bodies of the testcases are truncated to max_message_size characters.
+    """
+    results = {}
+    testscases = []
+    try:
+        for testcase in iter_testscases(data, results, max_message_size):
+            if with_testscases:
+                testscases.append(testcase)
     except etree.XMLSyntaxError as e:
-        results['error'] = "XMLSyntaxError: %s " % str(e)
+        results = {
+            'success': 0,
+            'errors': 0,
+            'failures': 0,
+            'skips': 0,
+            'total': 0,
+            'testscases': [],
+            'error': "XMLSyntaxError: %s " % str(e)
+        }
         LOG.error('XMLSyntaxError %s' % str(e))
+        return results
+
+    if not results:
+        return {}
+
+    results['testscases'] = testscases
     return results
@@ -95,7 +95,8 @@ def create_users(user):
 @auth.login_required
 def get_all_users(user, team_id=None):
     args = schemas.args(flask.request.args.to_dict())
-    query = v1_utils.QueryBuilder(_TABLE, args, _USERS_COLUMNS, ['password'])
+    query = v1_utils.QueryBuilder(_TABLE, args, _USERS_COLUMNS, ['password'],
+                                  embed_many=_EMBED_MANY)
     # If it's not an admin, then get only the users of the caller's team
     if not auth.is_admin(user):
         query.add_extra_condition(_TABLE.c.team_id == user['team_id'])
@@ -110,8 +111,9 @@ def get_all_users(user, team_id=None):
     rows = query.execute(fetchall=True)
     rows = v1_utils.format_result(rows, _TABLE.name, args['embed'],
                                   _EMBED_MANY)
+    rows, meta = query.paginate(rows, nb_rows)
 
-    return flask.jsonify({'users': rows, '_meta': {'count': nb_rows}})
+    return flask.jsonify({'users': rows, '_meta': meta})
 
 
 def user_by_id(user, user_id):
@@ -165,6 +167,8 @@ def put_user(user, user_id):
     if not result.rowcount:
         raise dci_exc.DCIConflict('User', user_id)
 
+    auth.invalidate_user(user_id)
+
     return flask.Response(None, 204, headers={'ETag': values['etag']},
                           content_type='application/json')
 
@@ -193,6 +197,8 @@ def delete_user_by_id(user, user_id):
     if not result.rowcount:
         raise dci_exc.DCIDeleteConflict('User', user_id)
 
+    auth.invalidate_user(user_id)
+
     return flask.Response(None, 204, content_type='application/json')
 
 
@@ -14,15 +14,24 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import base64
+import collections
+import datetime
+import uuid
+
 import flask
+from flask import json
 import six
 from sqlalchemy import sql, func
+from sqlalchemy.ext.compiler import compiles
+import werkzeug.http
 
 from dci import auth
 from dci.common import exceptions as dci_exc
 from dci.common import utils
 from dci.db import models
 from dci.db import embeds
+from dci.stores import filesystem
 
 
 def verify_existence_and_get(id, table, get_id=False):
@@ -58,6 +67,14 @@ def user_topic_ids(user):
     return [str(row[0]) for row in rows]
 
 
+def invalidate_schedule(topic_id):
+    """Remove a topic from the scheduling cache, to be called when its
+    jobdefinitions or its components change."""
+
+    flask.current_app.schedule_cache.invalidate(
+        lambda schedule: schedule['topic_id'] == str(topic_id))
+
+
 def verify_team_in_topic(user, topic_id):
     """Verify that the user's team does belongs to the given topic. If
     the user is an admin then it belongs to all topics.
@@ -172,6 +189,63 @@ def get_number_of_rows(root_table, where=None):
     return flask.g.db_conn.execute(query).scalar()
 
 
+class _Explain(sql.expression.Executable, sql.expression.ClauseElement):
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, 'postgresql')
+def _compile_explain(element, compiler, **kw):
+    return 'EXPLAIN (FORMAT JSON) %s' % compiler.process(element.statement,
+                                                         **kw)
+
+
+def estimate_number_of_rows(query):
+    """Return the number of rows the planner expects the query to return.
+
+    The estimation relies on the table statistics, it does not read the
+    rows so it is cheap but not exact.
+    """
+
+    plan = flask.g.db_conn.execute(_Explain(query)).scalar()
+    if isinstance(plan, six.string_types):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _parse_cursor_date(value):
+    for date_format in ('%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            return datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ValueError('invalid date "%s"' % value)
+
+
+def encode_cursor(row):
+    """Build the opaque cursor which points right after the given row."""
+
+    created_at = row['created_at']
+    if isinstance(created_at, datetime.datetime):
+        created_at = created_at.isoformat()
+    cursor = '%s|%s' % (created_at, row['id'])
+    cursor = base64.urlsafe_b64encode(cursor.encode('utf-8'))
+    return cursor.decode('utf-8').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, id) couple stored in a cursor."""
+
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        value = base64.urlsafe_b64decode(str(cursor + padding))
+        created_at, row_id = value.decode('utf-8').split('|', 1)
+        return _parse_cursor_date(created_at), uuid.UUID(row_id)
+    except (TypeError, ValueError):
+        raise dci_exc.DCIException('Invalid cursor: "%s"' % cursor)
+
+
 def request_wants_html():
     best = (flask.request.accept_mimetypes
             .best_match(['text/html', 'application/json']))
@@ -183,16 +257,26 @@ def request_wants_html():
 
 class QueryBuilder(object):
 
-    def __init__(self, root_table, args={}, strings_to_columns={}, ignore_columns=None):  # noqa
+    def __init__(self, root_table, args={}, strings_to_columns={}, ignore_columns=None, embed_many=None):  # noqa
         self._root_table = root_table
         self._embeds = args.get('embed', [])
+        self._list_embeds = self._embeds
+        self._embed_many = embed_many
+        self._batched_embeds = []
+        if embed_many and self._embeds:
+            self._embeds, self._batched_embeds = self._split_embeds(
+                args.get('sort', []), embed_many)
         self._limit = args.get('limit', None)
         self._offset = args.get('offset', None)
+        self._count = args.get('count', 'exact')
         self._sort = self._get_sort_query_with_embeds(args.get('sort', []),
                                                       root_table.name,
                                                       strings_to_columns)
         self._where = where_query(args.get('where', []), self._root_table,
                                   strings_to_columns)
+        self._after = args.get('after', None)
+        if self._after is not None:
+            self._sort = self._get_keyset_sort(args.get('sort', []))
         self._strings_to_columns = strings_to_columns
         self._extras_conditions = []
         self._ignored_columns = ignore_columns or []
@@ -210,6 +294,51 @@ class QueryBuilder(object):
                         get_columns_name_with_objects(embed_elem, table_prefix=True))  # noqa
         return sort_query(args_sort, strings_to_columns, strings_to_columns_with_embeds)  # noqa
 
+    def _get_keyset_sort(self, args_sort):
+        # cursor pagination walks the (created_at, id) index, so it only
+        # works when the rows are sorted by creation date
+        valid_sort = ['created_at', '-created_at']
+        if 'created_at' not in self._root_table.c:
+            raise dci_exc.DCIException(
+                'Cursor pagination not supported on %s' %
+                self._root_table.name)
+        if len(args_sort) > 1 or \
+                (args_sort and args_sort[0].strip() not in valid_sort):
+            raise dci_exc.DCIException(
+                'Invalid sort key with cursor: "%s"' % ','.join(args_sort),
+                payload={'Valid sort keys': valid_sort})
+        if self._offset:
+            raise dci_exc.DCIException('Cursor and offset are exclusive')
+
+        self._keyset_order = sql.desc
+        if args_sort and not args_sort[0].strip().startswith('-'):
+            self._keyset_order = sql.asc
+        return [self._keyset_order(self._root_table.c.created_at),
+                self._keyset_order(self._root_table.c.id)]
+
+    def _split_embeds(self, args_sort, embed_many):
+        # joining several one-to-many embeds returns the cartesian product
+        # of their rows, so each of them is loaded by its own query unless
+        # it is used for sorting or its parent is a sorted embed (lastjob)
+        sorted_embeds = [s.strip(' -').rsplit('.', 1)[0]
+                         for s in args_sort if '.' in s]
+        embed_joins = embeds.EMBED_JOINS[self._root_table.name]()
+        joined_embeds = []
+        batched_embeds = []
+        for embed_elem in self._embeds:
+            left = embed_elem.split('.')[0]
+            left_sorted = any(param.get('sort') is not None
+                              for param in embed_joins.get(left, []))
+            if not embed_many.get(embed_elem) or \
+                    embed_elem in sorted_embeds or \
+                    (left != embed_elem and left_sorted):
+                joined_embeds.append(embed_elem)
+                continue
+            batched_embeds.append(embed_elem)
+            if left != embed_elem:
+                joined_embeds.append(left)
+        return joined_embeds, batched_embeds
+
     def add_extra_condition(self, condition):
         self._extras_conditions.append(condition)
 
@@ -232,6 +361,27 @@ class QueryBuilder(object):
             query = query.where(e_c)
         return query
 
+    def _add_keyset_to_query(self, query):
+        # an empty cursor starts the walk from the first row
+        if not self._after:
+            return query
+        created_at, row_id = decode_cursor(self._after)
+        root_columns = sql.tuple_(self._root_table.c.created_at,
+                                  self._root_table.c.id)
+        cursor_values = sql.tuple_(
+            sql.literal(created_at, self._root_table.c.created_at.type),
+            sql.literal(row_id, self._root_table.c.id.type))
+        if self._keyset_order is sql.desc:
+            return query.where(root_columns < cursor_values)
+        return query.where(root_columns > cursor_values)
+
+    def _get_limit(self):
+        # without counting, one extra row is fetched to know if there is
+        # a next page
+        if self._count == 'none' and self._limit:
+            return self._limit + 1
+        return self._limit
+
     def _do_subquery(self):
         # if embed with limit or offset requested then we will use a subquery
         # for the root table
@@ -260,9 +410,10 @@ class QueryBuilder(object):
         if self._do_subquery():
             root_subquery = sql.select(select_clause)
             root_subquery = self._add_where_to_query(root_subquery)
+            root_subquery = self._add_keyset_to_query(root_subquery)
             root_subquery = self._add_sort_to_query(root_subquery)
             if self._limit:
-                root_subquery = root_subquery.limit(self._limit)
+                root_subquery = root_subquery.limit(self._get_limit())
             if self._offset:
                 root_subquery = root_subquery.offset(self._offset)
             root_subquery = root_subquery.alias(self._root_table.name)
@@ -295,26 +446,164 @@ class QueryBuilder(object):
 
         if not self._do_subquery():
             query = self._add_where_to_query(query)
+            query = self._add_keyset_to_query(query)
 
             if self._limit:
-                query = query.limit(self._limit)
+                query = query.limit(self._get_limit())
             if self._offset:
                 query = query.offset(self._offset)
         query = self._add_sort_to_query(query)
         return query
 
     def get_number_of_rows(self, root_table=None, where=None):
+        if self._count == 'none':
+            return None
+
+        column = self._root_table.c.id
+        if root_table is not None:
+            column = root_table.c.id
+
+        if self._count == 'estimate':
+            query = sql.select([column])
+        else:
+            query = sql.select([func.count(column)])
+
         if root_table is not None:
-            query = sql.select([func.count(root_table.c.id)])
             query = query.where(where)
         else:
-            query = sql.select([func.count(self._root_table.c.id)])
             query = self._add_where_to_query(query)
+
+        if self._count == 'estimate':
+            return estimate_number_of_rows(query)
         return flask.g.db_conn.execute(query).scalar()
 
+    def _get_meta(self, nb_rows, has_more, nb_page_rows, last_row):
+        meta = {}
+        if self._count == 'none':
+            meta['has_more'] = has_more
+        else:
+            meta['count'] = nb_rows
+
+        # the next cursor is returned as long as the page is full
+        if self._after is not None:
+            meta['next'] = None
+            if self._limit and nb_page_rows == self._limit:
+                meta['next'] = encode_cursor(last_row)
+        return meta
+
+    def paginate(self, rows, nb_rows):
+        """Return the formatted rows of the page and its '_meta' section."""
+
+        has_more = bool(self._limit) and len(rows) > self._limit
+        if self._count == 'none':
+            rows = rows[:self._limit]
+        last_row = rows[-1] if rows else None
+        return rows, self._get_meta(nb_rows, has_more, len(rows), last_row)
+
+    def stream(self, resource_name, nb_rows, chunk_size=1000):
+        """Return a response which writes the formatted rows one by one.
+
+        The rows are read by chunks from a server side cursor so the memory
+        use does not depend on the number of rows, the '_meta' section is
+        written at the end.
+        """
+
+        # the rows of a resource must be in the same chunk
+        embed_joins = {}
+        if self._embeds:
+            embed_joins = embeds.EMBED_JOINS[self._root_table.name]()
+        for embed_elem in self._embeds:
+            if (self._embed_many or {}).get(embed_elem) or \
+                    any(param.get('sort') is not None
+                        for param in embed_joins.get(embed_elem, [])):
+                raise dci_exc.DCIException(
+                    'Embed "%s" not supported with stream' % embed_elem)
+
+        def generate():
+            state = {'nb_page_rows': 0, 'last_row': None, 'has_more': False}
+
+            def iter_rows():
+                for rows in self.iter_chunks(chunk_size):
+                    rows = format_result(rows, self._root_table.name,
+                                         self._list_embeds, self._embed_many)
+                    for row in rows:
+                        if self._limit and \
+                                state['nb_page_rows'] == self._limit:
+                            state['has_more'] = True
+                            return
+                        state['nb_page_rows'] += 1
+                        state['last_row'] = row
+                        yield row
+
+            def get_meta():
+                return self._get_meta(nb_rows, state['has_more'],
+                                      state['nb_page_rows'],
+                                      state['last_row'])
+
+            for chunk in stream_json(resource_name, iter_rows(), get_meta):
+                yield chunk
+
+        return flask.Response(flask.stream_with_context(generate()),
+                              content_type='application/json')
+
+    def _get_batched_embeds_rows(self, rows):
+        """Load the batched embeds of the given rows.
+
+        Each embed is fetched with a 'WHERE id IN (...)' query on the root
+        table ids, the returned rows only hold the root id and the embed
+        columns so that format_result() merges them in the root rows.
+        """
+        root_ids = set(row['%s_id' % self._root_table.name] for row in rows)
+        if not root_ids:
+            return []
+
+        embed_joins = embeds.EMBED_JOINS[self._root_table.name]()
+        embed_objects = embeds.EMBED_STRING_TO_OBJECT[self._root_table.name]
+        batched_rows = []
+        for embed_elem in self._batched_embeds:
+            embed_path = [embed_elem]
+            if '.' in embed_elem:
+                embed_path.insert(0, embed_elem.split('.')[0])
+            children = self._root_table
+            for elem in embed_path:
+                for param in embed_joins[elem]:
+                    children = children.join(param['right'],
+                                             param['onclause'])
+            select_clause = [self._root_table.c.id]
+            select_elem = embed_objects[embed_elem]
+            if isinstance(select_elem, list):
+                select_clause.extend(select_elem)
+            else:
+                select_clause.append(select_elem)
+            query = sql.select(select_clause, use_labels=True,
+                               from_obj=children)
+            query = query.where(self._root_table.c.id.in_(root_ids))
+            batched_rows.extend(flask.g.db_conn.execute(query).fetchall())
+        return batched_rows
+
+    def iter_chunks(self, chunk_size=1000):
+        """Yield the rows of the query by chunks, the rows are read from a
+        server side cursor."""
+
+        conn = flask.g.db_conn.execution_options(stream_results=True)
+        result = conn.execute(self.get_query())
+        try:
+            while True:
+                rows = result.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if self._batched_embeds:
+                    rows = rows + self._get_batched_embeds_rows(rows)
+                yield rows
+        finally:
+            result.close()
+
     def execute(self, fetchall=False, fetchone=False):
         if fetchall:
-            return flask.g.db_conn.execute(self.get_query()).fetchall()
+            rows = flask.g.db_conn.execute(self.get_query()).fetchall()
+            if self._batched_embeds:
+                rows = rows + self._get_batched_embeds_rows(rows)
+            return rows
         elif fetchone:
             return flask.g.db_conn.execute(self.get_query()).fetchone()
 
@@ -323,167 +612,202 @@ class QueryBuilder(object):
         return str(self.get_query().compile(dialect=postgresql.dialect()))
 
 
-def _format_level_1(rows, root_table_name):
-    """
-    Transform sqlalchemy source:
-    [{'a_id' : 'id1',
-      'a_name' : 'name1,
-      'b_id' : 'id2',
-      'b_name' : 'name2},
-     {'a_id' : 'id3',
-      'a_name' : 'name3,
-      'b_id' : 'id4',
-      'b_name' : 'name4}
-    ]
-    to
-    [{'id' : 'id1',
-      'name': 'name2',
-      'b' : {'id': 'id2', 'name': 'name2'},
-     {'id' : 'id3',
-      'name': 'name3',
-      'b' : {'id': 'id4', 'name': 'name4'}
-    ]
-    """
-    result_rows = []
-    for row in rows:
-        row = dict(row)
-        result_row = {}
-        prefixes_to_remove = []
-        for field in row:
-            prefix, suffix = field.split('_', 1)
-            if suffix == 'id' and row[field] is None:
-                prefixes_to_remove.append(prefix)
-            if prefix not in result_row:
-                result_row[prefix] = {suffix: row[field]}
-            else:
-                result_row[prefix].update({suffix: row[field]})
-        # remove field with id == null
-        for prefix_to_remove in prefixes_to_remove:
-            result_row.pop(prefix_to_remove)
-        root_table_fields = result_row.pop(root_table_name)
-        result_row.update(root_table_fields)
-        result_rows.append(result_row)
-    return result_rows
+# labels of a query -> columns indexes of the root table and of each embed
+_ROW_SHAPES = {}
+
 
+def _get_row_shape(root_table_name, labels):
+    """Split the labels of a row between the root table columns and the
+    embeds columns.
 
-def _format_level_2(rows, list_embeds, embed_many):
+    The labels are built by the query with use_labels, ie. '<prefix>_<name>',
+    so the split is computed once per query and cached.
     """
-    From the _format_level_1 function we have a list of rows. Because of using
-    joins, we have as many rows as join result.
-
-    For example:
-    [{'id' : 'id1',
-      'name' : 'name1,
-      'b' : {'id': 'id2,
-             'name': 'name2'}
-     }
-     {'id' : 'id1',
-      'name' : 'name1,
-      'b' : {'id' : 'id4',
-             'name' : 'name4}
-     }
-    ]
-
-    Here there is two elements which correspond to one rows because of the
-    embed field 'b'. So we should transform it to:
-
-    [{'id' : 'id1',
-      'name' : 'name1,
-      'b' : [{'id': 'id2,
-             'name': 'name2'},
-             {'id' : 'id4',
-             'name' : 'name4}]
-     }
-    ]
-
-    This is the purpose of this function.
+
+    shape_key = (root_table_name, labels)
+    shape = _ROW_SHAPES.get(shape_key)
+    if shape is not None:
+        return shape
+
+    root_prefix = '%s_' % root_table_name
+    root_columns = []
+    embeds_columns = collections.OrderedDict()
+    for index, label in enumerate(labels):
+        if label.startswith(root_prefix):
+            root_columns.append((index, label[len(root_prefix):]))
+        else:
+            prefix, suffix = label.split('_', 1)
+            embeds_columns.setdefault(prefix, []).append((index, suffix))
+
+    root_id_index = dict((v, k) for k, v in root_columns).get('id')
+    embeds_shape = []
+    for prefix, columns in embeds_columns.items():
+        id_index = dict((v, k) for k, v in columns).get('id')
+        embeds_shape.append((prefix, id_index, columns))
+
+    shape = (root_columns, root_id_index, embeds_shape)
+    _ROW_SHAPES[shape_key] = shape
+    return shape
+
+
+def format_result(rows, root_table_name, list_embeds=None, embed_many=None):
+    """Transform the rows of a QueryBuilder query into a list of dicts.
+
+    The columns of each embed are moved into a nested dict, an embed with a
+    null id is removed. For example:
+    [{'a_id': 'id1', 'a_name': 'name1', 'b_id': 'id2', 'b_name': 'name2'},
+     {'a_id': 'id1', 'a_name': 'name1', 'b_id': 'id4', 'b_name': 'name4'}]
+    with 'a' as the root table gives
+    [{'id': 'id1', 'name': 'name1', 'b': {'id': 'id2', 'name': 'name2'}},
+     {'id': 'id1', 'name': 'name1', 'b': {'id': 'id4', 'name': 'name4'}}]
+
+    If list_embeds and embed_many are given, the rows of the same root
+    resource are merged as the joins return one row per embedded element:
+    [{'id': 'id1',
+      'name': 'name1',
+      'b': [{'id': 'id2', 'name': 'name2'}, {'id': 'id4', 'name': 'name4'}]}]
+
+    The rows are processed in a single pass and their order is kept.
     """
 
-    def _uniqify_list(list_of_dicts):
-        # list() for py34
-        result = []
-        set_ids = set()
-        for v in list_of_dicts:
-            if v['id'] in set_ids:
-                continue
-            set_ids.add(v['id'])
-            result.append(v)
-        return result
+    merge_rows = list_embeds is not None and embed_many is not None
+    if merge_rows:
+        list_embeds = set(list_embeds)
+        # parents first so that the nested embeds can be attached to them
+        ordered_embeds = sorted(list_embeds, key=lambda e: e.count('.'))
 
-    row_ids_to_embed_values = {}
+    result = []
+    # root id -> (formatted row, {embed: embed value})
+    merged_rows = {}
+    labels = None
     for row in rows:
-        # for each row, associate rows's id -> {all embeds values}
-        if row['id'] not in row_ids_to_embed_values:
-            row_ids_to_embed_values[row['id']] = {}
-        # add embeds values to the current row
-        for embd in list_embeds:
-            if embd not in row:
+        row_labels = tuple(row.keys())
+        if row_labels != labels:
+            labels = row_labels
+            root_columns, root_id_index, embeds_shape = _get_row_shape(
+                root_table_name, labels)
+        values = tuple(row)
+
+        embeds_values = {}
+        for prefix, id_index, columns in embeds_shape:
+            if id_index is not None and values[id_index] is None:
                 continue
-            if embd not in row_ids_to_embed_values[row['id']]:
-                # create a list or a dict depending on embed_many
-                if embed_many[embd]:
-                    row_ids_to_embed_values[row['id']][embd] = [row[embd]]
-                else:
-                    row_ids_to_embed_values[row['id']][embd] = row[embd]
-            else:
-                if embed_many[embd]:
-                    row_ids_to_embed_values[row['id']][embd].append(row[embd])
-        # uniqify each embed list
-        for embd in list_embeds:
-            if embd in row_ids_to_embed_values[row['id']]:
-                embed_values = row_ids_to_embed_values[row['id']][embd]
-                if isinstance(embed_values, list):
-                    row_ids_to_embed_values[row['id']][embd] = _uniqify_list(embed_values)  # noqa
-            else:
-                row_ids_to_embed_values[row['id']][embd] = {}
-                if embed_many[embd]:
-                    row_ids_to_embed_values[row['id']][embd] = []
+            embeds_values[prefix] = dict((suffix, values[index])
+                                         for index, suffix in columns)
 
-    # last loop over the initial rows in order to keep the ordering
-    result = []
-    # if row id in seen set then it means the row has been completely processed
-    seen = set()
-    for row in rows:
-        if row['id'] in seen:
+        if not merge_rows:
+            embeds_values.update((suffix, values[index])
+                                 for index, suffix in root_columns)
+            result.append(embeds_values)
             continue
-        seen.add(row['id'])
-        new_row = {}
-        # adds level 1 fields
-        for field in row:
-            if field not in list_embeds:
-                new_row[field] = row[field]
-        # adds all level 2 fields
-        # list() for py34
-        row_ids_to_embed_values_keys = list(row_ids_to_embed_values[new_row['id']].keys())  # noqa
-        row_ids_to_embed_values_keys.sort()
-        # adds the nested fields if there is somes
-        for embd in list_embeds:
-            if embd in row_ids_to_embed_values_keys:
-                if '.' in embd:
-                    prefix, suffix = embd.split('.', 1)
-                    new_row[prefix][suffix] = row_ids_to_embed_values[new_row['id']][embd]  # noqa
-                else:
-                    new_row[embd] = row_ids_to_embed_values[new_row['id']][embd]  # noqa
+
+        # the single embeds and the level 1 fields are the ones of the
+        # first row of the resource
+        root_id = values[root_id_index]
+        first_row = root_id not in merged_rows
+        if first_row:
+            new_row = dict((prefix, value)
+                           for prefix, value in embeds_values.items()
+                           if prefix not in list_embeds)
+            new_row.update((suffix, values[index])
+                           for index, suffix in root_columns)
+            merged_rows[root_id] = (new_row, {})
+            result.append(new_row)
+
+        row_embeds = merged_rows[root_id][1]
+        for prefix, value in embeds_values.items():
+            if prefix not in list_embeds:
+                continue
+            if embed_many.get(prefix):
+                embed_ids, embed_list = row_embeds.setdefault(prefix,
+                                                              (set(), []))
+                if value['id'] not in embed_ids:
+                    embed_ids.add(value['id'])
+                    embed_list.append(value)
+            elif first_row:
+                row_embeds[prefix] = value
+
+    for new_row, row_embeds in merged_rows.values():
+        for embd in ordered_embeds:
+            if embd in row_embeds:
+                value = row_embeds[embd]
+                if embed_many.get(embd):
+                    value = value[1]
             else:
-                new_row_embd_value = {}
-                if embed_many[embd]:
-                    new_row_embd_value = []
-                if '.' in embd:
-                    prefix, suffix = embd.split('.', 1)
-                    new_row[prefix][suffix] = new_row_embd_value
-                else:
-                    new_row[embd] = new_row_embd_value
-        # row is complete !
-        result.append(new_row)
+                value = [] if embed_many.get(embd) else {}
+            if '.' in embd:
+                prefix, suffix = embd.split('.', 1)
+                new_row.setdefault(prefix, {})[suffix] = value
+            else:
+                new_row[embd] = value
     return result
 
 
-def format_result(rows, root_table_name, list_embeds=None, embed_many=None):
-    result_rows = _format_level_1(rows, root_table_name)
+def stream_json(resource_name, rows, get_meta):
+    """Generate the JSON document {resource_name: rows, '_meta': meta}
+    piece by piece.
 
-    if list_embeds is not None and embed_many is not None:
-        return _format_level_2(result_rows, list_embeds, embed_many)
-    return result_rows
+    get_meta is called once all the rows have been written.
+    """
+
+    yield '{%s: [' % json.dumps(resource_name)
+    separator = ''
+    for row in rows:
+        yield separator + json.dumps(row)
+        separator = ', '
+    yield '], "_meta": %s}' % json.dumps(get_meta())
+
+
+def send_store_file(store, file_path, content_type, length, headers=None,
+                    etag=None, last_modified=None):
+    """Response with the content of a file of a store, or with the part of
+    it asked by a single byte Range header.
+
+    The response is a 304 when the If-None-Match or If-Modified-Since
+    headers match the etag or the last modification date.
+
+    The files of a FileSystem store are sent by the WSGI server, or by the
+    front-end server when USE_X_SENDFILE is set, without being read here.
+    """
+
+    if not werkzeug.http.is_resource_modified(flask.request.environ,
+                                              etag=etag,
+                                              last_modified=last_modified):
+        response = flask.Response(status=304)
+    elif isinstance(store, filesystem.FileSystem):
+        response = flask.send_file(store.get_local_path(file_path),
+                                   mimetype=content_type, conditional=True)
+    else:
+        byte_range = None
+        request_range = flask.request.range
+        if length is not None and request_range is not None \
+                and request_range.units == 'bytes' \
+                and len(request_range.ranges) == 1:
+            byte_range = request_range.range_for_length(length)
+            if byte_range is None:
+                return flask.Response(
+                    status=416,
+                    headers={'Content-Range': 'bytes */%d' % length})
+
+        response = flask.Response(store.get(file_path, byte_range)[1],
+                                  content_type=content_type)
+        if byte_range is not None:
+            start, stop = byte_range
+            response.status_code = 206
+            response.headers['Content-Length'] = stop - start
+            response.headers['Content-Range'] = \
+                'bytes %d-%d/%d' % (start, stop - 1, length)
+        elif length is not None:
+            response.headers['Content-Length'] = length
+        if length is not None:
+            response.headers['Accept-Ranges'] = 'bytes'
+    if etag is not None:
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    for key, value in (headers or {}).items():
+        response.headers[key] = value
+    return response
 
 
 def flask_headers_to_dict(headers):
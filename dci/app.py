@@ -15,7 +15,9 @@
 # under the License.
 
 
+from dci import auth
 from dci.api import v1 as api_v1
+from dci.common import cache
 from dci.common import exceptions
 from dci.common import utils
 from dci.elasticsearch import engine as es_engine
@@ -40,6 +42,14 @@ class DciControlServer(flask.Flask):
         self.engine = dci_config.get_engine(conf)
         self.es_engine = es_engine.DCIESEngine(conf)
         self.sender = self._get_zmq_sender(conf['ZMQ_CONN'])
+        self.stores = dci_config.StoresRegistry(conf)
+        self.users_cache = cache.TTLCache(conf['AUTH_CACHE_SIZE'],
+                                          conf['AUTH_CACHE_TTL'])
+        self.remotecis_cache = cache.TTLCache(conf['AUTH_CACHE_SIZE'],
+                                              conf['REMOTECI_CACHE_TTL'])
+        self.schedule_cache = cache.TTLCache(conf['SCHEDULE_CACHE_SIZE'],
+                                             conf['SCHEDULE_CACHE_TTL'])
+        self.roles = auth.RolesRegistry()
 
     def _get_zmq_sender(self, zmq_conn):
         global zmq_sender
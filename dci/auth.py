@@ -45,17 +45,42 @@ def reject():
                           content_type='application/json')
 
 
+class RolesRegistry(object):
+    """In-memory copy of the roles, ids associates their labels to their id.
+
+    The roles are loaded by the first lookup of a label, not when the
+    application starts.
+    """
+
+    def __init__(self):
+        self.ids = {}
+
+    def refresh(self, db_conn):
+        query = (sql.select([models.ROLES.c.id, models.ROLES.c.label])
+                 .order_by(models.ROLES.c.created_at))
+        ids = {}
+        for role in db_conn.execute(query):
+            ids.setdefault(role.label, role.id)
+        self.ids = ids
+
+
+def refresh_roles():
+    """Reload the roles registry, to be called when a role changes."""
+
+    flask.current_app.roles.refresh(flask.g.db_conn)
+
+
 # This method should be deleted once permissions mechanism is
 # in place. Meanwhile, for the migration to be seamless, we
 # need to have this method around
 def get_role_id(label):
     """Return role id based on role label."""
 
-    query = sql.select([models.ROLES]).where(
-        models.ROLES.c.label == label
-    )
-    result = flask.g.db_conn.execute(query).fetchone()
-    return result.id
+    roles = flask.current_app.roles
+    # the role may have been created by another process
+    if label not in roles.ids:
+        roles.refresh(flask.g.db_conn)
+    return roles.ids.get(label)
 
 
 def is_admin(user, super=False):
@@ -73,6 +98,30 @@ def is_in_team(user, team_id):
     return str(user['team_id']) == str(team_id)
 
 
+def invalidate_user(user_id):
+    """Remove a user from the authentication cache."""
+
+    flask.current_app.users_cache.invalidate(
+        lambda user: str(user['id']) == str(user_id))
+
+
+def invalidate_remoteci(remoteci_id):
+    """Remove a remoteci from the authentication cache."""
+
+    flask.current_app.remotecis_cache.invalidate(
+        lambda remoteci: str(remoteci['id']) == str(remoteci_id))
+
+
+def invalidate_team(team_id):
+    """Remove the users and the remotecis of a team from the
+    authentication caches."""
+
+    for identities_cache in (flask.current_app.users_cache,
+                             flask.current_app.remotecis_cache):
+        identities_cache.invalidate(
+            lambda identity: str(identity['team_id']) == str(team_id))
+
+
 def check_export_control(user, component):
     if not is_admin(user):
         if not component['export_control']:
@@ -82,10 +131,47 @@ def check_export_control(user, component):
 def login_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
+        streamed_payload = getattr(f, 'streamed_payload', False)
         for mechanism in [BasicAuthMechanism(flask.request),
-                          SignatureAuthMechanism(flask.request)]:
+                          SignatureAuthMechanism(flask.request,
+                                                 streamed_payload)]:
             if mechanism.is_valid():
-                return f(mechanism.identity, *args, **kwargs)
+                payload = getattr(mechanism, 'payload', None)
+                if payload is None:
+                    return f(mechanism.identity, *args, **kwargs)
+                flask.g.signed_payload = payload
+                try:
+                    return f(mechanism.identity, *args, **kwargs)
+                except exc.DCIException:
+                    # do not leak errors to a client whose signature is
+                    # not verified yet
+                    if not payload.is_valid():
+                        return reject()
+                    raise
         return reject()
 
     return decorated
+
+
+def streamed_payload(f):
+    """Marks a handler which streams the request payload.
+
+    The signature of the requests authenticated by signature is then
+    verified by check_streamed_payload() once the handler has read the
+    payload from get_request_stream().
+    """
+    f.streamed_payload = True
+    return f
+
+
+def get_request_stream():
+    """Returns the stream of the request payload."""
+    return flask.g.get('signed_payload') or flask.request.stream
+
+
+def check_streamed_payload():
+    """Raises UNAUTHORIZED if the signature of the streamed payload does not
+    match."""
+    payload = flask.g.get('signed_payload')
+    if payload is not None and not payload.is_valid():
+        raise UNAUTHORIZED
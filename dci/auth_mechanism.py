@@ -14,7 +14,12 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 from datetime import datetime
+import hashlib
+import hmac
+import os
+
 import flask
+import six
 from sqlalchemy import sql
 from passlib.apps import custom_app_context as pwd_context
 
@@ -22,6 +27,17 @@ from dci.db import models
 from dci.common import signature
 
 
+# the users cache is keyed on a keyed hash of the password so that the
+# clear passwords are not kept in memory
+_CACHE_KEY = os.urandom(16)
+
+
+def _password_digest(password):
+    if isinstance(password, six.text_type):
+        password = password.encode('utf-8')
+    return hmac.new(_CACHE_KEY, password, hashlib.sha256).hexdigest()
+
+
 class BaseMechanism(object):
     def __init__(self, request):
         self.request = request
@@ -47,8 +63,16 @@ class BasicAuthMechanism(BaseMechanism):
     def get_user_and_check_auth(self, username, password):
         """Check the combination username/password that is valid on the
         database.
+
+        The successful authentications are cached by the application.
         """
 
+        users_cache = flask.current_app.users_cache
+        cache_key = (username, _password_digest(password or ''))
+        user = users_cache.get(cache_key)
+        if user is not None:
+            return dict(user), True
+
         query_get_user = (
             sql.select(
                 [
@@ -76,10 +100,20 @@ class BasicAuthMechanism(BaseMechanism):
             return None, False
         user = dict(user)
 
-        return user, pwd_context.verify(password, user.get('password'))
+        is_authenticated = pwd_context.verify(password, user.get('password'))
+        if is_authenticated:
+            users_cache.set(cache_key, dict(user))
+        return user, is_authenticated
 
 
 class SignatureAuthMechanism(BaseMechanism):
+    def __init__(self, request, streamed_payload=False):
+        super(SignatureAuthMechanism, self).__init__(request)
+        # when the payload is streamed its signature can only be verified
+        # once the handler has read it, see signature.StreamedPayload
+        self.streamed_payload = streamed_payload
+        self.payload = None
+
     def is_valid(self):
         """Tries to authenticate a request using a signature as authentication
         mechanism.
@@ -128,8 +162,15 @@ class SignatureAuthMechanism(BaseMechanism):
     @staticmethod
     def get_remoteci(ci_id):
         """Get the remoteci including its API secret
+
+        The remotecis are cached by the application for a few seconds.
         """
 
+        remotecis_cache = flask.current_app.remotecis_cache
+        remoteci = remotecis_cache.get(ci_id)
+        if remoteci is not None:
+            return remoteci
+
         query_get_remoteci = (
             sql.select(
                 [
@@ -153,6 +194,8 @@ class SignatureAuthMechanism(BaseMechanism):
         )
 
         remoteci = flask.g.db_conn.execute(query_get_remoteci).fetchone()
+        if remoteci is not None:
+            remotecis_cache.set(ci_id, remoteci)
         return remoteci
 
     def verify_remoteci_auth_signature(self, remoteci, timestamp,
@@ -162,7 +205,7 @@ class SignatureAuthMechanism(BaseMechanism):
         if remoteci.api_secret is None:
             return False
 
-        return signature.is_valid(
+        values = dict(
             their_signature=their_signature.encode('utf-8'),
             secret=remoteci.api_secret.encode('utf-8'),
             http_verb=self.request.method.encode('utf-8'),
@@ -170,5 +213,13 @@ class SignatureAuthMechanism(BaseMechanism):
                           .encode('utf-8')),
             timestamp=timestamp,
             url=self.request.path.encode('utf-8'),
-            query_string=self.request.query_string,
-            payload=self.request.data)
+            query_string=self.request.query_string)
+
+        if self.streamed_payload:
+            if not signature.is_timestamp_in_bounds(timestamp):
+                return False
+            self.payload = signature.StreamedPayload(self.request.stream,
+                                                     **values)
+            return True
+
+        return signature.is_valid(payload=self.request.data, **values)
@@ -17,6 +17,7 @@ from __future__ import unicode_literals
 from six.moves.urllib.parse import urlparse
 
 import collections
+import datetime
 import dci.common.exceptions as exceptions
 import dci.common.utils as utils
 import six
@@ -45,11 +46,22 @@ def UUID(value):
     except Exception:
         raise ValueError
 
+
+def Date(value):
+    for date_format in ('%Y-%m-%d', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            return datetime.datetime.strptime(value, date_format)
+        except Exception:
+            continue
+    raise ValueError
+
 VALID_STATUS_UPDATE = ['failure', 'success', 'killed', 'product-failure',
                        'deployment-failure']
 
 VALID_RESOURCE_STATE = ['active', 'inactive', 'archived']
 
+VALID_COUNT = ['exact', 'estimate', 'none']
+
 INVALID_LIST = 'not a valid list'
 INVALID_UUID = 'not a valid uuid'
 INVALID_JSON = 'not a valid json'
@@ -63,8 +75,12 @@ INVALID_JOB_DEFINITION = 'not a valid jobdefinition id'
 INVALID_REMOTE_CI = 'not a valid remoteci id'
 INVALID_JOB = 'not a valid job id'
 INVALID_JOB_STATE = 'not a valid jobstate id'
+INVALID_COMPONENT = 'not a valid component id'
 INVALID_OFFSET = 'not a valid offset integer (must be greater than 0)'
 INVALID_LIMIT = 'not a valid limit integer (must be greater than 0)'
+INVALID_CURSOR = 'not a valid cursor'
+INVALID_BOOLEAN = 'not a valid boolean'
+INVALID_DATE = 'not a valid date (must be YYYY-MM-DD[THH:MM:SS])'
 
 INVALID_REQUIRED = 'required key not provided'
 INVALID_OBJECT = 'not a valid object'
@@ -72,6 +88,8 @@ INVALID_STATUS_UPDATE = ('not a valid status update (must be %s)' %
                          ' or '.join(VALID_STATUS_UPDATE))
 INVALID_RESOURCE_STATE = ('not a valid resource state (must be %s)' %
                           ' or '.join(VALID_RESOURCE_STATE))
+INVALID_COUNT = ('not a valid count (must be %s)' %
+                 ' or '.join(VALID_COUNT))
 
 UUID_FIELD = v.All(six.text_type, msg=INVALID_UUID)
 DATA_FIELD = {v.Optional('data', default={}): dict}
@@ -136,7 +154,13 @@ args = Schema({
                                               msg=INVALID_OFFSET),
     v.Optional('sort', default=[]): split_coerce,
     v.Optional('where', default=[]): split_coerce,
-    v.Optional('embed', default=[]): split_coerce
+    v.Optional('embed', default=[]): split_coerce,
+    v.Optional('after', default=None): v.All(six.text_type,
+                                             msg=INVALID_CURSOR),
+    v.Optional('count', default='exact'): v.Any(*VALID_COUNT,
+                                                msg=INVALID_COUNT),
+    v.Optional('stream', default=False): v.All(v.Boolean(),
+                                               msg=INVALID_BOOLEAN)
 }, extra=v.REMOVE_EXTRA)
 
 ###############################################################################
@@ -455,6 +479,74 @@ audit = {
 
 audit = schema_factory(audit)
 
+###############################################################################
+#                                                                             #
+#                               Results schemas                               #
+#                                                                             #
+###############################################################################
+
+VALID_RESULTS_DIFF_STATUS = ['added', 'removed', 'regression', 'fixed',
+                             'changed']
+
+INVALID_AGAINST = 'not a valid job id (or previous or last)'
+INVALID_RESULTS_DIFF_STATUS = ('not a valid status (must be %s)' %
+                               ' or '.join(VALID_RESULTS_DIFF_STATUS))
+INVALID_NB_JOBS = 'not a valid number of jobs (must be between 1 and 1000)'
+
+results_diff = {
+    v.Optional('against', default='previous'): v.Any('previous', 'last',
+                                                     UUID,
+                                                     msg=INVALID_AGAINST),
+    v.Optional('status', default=None): v.Any(
+        None, *VALID_RESULTS_DIFF_STATUS, msg=INVALID_RESULTS_DIFF_STATUS)
+}
+
+results_diff = schema_factory(results_diff)
+
+flaky_tests = {
+    v.Optional('jobs', default=20): v.All(v.Coerce(int), v.Range(1, 1000),
+                                          msg=INVALID_NB_JOBS),
+    v.Optional('remoteci_id', default=None): v.Any(UUID,
+                                                   msg=INVALID_REMOTE_CI)
+}
+
+flaky_tests = schema_factory(flaky_tests)
+
+###############################################################################
+#                                                                             #
+#                               Metrics schemas                               #
+#                                                                             #
+###############################################################################
+
+metrics_topics = {
+    v.Optional('since', default=None): v.Any(Date, msg=INVALID_DATE),
+    v.Optional('until', default=None): v.Any(Date, msg=INVALID_DATE),
+    v.Optional('topic_id', default=None): v.Any(UUID, msg=INVALID_TOPIC),
+    v.Optional('percentiles', default=False): v.All(v.Boolean(),
+                                                    msg=INVALID_BOOLEAN)
+}
+
+metrics_topics = schema_factory(metrics_topics)
+
+VALID_BUCKETS = ['day', 'week', 'month']
+
+INVALID_BUCKET = ('not a valid bucket (must be %s)' %
+                  ' or '.join(VALID_BUCKETS))
+
+metrics_jobs = {
+    v.Optional('since', default=None): v.Any(Date, msg=INVALID_DATE),
+    v.Optional('until', default=None): v.Any(Date, msg=INVALID_DATE),
+    v.Optional('topic_id', default=None): v.Any(UUID, msg=INVALID_TOPIC),
+    v.Optional('remoteci_id', default=None): v.Any(UUID,
+                                                   msg=INVALID_REMOTE_CI),
+    v.Optional('component_id', default=None): v.Any(UUID,
+                                                    msg=INVALID_COMPONENT),
+    v.Optional('bucket', default='day'): v.Any(*VALID_BUCKETS,
+                                               msg=INVALID_BUCKET)
+}
+
+metrics_jobs = schema_factory(metrics_jobs)
+
 ###############################################################################
 #                                                                             #
 #                                Issues schemas                               #
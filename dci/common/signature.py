@@ -48,6 +48,13 @@ def gen_signature(secret, http_verb, content_type, timestamp, url,
                   query_string, payload):
     """Generates a signature compatible with DCI for the parameters passed"""
     payload_hash = hashlib.sha256(payload).hexdigest().encode('utf-8')
+    return gen_signature_from_hash(secret, http_verb, content_type,
+                                   timestamp, url, query_string, payload_hash)
+
+
+def gen_signature_from_hash(secret, http_verb, content_type, timestamp, url,
+                            query_string, payload_hash):
+    """Generates a signature from the hexadecimal SHA-256 of the payload"""
     stringtosign = format_for_signature(
         http_verb=http_verb,
         content_type=content_type,
@@ -89,3 +96,43 @@ def is_valid(their_signature,
 
     return is_timestamp_in_bounds(timestamp) and \
         compare_digest(their_signature, local_signature)
+
+
+class StreamedPayload(object):
+    """File-like wrapper of a request stream whose signature is verified
+    once the payload has been read.
+
+    The payload is hashed chunk by chunk while it is read so that it never
+    has to be kept in memory.
+    """
+
+    chunk_size = 65536
+
+    def __init__(self, stream, their_signature, secret, http_verb,
+                 content_type, timestamp, url, query_string):
+        self.stream = stream
+        self.their_signature = their_signature
+        self.secret = secret
+        self.http_verb = http_verb
+        self.content_type = content_type
+        self.timestamp = timestamp
+        self.url = url
+        self.query_string = query_string
+        self._hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self._hash.update(chunk)
+        return chunk
+
+    def is_valid(self):
+        """Reads what is left of the payload and verifies the signature."""
+        for _ in iter(lambda: self.read(self.chunk_size), b''):
+            pass
+        payload_hash = self._hash.hexdigest().encode('utf-8')
+        local_signature = gen_signature_from_hash(
+            self.secret, self.http_verb, self.content_type, self.timestamp,
+            self.url, self.query_string, payload_hash).encode('utf-8')
+
+        return is_timestamp_in_bounds(self.timestamp) and \
+            compare_digest(self.their_signature, local_signature)
@@ -36,6 +36,23 @@ def read(file_path, chunk_size=None, mode='rb'):
             yield chunk
 
 
+class HashedStream(object):
+    """File-like wrapper computing the SHA-256 of the data read through
+    it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self._hash.update(chunk)
+        return chunk
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
 class UUIDConverter(BaseConverter):
 
     def to_python(self, value):
@@ -39,6 +39,10 @@ FILES_CREATE = 'create'
 FILES_DELETE = 'delete'
 FILES_ACTIONS = sa.Enum(FILES_CREATE, FILES_DELETE, name='files_actions')
 
+# status of the ingestion of the JUnit files by the worker
+INGESTION_STATUSES = sa.Enum('pending', 'complete', 'error',
+                             name='ingestion_statuses')
+
 
 COMPONENTS = sa.Table(
     'components', metadata,
@@ -68,6 +72,11 @@ COMPONENTS = sa.Table(
     sa.Column('state', STATES, default='active')
 )
 
+# used by the scheduler to get the latest exported component of each type
+sa.Index('components_topic_id_type_state_export_control_created_at_idx',
+         COMPONENTS.c.topic_id, COMPONENTS.c.type, COMPONENTS.c.state,
+         COMPONENTS.c.export_control, COMPONENTS.c.created_at.desc())
+
 JOIN_COMPONENTS_ISSUES = sa.Table(
     'components_issues', metadata,
     sa.Column('component_id', pg.UUID(as_uuid=True),
@@ -258,6 +267,7 @@ JOBS = sa.Table(
               sa.ForeignKey('jobs.id'),
               nullable=True, default=None),
     sa.Index('jobs_previous_job_id_idx', 'previous_job_id'),
+    sa.Index('jobs_created_at_id_idx', 'created_at', 'id'),
     sa.Column('state', STATES, default='active')
 )
 
@@ -287,6 +297,34 @@ TESTS_RESULTS = sa.Table(
     sa.Index('tests_results_file_id_idx', 'file_id')
 )
 
+# the testcases of the JUnit files, filled at ingestion time
+TESTSCASES = sa.Table(
+    'testscases', metadata,
+    sa.Column('id', pg.UUID(as_uuid=True), primary_key=True,
+              default=utils.gen_uuid),
+    sa.Column('created_at', sa.DateTime(),
+              default=datetime.datetime.utcnow, nullable=False),
+    sa.Column('position', sa.Integer, nullable=False),
+    sa.Column('name', sa.Text, nullable=False),
+    sa.Column('classname', sa.Text, nullable=False),
+    sa.Column('time', sa.Float),
+    sa.Column('action', sa.String(32), nullable=False),
+    sa.Column('type', sa.Text),
+    sa.Column('message', sa.Text),
+    sa.Column('value', sa.Text),
+    sa.Column('job_id', pg.UUID(as_uuid=True),
+              sa.ForeignKey('jobs.id', ondelete='CASCADE'),
+              nullable=False),
+    sa.Index('testscases_job_id_classname_name_idx',
+             'job_id', 'classname', 'name'),
+    sa.Index('testscases_job_id_action_idx', 'job_id', 'action'),
+    sa.Column('tests_result_id', pg.UUID(as_uuid=True),
+              sa.ForeignKey('tests_results.id', ondelete='CASCADE'),
+              nullable=False),
+    sa.Index('testscases_tests_result_id_position_idx',
+             'tests_result_id', 'position')
+)
+
 METAS = sa.Table(
     'metas', metadata,
     sa.Column('id', pg.UUID(as_uuid=True), primary_key=True,
@@ -312,7 +350,32 @@ JOIN_JOBS_COMPONENTS = sa.Table(
               nullable=False, primary_key=True),
     sa.Column('component_id', pg.UUID(as_uuid=True),
               sa.ForeignKey('components.id', ondelete='CASCADE'),
-              nullable=False, primary_key=True))
+              nullable=False, primary_key=True),
+    sa.Index('jobs_components_component_id_idx', 'component_id'))
+
+# the statuses which end a job, counted in the jobs statistics
+JOB_FINAL_STATUSES = ['success', 'failure', 'killed', 'product-failure',
+                      'deployment-failure']
+
+# number of jobs ended per day of creation, topic, remoteci, component and
+# status, updated on the status transitions of the jobs
+JOBS_STATS = sa.Table(
+    'jobs_stats', metadata,
+    sa.Column('day', sa.Date, nullable=False, primary_key=True),
+    sa.Column('topic_id', pg.UUID(as_uuid=True),
+              sa.ForeignKey('topics.id', ondelete='CASCADE'),
+              nullable=False, primary_key=True),
+    sa.Column('remoteci_id', pg.UUID(as_uuid=True),
+              sa.ForeignKey('remotecis.id', ondelete='CASCADE'),
+              nullable=False, primary_key=True),
+    sa.Column('component_id', pg.UUID(as_uuid=True),
+              sa.ForeignKey('components.id', ondelete='CASCADE'),
+              nullable=False, primary_key=True),
+    sa.Column('status', STATUSES, nullable=False, primary_key=True),
+    sa.Column('nb_jobs', sa.Integer, nullable=False, default=0),
+    sa.Index('jobs_stats_topic_id_day_idx', 'topic_id', 'day'),
+    sa.Index('jobs_stats_remoteci_id_day_idx', 'remoteci_id', 'day'),
+    sa.Index('jobs_stats_component_id_day_idx', 'component_id', 'day'))
 
 JOIN_JOBS_ISSUES = sa.Table(
     'jobs_issues', metadata,
@@ -400,6 +463,8 @@ FILES = sa.Table(
               sa.ForeignKey('jobs.id', ondelete='CASCADE'),
               nullable=True),
     sa.Index('files_job_id_idx', 'job_id'),
+    sa.Index('files_created_at_id_idx', 'created_at', 'id'),
+    sa.Column('ingestion_status', INGESTION_STATUSES, nullable=True),
     sa.Column('state', STATES, default='active'),
     sa.Column('etag', sa.String(40), nullable=False, default=utils.gen_etag,
               onupdate=utils.gen_etag),
@@ -416,6 +481,19 @@ FILES_EVENTS = sa.Table(
     sa.Index('files_events_file_id_idx', 'file_id')
 )
 
+# the content of the component files is stored once per digest, at the
+# path of the first component file uploaded with it
+COMPONENT_BLOBS = sa.Table(
+    'component_blobs', metadata,
+    sa.Column('digest', sa.String(64), primary_key=True),
+    sa.Column('created_at', sa.DateTime(),
+              default=datetime.datetime.utcnow, nullable=False),
+    sa.Column('topic_id', pg.UUID(as_uuid=True), nullable=False),
+    sa.Column('component_id', pg.UUID(as_uuid=True), nullable=False),
+    sa.Column('file_id', pg.UUID(as_uuid=True), nullable=False),
+    sa.Column('size', sa.BIGINT, nullable=True),
+)
+
 COMPONENT_FILES = sa.Table(
     'component_files', metadata,
     sa.Column('id', pg.UUID(as_uuid=True), primary_key=True,
@@ -433,6 +511,9 @@ COMPONENT_FILES = sa.Table(
               sa.ForeignKey('components.id', ondelete='CASCADE'),
               nullable=True),
     sa.Index('component_files_component_id_idx', 'component_id'),
+    sa.Column('digest', sa.String(64),
+              sa.ForeignKey('component_blobs.digest'), nullable=True),
+    sa.Index('component_files_digest_idx', 'digest'),
     sa.Column('state', STATES, default='active'),
     sa.Column('etag', sa.String(40), nullable=False, default=utils.gen_etag,
               onupdate=utils.gen_etag),
@@ -497,7 +578,11 @@ ISSUES = sa.Table(
               onupdate=datetime.datetime.utcnow,
               default=datetime.datetime.utcnow, nullable=False),
     sa.Column('url', sa.Text, unique=True),
-    sa.Column('tracker', TRACKERS, nullable=False))
+    sa.Column('tracker', TRACKERS, nullable=False),
+    # the informations retrieved from the tracker
+    sa.Column('tracker_data', pg.JSON, nullable=True),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.Index('issues_refreshed_at_idx', 'refreshed_at'))
 
 ROLES = sa.Table(
     'roles', metadata,
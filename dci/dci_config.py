@@ -16,8 +16,10 @@
 
 import os
 import sys
+import threading
 
 from dci.db import models
+from dci.stores import filesystem
 from dci.stores import swift
 
 import flask
@@ -43,20 +45,53 @@ def get_engine(conf):
     return sa_engine
 
 
-def get_store(container):
-    conf = generate_conf()
+def get_store_configuration(conf, container):
     configuration = {
         'os_username': conf['STORE_USERNAME'],
         'os_password': conf['STORE_PASSWORD'],
         'os_tenant_name': conf['STORE_TENANT_NAME'],
         'os_auth_url': conf['STORE_AUTH_URL'],
+        'path': conf['FILES_UPLOAD_FOLDER'],
     }
     if container == 'files':
         configuration['container'] = conf['STORE_FILES_CONTAINER']
     elif container == 'components':
         configuration['container'] = conf['STORE_COMPONENTS_CONTAINER']
-    stores_engine = swift.Swift(configuration)
-    return stores_engine
+    return configuration
+
+
+class StoresRegistry(object):
+    """Stores of the application, the stores of a same container share a
+    pool of connections."""
+
+    def __init__(self, conf):
+        self.conf = conf
+        self._lock = threading.Lock()
+        self._stores = {}
+
+    def get(self, container):
+        if self.conf['STORE_ENGINE'] == 'FileSystem':
+            return filesystem.FileSystem(
+                get_store_configuration(self.conf, container))
+
+        with self._lock:
+            if container not in self._stores:
+                configuration = get_store_configuration(self.conf, container)
+                pool = swift.ConnectionPool(configuration,
+                                            self.conf['STORE_POOL_SIZE'])
+                self._stores[container] = (configuration, pool)
+            configuration, pool = self._stores[container]
+        return swift.Swift(configuration, pool=pool)
+
+
+def get_store(container):
+    if flask.has_app_context():
+        return flask.current_app.stores.get(container)
+    conf = generate_conf()
+    configuration = get_store_configuration(conf, container)
+    if conf['STORE_ENGINE'] == 'FileSystem':
+        return filesystem.FileSystem(configuration)
+    return swift.Swift(configuration)
 
 
 def sanity_check(conf):
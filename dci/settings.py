@@ -42,6 +42,8 @@ SQLALCHEMY_NATIVE_UNICODE = True
 
 # Stores configuration, to store files and components
 # STORE
+# 'Swift' or 'FileSystem', the latter keeps the files of each container
+# in a directory of FILES_UPLOAD_FOLDER
 STORE_ENGINE = 'Swift'
 STORE_USERNAME = 'dci_components'
 STORE_PASSWORD = 'test'
@@ -50,9 +52,32 @@ STORE_AUTH_URL = 'http://46.231.132.68:5000/v2.0'
 STORE_CONTAINER = 'dci_components'
 STORE_FILES_CONTAINER = 'dci_files'
 STORE_COMPONENTS_CONTAINER = 'dci_components'
+# number of idle connections kept per container
+STORE_POOL_SIZE = 10
 
 # ZMQ Connection
 ZMQ_CONN = "tcp://127.0.0.1:5557"
+# let dci-worker parse the JUnit files instead of the upload request, the
+# files stay in the 'pending' ingestion status until then
+JUNIT_ASYNC_INGESTION = False
+
+# authenticated users are kept in memory for AUTH_CACHE_TTL seconds to
+# avoid checking the password hash on each request, 0 disables the cache
+AUTH_CACHE_TTL = 60
+AUTH_CACHE_SIZE = 1024
+# same for the remotecis authenticated by signature
+REMOTECI_CACHE_TTL = 10
+# the jobdefinition and the components a job of a topic is scheduled with
+# are kept SCHEDULE_CACHE_TTL seconds, the changes made through another
+# process are seen after this delay
+SCHEDULE_CACHE_TTL = 10
+SCHEDULE_CACHE_SIZE = 256
+
+# the informations of the issues trackers are stored with the issues,
+# dci-worker refreshes every ISSUES_REFRESH_INTERVAL seconds the ones
+# older than ISSUES_MAX_AGE seconds
+ISSUES_MAX_AGE = 3600
+ISSUES_REFRESH_INTERVAL = 300
 
 # Logging related parameters
 PROD_LOG_FORMAT = '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
@@ -80,3 +105,6 @@ X_HEADERS = 'Authorization, Content-Type, If-Match, ETag, X-Requested-With'
 MAX_CONTENT_LENGTH = 20 * 1024 * 1024
 
 FILES_UPLOAD_FOLDER = '/var/lib/dci-control-server/files'
+# let the front-end server send the files of the FileSystem store, see
+# http://flask.pocoo.org/docs/latest/config/#USE_X_SENDFILE
+USE_X_SENDFILE = False
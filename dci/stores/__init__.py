@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from dci.common import exceptions
+
 
 class Store(object):
 
@@ -30,3 +32,24 @@ class Store(object):
 
     def upload(self):
         pass
+
+    def get_object(self, filename, max_size=None):
+        """Returns the whole content of a file.
+
+        Raises StoreExceptions when the file is larger than max_size bytes.
+        """
+        blocks = []
+        size = 0
+        for block in self.get(filename)[1]:
+            size += len(block)
+            if max_size is not None and size > max_size:
+                raise exceptions.StoreExceptions(
+                    '%s is larger than %d bytes' % (filename, max_size))
+            blocks.append(block)
+        return b''.join(blocks)
+
+    def build_file_path(self, root, middle, file_id):
+        root = str(root)
+        middle = str(middle)
+        file_id = str(file_id)
+        return "%s/%s/%s" % (root, middle, file_id)
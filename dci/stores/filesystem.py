@@ -0,0 +1,118 @@
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from dci import stores
+from dci.common import exceptions
+
+import hashlib
+import mimetypes
+import os
+import six
+import tempfile
+
+
+def _get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+
+class FileSystem(stores.Store):
+    """Store keeping the files in a local directory, one per container."""
+
+    chunk_size = 65536
+
+    def __init__(self, conf):
+        self.path = os.path.join(conf['path'], conf['container'])
+
+    def get_local_path(self, filename):
+        return os.path.join(self.path, filename)
+
+    def delete(self, filename):
+        local_path = self.get_local_path(filename)
+        try:
+            os.remove(local_path)
+            os.remove(local_path + '.md5')
+        except OSError:
+            raise exceptions.StoreExceptions('An error occured while '
+                                             'deleting %s' % filename)
+
+    def get(self, filename, byte_range=None):
+        headers = self.head(filename)
+        return headers, self._read(self.get_local_path(filename), byte_range)
+
+    def _read(self, local_path, byte_range):
+        start, stop = byte_range or (0, None)
+        with open(local_path, 'rb') as f:
+            f.seek(start)
+            while stop is None or f.tell() < stop:
+                size = self.chunk_size
+                if stop is not None:
+                    size = min(size, stop - f.tell())
+                block = f.read(size)
+                if not block:
+                    break
+                yield block
+
+    def head(self, filename):
+        local_path = self.get_local_path(filename)
+        try:
+            stat = os.stat(local_path)
+            with open(local_path + '.md5') as f:
+                etag = f.read()
+        except (IOError, OSError):
+            raise exceptions.DCINotFound('Content File', filename)
+        return {
+            'etag': etag,
+            'content-type': (mimetypes.guess_type(filename)[0] or
+                             'application/octet-stream'),
+            'content-length': stat.st_size,
+        }
+
+    def upload(self, file_path, iterable, pseudo_folder=None,
+               create_container=True):
+        local_path = self.get_local_path(file_path)
+        directory = os.path.dirname(local_path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # the file is written next to its final path then renamed so that
+        # a partial upload is never visible
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        md5 = hashlib.md5()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for block in self._blocks(iterable):
+                    md5.update(block)
+                    f.write(block)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates the file readable by its owner only
+            os.chmod(tmp_path, 0o666 & ~_get_umask())
+            with open(local_path + '.md5', 'w') as f:
+                f.write(md5.hexdigest())
+            os.rename(tmp_path, local_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _blocks(self, iterable):
+        if hasattr(iterable, 'read'):
+            return iter(lambda: iterable.read(self.chunk_size), b'')
+        if isinstance(iterable, six.text_type):
+            iterable = iterable.encode('utf-8')
+        if isinstance(iterable, bytes):
+            return [iterable]
+        return iterable
@@ -16,13 +16,22 @@
 from dci import stores
 from dci.common import exceptions
 
+import contextlib
 import os
 import swiftclient
+import threading
 
 
-class Swift(stores.Store):
+class ConnectionPool(object):
+    """Thread-safe pool of authenticated connections to Swift.
+
+    The new connections reuse the token of the last authentication. A
+    connection authenticates again, once, when Swift answers 401 because
+    the token expired, the other errors are retried as usual by
+    swiftclient.
+    """
 
-    def __init__(self, conf):
+    def __init__(self, conf, maxsize=10):
         self.os_username = conf.get('os_username',
                                     os.getenv('OS_USERNAME'))
         self.os_password = conf.get('os_password',
@@ -31,51 +40,105 @@ class Swift(stores.Store):
                                        os.getenv('OS_TENANT_NAME'))
         self.os_auth_url = conf.get('os_auth_url',
                                     os.getenv('OS_AUTH_URL'))
-        self.container = conf.get('container')
-        self.connection = self.get_connection()
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._idle = []
+        self._url = None
+        self._token = None
 
-    def get_connection(self):
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            url, token = self._url, self._token
         return swiftclient.client.Connection(auth_version='2',
                                              user=self.os_username,
                                              key=self.os_password,
                                              tenant_name=self.os_tenant_name,
-                                             authurl=self.os_auth_url)
+                                             authurl=self.os_auth_url,
+                                             preauthurl=url,
+                                             preauthtoken=token)
+
+    def release(self, connection):
+        with self._lock:
+            if connection.token:
+                self._url, self._token = connection.url, connection.token
+            if len(self._idle) < self.maxsize:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    @contextlib.contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+
+class Swift(stores.Store):
+
+    def __init__(self, conf, pool=None):
+        self.container = conf.get('container')
+        self.pool = pool or ConnectionPool(conf, maxsize=1)
 
     def delete(self, filename):
         try:
-            self.connection.delete_object(self.container, filename)
+            with self.pool.connection() as connection:
+                connection.delete_object(self.container, filename)
         except swiftclient.exceptions.ClientException:
             raise exceptions.StoreExceptions('An error occured while '
                                              'deleting %s' % filename)
 
-    def get(self, filename):
-        return self.connection.get_object(self.container, filename,
-                                          resp_chunk_size=65535)
+    def get(self, filename, byte_range=None):
+        """Returns the headers and an iterator on the content of a file.
+
+        byte_range is a (start, stop) tuple to get only a part of it.
+        """
+        request_headers = {}
+        if byte_range is not None:
+            start, stop = byte_range
+            request_headers['Range'] = 'bytes=%d-%d' % (start, stop - 1)
+        connection = self.pool.acquire()
+        try:
+            headers, body = connection.get_object(self.container, filename,
+                                                  resp_chunk_size=65535,
+                                                  headers=request_headers)
+        except Exception:
+            self.pool.release(connection)
+            raise
+        return headers, self._release_after(connection, body)
 
-    def get_object(self, swift_object):
-        content = ""
-        for block in self.get(swift_object)[1]:
-            content += block
-        return content
+    def _release_after(self, connection, body):
+        # the connection is busy until the response is entirely read, it
+        # is closed instead of going back to the pool when the reader gives
+        # up before or the download fails
+        completed = False
+        try:
+            for block in body:
+                yield block
+            completed = True
+        finally:
+            if completed:
+                self.pool.release(connection)
+            else:
+                connection.close()
 
     def head(self, filename):
         try:
-            return self.connection.head_object(self.container, filename)
+            with self.pool.connection() as connection:
+                return connection.head_object(self.container, filename)
         except swiftclient.exceptions.ClientException:
             raise exceptions.DCINotFound('Content File', filename)
 
     def upload(self, file_path, iterable, pseudo_folder=None,
                create_container=True):
-        try:
-            self.connection.head_container(self.container)
-        except swiftclient.exceptions.ClientException as exc:
-            if exc.http_reason == 'Not Found' and create_container:
-                self.connection.put_container(self.container)
-
-        self.connection.put_object(self.container, file_path, iterable)
-
-    def build_file_path(self, root, middle, file_id):
-        root = str(root)
-        middle = str(middle)
-        file_id = str(file_id)
-        return "%s/%s/%s" % (root, middle, file_id)
+        with self.pool.connection() as connection:
+            try:
+                connection.head_container(self.container)
+            except swiftclient.exceptions.ClientException as exc:
+                if exc.http_reason == 'Not Found' and create_container:
+                    connection.put_container(self.container)
+
+            connection.put_object(self.container, file_path, iterable)
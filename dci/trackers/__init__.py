@@ -15,9 +15,13 @@
 # under the License.
 
 
+# seconds to wait for an answer of a tracker
+TIMEOUT = 10
+
+
 class Tracker(object):
 
-    def __init__(self, url):
+    def __init__(self, url, retrieve=True):
         self.url = url
         self.status_code = None
         self.title = None
@@ -30,7 +34,8 @@ class Tracker(object):
         self.created_at = None
         self.updated_at = None
         self.closed_at = None
-        self.retrieve_info()
+        if retrieve:
+            self.retrieve_info()
 
     def retrieve_info(self):
         """Retrieve informations for a specific issue in a tracker."""
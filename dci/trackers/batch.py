@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Retrieve the informations of many issues at once."""
+
+import collections
+import logging
+from multiprocessing.pool import ThreadPool
+import threading
+
+import requests
+from six.moves.urllib.parse import urlparse
+from xml.etree import ElementTree
+
+from dci import trackers
+from dci.trackers import bugzilla
+from dci.trackers import github
+
+# number of concurrent requests, in total and per tracker host
+WORKERS = 8
+PER_HOST = 4
+# number of bugs asked at once to a Bugzilla server
+BUGZILLA_CHUNK_SIZE = 50
+
+# answers of Github which tell the state of an issue
+_DEFINITIVE_STATUS_CODES = (200, 404)
+
+LOG = logging.getLogger(__name__)
+
+
+def _github_fetches(urls, results):
+    for url in urls:
+        tracker = github.Github(url, retrieve=False)
+        try:
+            api_url = tracker.parse_url()
+        except (AttributeError, IndexError, ValueError):
+            LOG.error('invalid Github issue %s' % url)
+            continue
+
+        def load(response, tracker=tracker):
+            # rate limits and server errors are retried on the next run
+            if response.status_code not in _DEFINITIVE_STATUS_CODES:
+                LOG.error('failed to retrieve %s: %s' %
+                          (tracker.url, response.status_code))
+                return
+            tracker.load(response)
+            results[tracker.url] = tracker.dump()
+
+        yield api_url, load
+
+
+def _bugzilla_fetches(urls, results):
+    # the bugs of a server are retrieved by chunks, with the
+    # show_bug.cgi?ctype=xml&id=1&id=2 form
+    servers = collections.defaultdict(collections.OrderedDict)
+    for url in urls:
+        tracker = bugzilla.Bugzilla(url, retrieve=False)
+        bug_url = tracker.parse_url()
+        if bug_url is None:
+            results[url] = tracker.dump()
+            continue
+        base_url, bug_id = bug_url
+        servers[base_url].setdefault(bug_id, []).append(tracker)
+
+    for base_url, bugs in servers.items():
+        bugs_ids = list(bugs)
+        for i in range(0, len(bugs_ids), BUGZILLA_CHUNK_SIZE):
+            chunk = bugs_ids[i:i + BUGZILLA_CHUNK_SIZE]
+            chunk_url = '%sshow_bug.cgi?ctype=xml%s' % (
+                base_url, ''.join('&id=%s' % bug_id for bug_id in chunk))
+
+            def load(response, chunk=chunk, bugs=bugs):
+                if response.status_code != 200:
+                    LOG.error('failed to retrieve %s: %s' %
+                              (response.url, response.status_code))
+                    return
+                tree = ElementTree.fromstring(response.content)
+                for bug in tree.findall('./bug'):
+                    # the bugs are asked by id or by alias
+                    bug_ids = [bug.findtext('bug_id')]
+                    bug_ids += [alias.text for alias in bug.findall('alias')]
+                    for bug_id in set(bug_ids) & set(chunk):
+                        for tracker in bugs[bug_id]:
+                            tracker.status_code = response.status_code
+                            tracker.load(bug)
+                            results[tracker.url] = tracker.dump()
+
+            yield chunk_url, load
+
+
+def retrieve(issues, timeout=trackers.TIMEOUT, workers=WORKERS,
+             per_host=PER_HOST):
+    """Retrieve the informations of issues, a list of (tracker, url).
+
+    The trackers are queried concurrently by at most workers threads and
+    per_host threads for a given host, through a shared HTTP session.
+    Returns the dump of the trackers by url, the issues whose tracker did
+    not answer in time or answered with an error are missing.
+    """
+
+    urls = collections.defaultdict(list)
+    for tracker, url in issues:
+        urls[tracker].append(url)
+
+    results = {}
+    fetches = (list(_github_fetches(urls['github'], results)) +
+               list(_bugzilla_fetches(urls['bugzilla'], results)))
+    if not fetches:
+        return results
+
+    semaphores = dict((urlparse(url).netloc,
+                       threading.BoundedSemaphore(per_host))
+                      for url, _ in fetches)
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=len(semaphores),
+                                            pool_maxsize=per_host)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    def fetch(fetch_args):
+        url, load = fetch_args
+        try:
+            with semaphores[urlparse(url).netloc]:
+                response = session.get(url, timeout=timeout)
+            load(response)
+        except Exception:
+            LOG.exception('failed to retrieve %s' % url)
+
+    pool = ThreadPool(min(workers, len(fetches)))
+    try:
+        pool.map(fetch, fetches)
+    finally:
+        pool.close()
+        pool.join()
+        session.close()
+    return results
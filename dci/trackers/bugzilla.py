@@ -24,51 +24,67 @@ from xml.etree import ElementTree
 _URI_BASE = 'show_bug.cgi?ctype=xml&id='
 
 
+# status code of the bugs returned with an error by Bugzilla
+_ERRORS = {'NotFound': 404, 'NotPermitted': 403}
+
+
 class Bugzilla(trackers.Tracker):
 
-    def __init__(self, url):
-        super(Bugzilla, self).__init__(url)
+    def __init__(self, url, retrieve=True):
+        super(Bugzilla, self).__init__(url, retrieve)
 
-    def retrieve_info(self):
-        """Query Bugzilla API to retrieve the needed infos."""
+    def parse_url(self):
+        """Return the base URL of the Bugzilla server and the id of the bug,
+        None if the url is not the one of a bug."""
 
         scheme = urlparse(self.url).scheme
         netloc = urlparse(self.url).netloc
         query = urlparse(self.url).query
 
         if scheme not in ('http', 'https'):
-            return
+            return None
 
         for item in query.split('&'):
             if 'id=' in item:
                 ticket_id = item.split('=')[1]
                 break
         else:
+            return None
+
+        return '%s://%s/' % (scheme, netloc), ticket_id
+
+    def retrieve_info(self):
+        """Query Bugzilla API to retrieve the needed infos."""
+
+        bug_url = self.parse_url()
+        if bug_url is None:
             return
 
-        bugzilla_url = '%s://%s/%s%s' % (scheme, netloc, _URI_BASE, ticket_id)
+        bugzilla_url = '%s%s%s' % (bug_url[0], _URI_BASE, bug_url[1])
 
-        result = requests.get(bugzilla_url)
+        result = requests.get(bugzilla_url, timeout=trackers.TIMEOUT)
         self.status_code = result.status_code
 
         if result.status_code == 200:
-            tree = ElementTree.fromstring(result.content)
-
-            self.title = tree.findall("./bug/short_desc").pop().text
-            self.issue_id = tree.findall("./bug/bug_id").pop().text
-            self.reporter = tree.findall("./bug/reporter").pop().text
-            self.assignee = tree.findall("./bug/assigned_to").pop().text
-            self.status = tree.findall("./bug/bug_status").pop().text
-            self.product = tree.findall("./bug/product").pop().text
-            self.component = tree.findall("./bug/component").pop().text
-            self.created_at = tree.findall("./bug/creation_ts").pop().text
-            self.updated_at = tree.findall("./bug/delta_ts").pop().text
-            try:
-                self.closed_at = (
-                    tree.findall("./bug/cf_last_closed").pop().text
-                )
-            except IndexError:
-                # cf_last_closed is present only if the issue has been closed
-                # if not present it raises an IndexError, meaning the issue
-                # isn't closed yet, which is a valid use case.
-                pass
+            bug = ElementTree.fromstring(result.content).find('./bug')
+            if bug is not None:
+                self.load(bug)
+
+    def load(self, bug):
+        """Fill the tracker with a bug element of a Bugzilla XML answer."""
+
+        self.issue_id = bug.findtext('bug_id')
+        if bug.get('error') is not None:
+            self.status_code = _ERRORS.get(bug.get('error'), 400)
+            return
+
+        self.title = bug.findtext('short_desc')
+        self.reporter = bug.findtext('reporter')
+        self.assignee = bug.findtext('assigned_to')
+        self.status = bug.findtext('bug_status')
+        self.product = bug.findtext('product')
+        self.component = bug.findtext('component')
+        self.created_at = bug.findtext('creation_ts')
+        self.updated_at = bug.findtext('delta_ts')
+        # cf_last_closed is present only if the issue has been closed
+        self.closed_at = bug.findtext('cf_last_closed')
@@ -26,11 +26,11 @@ _URL_BASE = 'https://api.github.com/repos'
 
 class Github(trackers.Tracker):
 
-    def __init__(self, url):
-        super(Github, self).__init__(url)
+    def __init__(self, url, retrieve=True):
+        super(Github, self).__init__(url, retrieve)
 
-    def retrieve_info(self):
-        """Query the Github API to retrieve the needed infos."""
+    def parse_url(self):
+        """Return the URL of the issue in the Github API."""
 
         path = urlparse(self.url).path
         path = path.split('/')[1:]
@@ -40,12 +40,20 @@ class Github(trackers.Tracker):
         self.component = sanity_filter.match(path[1]).group(0)
         self.issue_id = int(path[3])
 
-        github_url = '%s/%s/%s/issues/%s' % (_URL_BASE,
-                                             self.product,
-                                             self.component,
-                                             self.issue_id)
+        return '%s/%s/%s/issues/%s' % (_URL_BASE,
+                                       self.product,
+                                       self.component,
+                                       self.issue_id)
+
+    def retrieve_info(self):
+        """Query the Github API to retrieve the needed infos."""
+
+        result = requests.get(self.parse_url(), timeout=trackers.TIMEOUT)
+        self.load(result)
+
+    def load(self, result):
+        """Fill the tracker with an answer of the Github API."""
 
-        result = requests.get(github_url)
         self.status_code = result.status_code
 
         if result.status_code == 200:
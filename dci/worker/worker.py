@@ -17,11 +17,22 @@
 
 import zmq
 import json
+import logging
 import smtplib
+import threading
+import time
 
 from zmq.eventloop import ioloop, zmqstream
+
+from dci import dci_config
+from dci.api.v1 import issues
+from dci.api.v1 import junit
+
 ioloop.install()
 
+conf = dci_config.generate_conf()
+engine = dci_config.get_engine(conf)
+
 context = zmq.Context()
 receiver = context.socket(zmq.PULL)
 receiver.bind('tcp://0.0.0.0:5557')
@@ -46,12 +57,39 @@ def mail(job, mail):
     server.quit()
 
 
+def ingest_junit(file_id):
+    db_conn = engine.connect()
+    try:
+        junit.try_ingest(db_conn, dci_config.get_store('files'), file_id)
+    finally:
+        db_conn.close()
+
+
+def refresh_issues():
+    while True:
+        db_conn = engine.connect()
+        try:
+            issues.refresh_issues(db_conn, conf['ISSUES_MAX_AGE'])
+        except Exception:
+            logging.exception('failed to refresh the issues')
+        finally:
+            db_conn.close()
+        time.sleep(conf['ISSUES_REFRESH_INTERVAL'])
+
+
 def loop(msg):
     try:
         mesg = json.loads(msg[0])
-        mail(mesg['job_id'], mesg['email'])
+        if mesg.get('event') == 'junit_ingestion':
+            ingest_junit(mesg['file_id'])
+        else:
+            mail(mesg['job_id'], mesg['email'])
     except:
-        pass
+        logging.exception('failed to process %s' % msg)
+
+refresher = threading.Thread(target=refresh_issues)
+refresher.daemon = True
+refresher.start()
 
 stream.on_recv(loop)
 ioloop.IOLoop.instance().start()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Micro-benchmark of v1_utils.format_result against the previous two
+passes implementation, on rows shaped like a GET /jobs?embed=... result.
+
+usage: bench_format_result.py [nb_jobs] [nb_files] [nb_components]
+"""
+
+import sys
+import timeit
+import uuid
+
+from dci.api.v1 import utils as v1_utils
+
+EMBED_MANY = {'files': True, 'components': True, 'team': False}
+EMBEDS = ['files', 'components', 'team']
+
+
+class Row(tuple):
+    """Mimic a sqlalchemy RowProxy: a tuple with the labels as keys."""
+
+    def __new__(cls, labels, values):
+        row = super(Row, cls).__new__(cls, values)
+        row._labels = labels
+        row._index = dict((label, i) for i, label in enumerate(labels))
+        return row
+
+    def keys(self):
+        return list(self._labels)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return tuple.__getitem__(self, key)
+        return tuple.__getitem__(self, self._index[key])
+
+
+def _columns(prefix, names):
+    return ['%s_%s' % (prefix, name) for name in names]
+
+
+def build_rows(nb_jobs, nb_files, nb_components):
+    job_columns = ['id', 'status', 'comment', 'created_at', 'updated_at',
+                   'etag', 'team_id', 'remoteci_id', 'jobdefinition_id']
+    file_columns = ['id', 'name', 'mime', 'md5', 'size', 'created_at',
+                    'job_id', 'jobstate_id', 'team_id']
+    component_columns = ['id', 'name', 'type', 'canonical_project_name',
+                         'created_at', 'topic_id', 'state']
+    team_columns = ['id', 'name', 'created_at', 'etag', 'state']
+    labels = (_columns('jobs', job_columns) +
+              _columns('files', file_columns) +
+              _columns('components', component_columns) +
+              _columns('team', team_columns))
+
+    team = [str(uuid.uuid4())] + ['team'] * (len(team_columns) - 1)
+    components = [[str(uuid.uuid4())] + ['c%s' % i] * 6
+                  for i in range(nb_components)]
+    rows = []
+    for _ in range(nb_jobs):
+        job = [str(uuid.uuid4())] + ['job'] * (len(job_columns) - 1)
+        files = [[str(uuid.uuid4())] + ['f%s' % i] * 8
+                 for i in range(nb_files)]
+        for job_file in files:
+            for component in components:
+                rows.append(Row(labels, job + job_file + component + team))
+    return rows
+
+
+def legacy_format_result(rows, root_table_name, list_embeds, embed_many):
+    result_rows = []
+    for row in rows:
+        row = dict(row)
+        result_row = {}
+        prefixes_to_remove = []
+        for field in row:
+            prefix, suffix = field.split('_', 1)
+            if suffix == 'id' and row[field] is None:
+                prefixes_to_remove.append(prefix)
+            if prefix not in result_row:
+                result_row[prefix] = {suffix: row[field]}
+            else:
+                result_row[prefix].update({suffix: row[field]})
+        for prefix_to_remove in prefixes_to_remove:
+            result_row.pop(prefix_to_remove)
+        root_table_fields = result_row.pop(root_table_name)
+        result_row.update(root_table_fields)
+        result_rows.append(result_row)
+    rows = result_rows
+
+    def _uniqify_list(list_of_dicts):
+        result = []
+        set_ids = set()
+        for v in list_of_dicts:
+            if v['id'] in set_ids:
+                continue
+            set_ids.add(v['id'])
+            result.append(v)
+        return result
+
+    row_ids_to_embed_values = {}
+    for row in rows:
+        if row['id'] not in row_ids_to_embed_values:
+            row_ids_to_embed_values[row['id']] = {}
+        for embd in list_embeds:
+            if embd not in row:
+                continue
+            if embd not in row_ids_to_embed_values[row['id']]:
+                if embed_many[embd]:
+                    row_ids_to_embed_values[row['id']][embd] = [row[embd]]
+                else:
+                    row_ids_to_embed_values[row['id']][embd] = row[embd]
+            else:
+                if embed_many[embd]:
+                    row_ids_to_embed_values[row['id']][embd].append(row[embd])
+        for embd in list_embeds:
+            if embd in row_ids_to_embed_values[row['id']]:
+                embed_values = row_ids_to_embed_values[row['id']][embd]
+                if isinstance(embed_values, list):
+                    row_ids_to_embed_values[row['id']][embd] = _uniqify_list(embed_values)  # noqa
+            else:
+                row_ids_to_embed_values[row['id']][embd] = {}
+                if embed_many[embd]:
+                    row_ids_to_embed_values[row['id']][embd] = []
+
+    result = []
+    seen = set()
+    for row in rows:
+        if row['id'] in seen:
+            continue
+        seen.add(row['id'])
+        new_row = {}
+        for field in row:
+            if field not in list_embeds:
+                new_row[field] = row[field]
+        for embd in list_embeds:
+            new_row[embd] = row_ids_to_embed_values[new_row['id']][embd]
+        result.append(new_row)
+    return result
+
+
+def main(nb_jobs=100, nb_files=20, nb_components=5):
+    rows = build_rows(nb_jobs, nb_files, nb_components)
+
+    legacy = legacy_format_result(rows, 'jobs', EMBEDS, EMBED_MANY)
+    current = v1_utils.format_result(rows, 'jobs', EMBEDS, EMBED_MANY)
+    assert legacy == current, 'format_result results differ'
+
+    print('%s rows, %s jobs' % (len(rows), nb_jobs))
+    for name, func in (('legacy', legacy_format_result),
+                       ('format_result', v1_utils.format_result)):
+        timer = timeit.Timer(lambda: func(rows, 'jobs', EMBEDS, EMBED_MANY))
+        best = min(timer.repeat(repeat=5, number=1))
+        print('%-15s %8.2f ms' % (name, best * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Benchmark of transformations.junit2dict against the previous
+etree.fromstring implementation, on tests/data/tempest-results.xml with its
+testcases repeated scale times. Each parser runs in its own process, fed
+with 64KB chunks like the Swift store does, to report its peak memory.
+
+usage: bench_junit2dict.py [scale]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from lxml import etree
+
+from dci.api.v1 import transformations
+
+TEMPEST = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data',
+                       'tempest-results.xml')
+CHUNK_SIZE = 65535
+
+
+def build_chunks(scale):
+    with open(TEMPEST, 'rb') as f:
+        content = f.read()
+    head, _, rest = content.partition(b'\n')
+    body, _, _ = rest.rpartition(b'</testsuite>')
+    document = head + b'\n' + body * scale + b'</testsuite>\n'
+    return [document[i:i + CHUNK_SIZE]
+            for i in range(0, len(document), CHUNK_SIZE)]
+
+
+def legacy_junit2dict(chunks):
+    # the previous implementation needed the whole document
+    root = etree.fromstring(b''.join(chunks))
+    testscases = []
+    for testcase in root.findall('testcase'):
+        testcase_dict = {'action': 'passed', 'message': '', 'type': '',
+                         'value': ''}
+        testcase_dict.update(transformations.parse_testcase(testcase))
+        if len(testcase) > 0:
+            testcase_dict.update(transformations.parse_action(testcase[0]))
+        testscases.append(testcase_dict)
+    return {'total': len(testscases), 'testscases': testscases}
+
+
+PARSERS = {
+    'fromstring': legacy_junit2dict,
+    'junit2dict': transformations.junit2dict,
+    'junit2dict-totals': lambda chunks: transformations.junit2dict(
+        chunks, with_testscases=False),
+}
+
+
+def run(name, scale):
+    chunks = build_chunks(scale)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    result = PARSERS[name](iter(chunks))
+    duration = time.time() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+    print('%-18s %8.2f ms %8d KB peak %7d testcases'
+          % (name, duration * 1000, peak, result['total']))
+
+
+def main(scale=100):
+    size = sum(len(chunk) for chunk in build_chunks(scale))
+    print('%.1f MB document' % (size / 1024.0 / 1024))
+    for name in ('fromstring', 'junit2dict', 'junit2dict-totals'):
+        subprocess.check_call([sys.executable, __file__, '--run', name,
+                               str(scale)])
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--run']:
+        run(sys.argv[2], int(sys.argv[3]))
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
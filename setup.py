@@ -64,5 +64,7 @@ setuptools.setup(
     scripts=[
         'bin/dci-dbsync',
         'bin/dci-dbinit',
-        'bin/dci-esindex'
+        'bin/dci-esindex',
+        'bin/dci-jobsstats',
+        'bin/dci-junitingest'
     ])
@@ -27,6 +27,10 @@ def test_purge_resource(admin):
     to_purge = admin.get('/api/v1/topics/purge').data
     assert len(to_purge['topics']) == 1
 
+    to_purge_streamed = admin.get('/api/v1/topics/purge?stream=true').data
+    assert to_purge_streamed['topics'][0]['id'] == pt_id
+    assert to_purge_streamed['_meta'] == {'count': 1}
+
     to_purge = admin.post('/api/v1/topics/purge')
     assert to_purge.status_code == 204
 
@@ -18,7 +18,9 @@ from __future__ import unicode_literals
 import mock
 import uuid
 from dci.stores.swift import Swift
+from dci.common import exceptions as dci_exc
 from dci.common import utils
+from dci.db import models
 
 SWIFT = 'dci.stores.swift.Swift'
 
@@ -382,7 +384,7 @@ def test_download_file_from_component(admin, topic_id):
         head_result = {
             'etag': utils.gen_etag(),
             'content-type': "stream",
-            'content-length': 3
+            'content-length': 9
         }
         mockito.head.return_value = head_result
 
@@ -405,6 +407,45 @@ def test_download_file_from_component(admin, topic_id):
         assert d_file.data == "lollollel"
 
 
+def test_download_file_from_component_range(admin, topic_id):
+    content = b'lollollel'
+
+    def get(file_path, byte_range=None):
+        start, stop = byte_range or (0, len(content))
+        return {}, iter([content[start:stop]])
+
+    with mock.patch(SWIFT, spec=Swift) as mock_swift:
+        mockito = mock.MagicMock()
+        mockito.get.side_effect = get
+        mockito.head.return_value = {'etag': utils.gen_etag(),
+                                     'content-type': "stream",
+                                     'content-length': len(content)}
+        mock_swift.return_value = mockito
+
+        data = {'name': "pname1", 'title': 'aaa',
+                'type': 'gerrit_review',
+                'topic_id': topic_id}
+        ct_1 = admin.post('/api/v1/components', data=data).data['component']
+        url = '/api/v1/components/%s/files' % ct_1['id']
+        c_file = admin.post(url, data='lollollel').data['component_file']
+        url = '/api/v1/components/%s/files/%s/content' % (ct_1['id'],
+                                                          c_file['id'])
+
+        d_file = admin.get(url, headers={'Range': 'bytes=3-5'})
+        assert d_file.status_code == 206
+        assert d_file.data == 'lol'
+        assert d_file.headers['Content-Range'] == 'bytes 3-5/9'
+        assert d_file.headers['Accept-Ranges'] == 'bytes'
+
+        d_file = admin.get(url, headers={'Range': 'bytes=6-'})
+        assert d_file.status_code == 206
+        assert d_file.data == 'lel'
+
+        d_file = admin.get(url, headers={'Range': 'bytes=20-'})
+        assert d_file.status_code == 416
+        assert d_file.headers['Content-Range'] == 'bytes */9'
+
+
 def test_delete_file_from_component(admin, topic_id):
     with mock.patch(SWIFT, spec=Swift) as mock_swift:
 
@@ -441,6 +482,90 @@ def test_delete_file_from_component(admin, topic_id):
         assert g_file.data['_meta']['count'] == 0
 
 
+def test_component_files_content_is_stored_once(admin, topic_id):
+    with mock.patch(SWIFT, spec=Swift) as mock_swift:
+        mockito = mock.MagicMock()
+        mockito.head.return_value = {'etag': utils.gen_etag(),
+                                     'content-type': "stream",
+                                     'content-length': 3}
+        mockito.upload.side_effect = lambda path, stream: stream.read()
+        mockito.build_file_path.side_effect = \
+            lambda *parts: '/'.join(str(part) for part in parts)
+        mock_swift.return_value = mockito
+
+        c_files = []
+        for name in ('pname1', 'pname2'):
+            data = {'name': name, 'title': 'aaa', 'type': 'gerrit_review',
+                    'topic_id': topic_id}
+            ct = admin.post('/api/v1/components', data=data).data
+            ct = ct['component']
+            url = '/api/v1/components/%s/files' % ct['id']
+            c_file = admin.post(url, data='lol').data['component_file']
+            c_files.append((ct['id'], c_file['id'], c_file['digest']))
+        assert c_files[0][2] == c_files[1][2]
+
+        first_path = '%s/%s/%s' % (topic_id, c_files[0][0], c_files[0][1])
+        second_path = '%s/%s/%s' % (topic_id, c_files[1][0], c_files[1][1])
+        # the second upload was removed in favor of the first one
+        mockito.delete.assert_called_once_with(second_path)
+
+        url = '/api/v1/components/%s/files/%s/content' % c_files[1][:2]
+        assert admin.get(url).status_code == 200
+        assert mockito.get.call_args[0][0] == first_path
+
+        url = '/api/v1/components/%s/files/%s' % c_files[0][:2]
+        assert admin.delete(url).status_code == 204
+        assert mockito.delete.call_count == 1
+
+        # the content goes with its last reference
+        url = '/api/v1/components/%s/files/%s' % c_files[1][:2]
+        assert admin.delete(url).status_code == 204
+        mockito.delete.assert_called_with(first_path)
+        assert mockito.delete.call_count == 2
+
+
+def test_component_files_upload_failure(admin, topic_id):
+    with mock.patch(SWIFT, spec=Swift) as mock_swift:
+        mockito = mock.MagicMock()
+        mockito.head.side_effect = dci_exc.DCIException('store unavailable')
+        mockito.upload.side_effect = lambda path, stream: stream.read()
+        mockito.build_file_path.side_effect = \
+            lambda *parts: '/'.join(str(part) for part in parts)
+        mock_swift.return_value = mockito
+
+        data = {'name': 'pname', 'title': 'aaa', 'type': 'gerrit_review',
+                'topic_id': topic_id}
+        ct = admin.post('/api/v1/components', data=data).data['component']
+        url = '/api/v1/components/%s/files' % ct['id']
+        assert admin.post(url, data='lol').status_code == 400
+
+        # the uploaded content is not left behind
+        path = mockito.upload.call_args[0][0]
+        mockito.delete.assert_called_once_with(path)
+        assert admin.get(url).data['_meta']['count'] == 0
+
+
+def test_component_files_content_without_blob(admin, engine, topic_id):
+    with mock.patch(SWIFT, spec=Swift) as mock_swift:
+        mockito = mock.MagicMock()
+        mockito.head.return_value = {'etag': utils.gen_etag(),
+                                     'content-type': "stream",
+                                     'content-length': 3}
+        mockito.upload.side_effect = lambda path, stream: stream.read()
+        mock_swift.return_value = mockito
+
+        data = {'name': 'pname', 'title': 'aaa', 'type': 'gerrit_review',
+                'topic_id': topic_id}
+        ct = admin.post('/api/v1/components', data=data).data['component']
+        url = '/api/v1/components/%s/files' % ct['id']
+        c_file = admin.post(url, data='lol').data['component_file']
+        engine.execute(models.COMPONENT_BLOBS.delete())
+
+        url = '/api/v1/components/%s/files/%s/content' % (ct['id'],
+                                                         c_file['id'])
+        assert admin.get(url).status_code == 404
+
+
 def test_change_component_state(admin, topic_id):
     data = {
         'name': 'pname',
@@ -18,8 +18,10 @@ from __future__ import unicode_literals
 import pytest
 import mock
 
+import dci.app
 from dci.stores.swift import Swift
 from dci.common import utils
+from tests import utils as t_utils
 
 import collections
 
@@ -65,6 +67,59 @@ def test_create_files_jobstate_id_and_job_id_missing(admin, team_admin_id):
     assert file.status_code == 400
 
 
+def test_create_files_with_signature(admin, app, job_user_id,
+                                     remoteci_user_id):
+    remoteci = admin.get('/api/v1/remotecis/%s' % remoteci_user_id).data
+    remoteci = remoteci['remoteci']
+    client = app.test_client()
+
+    with mock.patch(SWIFT, spec=Swift) as mock_swift:
+        mockito = mock.MagicMock()
+        mockito.head.return_value = {'etag': utils.gen_etag(),
+                                     'content-type': "stream",
+                                     'content-length': 7}
+        # the payload is hashed while the store reads it
+        mockito.upload.side_effect = lambda path, stream: stream.read()
+        mock_swift.return_value = mockito
+
+        headers = t_utils.signature_headers(remoteci, 'POST',
+                                            '/api/v1/files',
+                                            payload=b'content',
+                                            content_type='text/plain')
+        headers.update({'DCI-JOB-ID': job_user_id, 'DCI-NAME': 'signed'})
+        res = client.post('/api/v1/files', headers=headers, data=b'content')
+        assert res.status_code == 201
+        assert not mockito.delete.called
+
+        # the uploaded object is removed when the payload does not match
+        res = client.post('/api/v1/files', headers=headers, data=b'altered')
+        assert res.status_code == 401
+        assert mockito.delete.called
+
+    files = admin.get('/api/v1/jobs/%s/files' % job_user_id).data['files']
+    assert [f['name'] for f in files] == ['signed']
+
+
+def test_files_with_filesystem_store(admin, engine, jobstate_id):
+    conf = dict(t_utils.conf, STORE_ENGINE='FileSystem')
+    fs_app = dci.app.create_app(conf)
+    fs_app.testing = True
+    fs_app.engine = engine
+    fs_admin = t_utils.generate_client(fs_app, ('admin', 'admin'))
+
+    headers = {'DCI-JOBSTATE-ID': jobstate_id, 'DCI-NAME': 'local',
+               'Content-Type': 'text/plain'}
+    file = fs_admin.post('/api/v1/files', headers=headers,
+                         data='local content').data['file']
+    assert file['size'] == len('local content')
+
+    res = fs_admin.get('/api/v1/files/%s/content' % file['id'])
+    assert res.status_code == 200
+    assert res.data == 'local content'
+    assert res.headers['Content-Disposition'] == \
+        'attachment; filename="local"'
+
+
 def test_get_all_files(admin, jobstate_id):
     file_1 = post_file(admin, jobstate_id, FileDesc('kikoolol1', ''))
     file_2 = post_file(admin, jobstate_id, FileDesc('kikoolol2', ''))
@@ -98,6 +153,28 @@ def test_get_all_files_with_pagination(admin, jobstate_id):
     assert files.data['files'] == []
 
 
+def test_get_all_files_with_stream(admin, jobstate_id):
+    for i in range(4):
+        post_file(admin, jobstate_id, FileDesc('lol%d' % i, ''))
+
+    files = admin.get('/api/v1/files?sort=created_at&embed=team').data
+    streamed_files = admin.get('/api/v1/files?sort=created_at&embed=team'
+                               '&stream=true').data
+    assert streamed_files == files
+    assert streamed_files['_meta']['count'] == 4
+
+    files = admin.get('/api/v1/files?limit=3&count=none&stream=true').data
+    assert len(files['files']) == 3
+    assert files['_meta'] == {'has_more': True}
+
+    files = admin.get('/api/v1/files?limit=3&after=&stream=true').data
+    assert len(files['files']) == 3
+    files = admin.get('/api/v1/files?limit=3&stream=true&after=%s' %
+                      files['_meta']['next']).data
+    assert len(files['files']) == 1
+    assert files['_meta'] == {'count': 4, 'next': None}
+
+
 def test_get_all_files_with_embed(admin, jobstate_id, team_admin_id, job_id):
     post_file(admin, jobstate_id, FileDesc('lol1', ''))
     post_file(admin, jobstate_id, FileDesc('lol2', ''))
@@ -306,6 +383,47 @@ def test_get_file_content(admin, jobstate_id):
         assert get_file.data == data
 
 
+def test_get_file_content_conditional_and_range(admin, jobstate_id):
+    content = b'azertyuiop1234567890'
+
+    def get(file_path, byte_range=None):
+        start, stop = byte_range or (0, len(content))
+        return {}, iter([content[start:stop]])
+
+    with mock.patch(SWIFT, spec=Swift) as mock_swift:
+        mockito = mock.MagicMock()
+        mockito.head.return_value = {'etag': utils.gen_etag(),
+                                     'content-type': "stream",
+                                     'content-length': len(content)}
+        mockito.get.side_effect = get
+        mock_swift.return_value = mockito
+        headers = {'DCI-JOBSTATE-ID': jobstate_id, 'DCI-NAME': 'foo',
+                   'Content-Type': 'text/plain'}
+        file_id = admin.post('/api/v1/files', headers=headers,
+                             data=content).data['file']['id']
+        url = '/api/v1/files/%s/content' % file_id
+
+        get_file = admin.get(url)
+        assert get_file.status_code == 200
+        etag = get_file.headers['ETag']
+        last_modified = get_file.headers['Last-Modified']
+        assert etag == '"%s"' % mockito.head.return_value['etag']
+
+        get_file = admin.get(url, headers={'If-None-Match': etag})
+        assert get_file.status_code == 304
+        assert get_file.data == ''
+        get_file = admin.get(url, headers={'If-Modified-Since':
+                                           last_modified})
+        assert get_file.status_code == 304
+        get_file = admin.get(url, headers={'If-None-Match': '"other"'})
+        assert get_file.status_code == 200
+
+        get_file = admin.get(url, headers={'Range': 'bytes=-10'})
+        assert get_file.status_code == 206
+        assert get_file.data == '1234567890'
+        assert get_file.headers['Content-Range'] == 'bytes 10-19/20'
+
+
 def test_get_file_content_as_user(user, file_id, file_user_id):
     url = '/api/v1/files/%s/content'
 
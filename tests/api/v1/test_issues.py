@@ -19,8 +19,11 @@ from __future__ import unicode_literals
 import mock
 import requests
 
+from dci.api.v1 import issues
+
 GITHUB_TRACKER = 'dci.trackers.github.requests'
 BUGZILLA_TRACKER = 'dci.trackers.bugzilla.requests'
+BATCH_TRACKERS = 'dci.trackers.batch.requests'
 
 
 def test_attach_issue_to_job(admin, job_id):
@@ -318,3 +321,88 @@ def test_bugzilla_tracker_with_non_existent_issue(admin, job_id):
         assert result['created_at'] is None
         assert result['updated_at'] is None
         assert result['closed_at'] is None
+
+
+def test_issues_are_refreshed_by_the_worker(admin, job_id, engine):
+    with mock.patch(GITHUB_TRACKER, spec=requests) as mock_github_request, \
+            mock.patch(BATCH_TRACKERS, spec=requests) as mock_batch_request:
+        mock_github_result = mock.Mock()
+        mock_github_request.get.return_value = mock_github_result
+        mock_session_get = mock_batch_request.Session.return_value.get
+        mock_session_get.return_value = mock_github_result
+        mock_github_result.status_code = 200
+        mock_github_result.json.return_value = {
+            'title': 'first title',
+            'user': {'login': 'Spredzy'},
+            'assignee': None,
+            'state': 'open',
+            'created_at': '2015-12-09T09:29:26Z',
+            'updated_at': '2015-12-09T09:29:26Z',
+            'closed_at': None,
+        }
+
+        data = {
+            'url': 'https://github.com/redhat-cip/dci-control-server/issues/1'
+        }
+        admin.post('/api/v1/jobs/%s/issues' % job_id, data=data)
+        assert mock_github_request.get.call_count == 1
+
+        # the listings do not query the tracker
+        result = admin.get('/api/v1/jobs/%s/issues' % job_id).data
+        assert result['issues'][0]['title'] == 'first title'
+        admin.get('/api/v1/jobs/%s' % job_id)
+        assert mock_github_request.get.call_count == 1
+
+        mock_github_result.json.return_value.update({'title': 'new title',
+                                                     'state': 'closed'})
+        with engine.connect() as db_conn:
+            issues.refresh_issues(db_conn, max_age=3600)
+        assert mock_session_get.call_count == 0
+
+        with engine.connect() as db_conn:
+            issues.refresh_issues(db_conn, max_age=0)
+        mock_session_get.assert_called_once_with(
+            'https://api.github.com/repos/redhat-cip/dci-control-server/'
+            'issues/1', timeout=10)
+        result = admin.get('/api/v1/jobs/%s/issues' % job_id).data
+        assert result['issues'][0]['title'] == 'new title'
+        assert result['issues'][0]['status'] == 'closed'
+
+
+def test_get_job_issues_without_duplicates(admin, job_id):
+    with mock.patch(GITHUB_TRACKER, spec=requests) as mock_github_request:
+        mock_github_result = mock.Mock()
+        mock_github_request.get.return_value = mock_github_result
+        mock_github_result.status_code = 404
+
+        components = admin.get('/api/v1/jobs/%s/components' % job_id).data
+        component_id = components['components'][0]['id']
+        data = {
+            'url': 'https://github.com/redhat-cip/dci-control-server/issues/1'
+        }
+        issue = admin.post('/api/v1/jobs/%s/issues' % job_id, data=data).data
+        admin.post('/api/v1/components/%s/issues' % component_id, data=data)
+        data = {
+            'url': 'https://github.com/redhat-cip/dci-control-server/issues/2'
+        }
+        admin.post('/api/v1/components/%s/issues' % component_id, data=data)
+
+        result = admin.get('/api/v1/jobs/%s/issues' % job_id).data
+        assert result['_meta']['count'] == 2
+        assert result['issues'][0]['id'] == issue['issue']['id']
+        assert result['issues'][1]['url'].endswith('/issues/2')
+
+        result = admin.get('/api/v1/jobs/%s' % job_id).data
+        assert len(result['job']['issues']) == 2
+
+
+def test_attach_issue_with_invalid_github_url(admin, job_id):
+    with mock.patch(GITHUB_TRACKER, spec=requests) as mock_github_request:
+        data = {'url': 'https://github.com/redhat-cip'}
+        result = admin.post('/api/v1/jobs/%s/issues' % job_id, data=data)
+        assert result.status_code == 201
+        assert not mock_github_request.get.called
+
+        result = admin.get('/api/v1/jobs/%s/issues' % job_id).data
+        assert result['_meta']['count'] == 1
+        assert result['issues'][0]['url'] == data['url']
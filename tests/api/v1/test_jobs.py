@@ -165,6 +165,61 @@ def test_schedule_kill_old_jobs(admin, jobdefinition_factory, remoteci_id,
     assert jobs['jobs'][1]['status'] == 'new'
 
 
+def test_schedule_failure_keeps_jobs(admin, jobdefinition_factory,
+                                     remoteci_id, topic_id, team_admin_id):
+    jobdefinition_factory('1st')
+    r = admin.post('/api/v1/jobs/schedule',
+                   data={'remoteci_id': remoteci_id,
+                         'topic_id': topic_id})
+    assert r.status_code == 201
+
+    # there is no jobdefinition in the new topic
+    new_topic = admin.post('/api/v1/topics', data={'name': 'new_topic'}).data
+    new_topic_id = new_topic['topic']['id']
+    admin.post('/api/v1/topics/%s/teams' % new_topic_id,
+               data={'team_id': team_admin_id})
+    r = admin.post('/api/v1/jobs/schedule',
+                   data={'remoteci_id': remoteci_id,
+                         'topic_id': new_topic_id})
+    assert r.status_code == 412
+
+    jobs = admin.get('/api/v1/jobs').data
+    assert len(jobs['jobs']) == 1
+    assert jobs['jobs'][0]['status'] == 'new'
+
+
+def test_schedule_cache(admin, jobdefinition_id, remoteci_id, topic_id):
+    def schedule():
+        r = admin.post('/api/v1/jobs/schedule',
+                       data={'remoteci_id': remoteci_id,
+                             'topic_id': topic_id})
+        assert r.status_code == 201
+        r = admin.get('/api/v1/jobs/%s/components' % r.data['job']['id'])
+        return set(c['id'] for c in r.data['components'])
+
+    components = schedule()
+    assert schedule() == components
+    stats = admin.get('/api/v1/metrics/caches').data['caches']['schedule']
+    assert stats['hits'] == 1
+
+    # the new components are scheduled right away
+    data = {'topic_id': topic_id, 'name': 'new', 'type': 'type_1',
+            'export_control': True}
+    cmpt = admin.post('/api/v1/components', data=data).data['component']
+    assert cmpt['id'] in schedule()
+
+    admin.delete('/api/v1/components/%s' % cmpt['id'])
+    assert schedule() == components
+
+    jd = admin.get('/api/v1/jobdefinitions/%s' % jobdefinition_id)
+    admin.put('/api/v1/jobdefinitions/%s' % jobdefinition_id,
+              data={'state': 'inactive'},
+              headers={'If-match': jd.data['jobdefinition']['etag']})
+    r = admin.post('/api/v1/jobs/schedule',
+                   data={'remoteci_id': remoteci_id, 'topic_id': topic_id})
+    assert r.status_code == 412
+
+
 def test_schedule_give_latest_components(admin, jobdefinition_factory,
                                          remoteci_id, topic_id):
     """The scheduled job should come with the last components."""
@@ -320,6 +375,82 @@ def test_get_all_jobs_with_pagination(admin, jobdefinition_id, remoteci_id,
     assert jobs.data['jobs'] == []
 
 
+def test_get_all_jobs_with_cursor_pagination(admin, jobdefinition_id,
+                                             remoteci_id, components_ids):
+    data = {'jobdefinition_id': jobdefinition_id,
+            'remoteci_id': remoteci_id,
+            'components': components_ids}
+    jobs_ids = [admin.post('/api/v1/jobs', data=data).data['job']['id']
+                for _ in range(5)]
+
+    def walk(url):
+        ids = []
+        cursor = ''
+        while cursor is not None:
+            jobs = admin.get(url + cursor).data
+            assert jobs['_meta']['count'] == 5
+            assert len(jobs['jobs']) <= 2
+            ids.extend(job['id'] for job in jobs['jobs'])
+            cursor = jobs['_meta']['next']
+        return ids
+
+    assert walk('/api/v1/jobs?limit=2&after=') == list(reversed(jobs_ids))
+    assert walk('/api/v1/jobs?limit=2&sort=created_at&after=') == jobs_ids
+
+    # the embed subquery path honours the cursor as well
+    ids = walk('/api/v1/jobs?limit=2&embed=components&after=')
+    assert ids == list(reversed(jobs_ids))
+
+    # the 'next' cursor is only returned in cursor mode
+    jobs = admin.get('/api/v1/jobs?limit=2').data
+    assert 'next' not in jobs['_meta']
+
+
+def test_get_all_jobs_with_count_mode(admin, jobdefinition_id, remoteci_id,
+                                      components_ids):
+    data = {'jobdefinition_id': jobdefinition_id,
+            'remoteci_id': remoteci_id,
+            'components': components_ids}
+    for _ in range(3):
+        admin.post('/api/v1/jobs', data=data)
+
+    jobs = admin.get('/api/v1/jobs?count=exact').data
+    assert jobs['_meta'] == {'count': 3}
+
+    jobs = admin.get('/api/v1/jobs?count=estimate').data
+    assert isinstance(jobs['_meta']['count'], int)
+    assert len(jobs['jobs']) == 3
+
+    jobs = admin.get('/api/v1/jobs?count=none&limit=2').data
+    assert jobs['_meta'] == {'has_more': True}
+    assert len(jobs['jobs']) == 2
+
+    jobs = admin.get('/api/v1/jobs?count=none&limit=2&offset=2').data
+    assert jobs['_meta'] == {'has_more': False}
+    assert len(jobs['jobs']) == 1
+
+    query = '/api/v1/jobs?count=none&limit=2&embed=components'
+    jobs = admin.get(query).data
+    assert jobs['_meta'] == {'has_more': True}
+    assert len(jobs['jobs']) == 2
+    for job in jobs['jobs']:
+        assert len(job['components']) == 3
+
+    jobs = admin.get('/api/v1/jobs?count=all')
+    assert jobs.status_code == 400
+
+
+def test_get_all_jobs_with_invalid_cursor(admin):
+    jobs = admin.get('/api/v1/jobs?limit=2&after=kikoolol')
+    assert jobs.status_code == 400
+
+    jobs = admin.get('/api/v1/jobs?limit=2&offset=2&after=')
+    assert jobs.status_code == 400
+
+    jobs = admin.get('/api/v1/jobs?limit=2&sort=comment&after=')
+    assert jobs.status_code == 400
+
+
 def test_get_all_jobs_with_embed(admin, jobdefinition_id, team_id,
                                  remoteci_id, components_ids, test_id):
     # create 2 jobs and check meta data count
@@ -377,7 +508,7 @@ def test_get_all_jobs_with_embed(admin, jobdefinition_id, team_id,
                 'content-length': 7
             }
             mockito.head.return_value = head_result
-            mockito.get_object.return_value = JUNIT
+            mockito.get.side_effect = lambda path: ({}, iter([JUNIT]))
             mock_swift.return_value = mockito
             query = ('/api/v1/jobs')
             jobs = admin.get(query).data
@@ -442,6 +573,41 @@ def test_get_all_jobs_with_embed_and_limit(admin, jobdefinition_id,
     assert len(jobs['jobs'][0]['components']) == 3
 
 
+def test_get_all_jobs_with_many_embeds(admin, jobdefinition_id,
+                                       remoteci_id, components_ids):
+    data = {'jobdefinition_id': jobdefinition_id,
+            'remoteci_id': remoteci_id,
+            'components': components_ids}
+    job_1 = admin.post('/api/v1/jobs', data=data).data['job']['id']
+    job_2 = admin.post('/api/v1/jobs', data=data).data['job']['id']
+    for job_id in (job_1, job_2):
+        for status in ('pre-run', 'running'):
+            admin.post('/api/v1/jobstates',
+                       data={'status': status, 'job_id': job_id})
+        for name in ('kikoo', 'lol'):
+            admin.post('/api/v1/jobs/%s/metas' % job_id,
+                       data={'name': name, 'value': name})
+
+    query_embed = ('/api/v1/jobs?embed=components,jobstates,metas,'
+                   'jobdefinition.tests&limit=2&sort=created_at')
+    jobs = admin.get(query_embed).data
+
+    assert [job['id'] for job in jobs['jobs']] == [job_1, job_2]
+    for job in jobs['jobs']:
+        assert set(i['id'] for i in job['components']) == set(components_ids)
+        assert len(job['jobstates']) == 2
+        assert all(i['job_id'] == job['id'] for i in job['jobstates'])
+        assert len(job['metas']) == 2
+        assert job['jobdefinition']['id'] == jobdefinition_id
+        assert job['jobdefinition']['tests'] == []
+
+    # sorting on an embed column keeps it in the joined query
+    query_embed = '/api/v1/jobs?embed=components&sort=components.name'
+    jobs = admin.get(query_embed).data
+    assert len(jobs['jobs']) == 2
+    assert len(jobs['jobs'][0]['components']) == 3
+
+
 def test_get_all_jobs_with_embed_not_valid(admin):
     jds = admin.get('/api/v1/jobs?embed=mdr')
     assert jds.status_code == 400
@@ -837,7 +1003,6 @@ def test_get_results_by_job_id(user, job_user_id):
         }
         mockito.head.return_value = head_result
         mockito.get.return_value = ['', JUNIT]
-        mockito.get_object.return_value = JUNIT
         mock_swift.return_value = mockito
         headers = {'DCI-JOB-ID': job_user_id,
                    'Content-Type': 'application/junit',
@@ -853,6 +1018,214 @@ def test_get_results_by_job_id(user, job_user_id):
         assert file_from_job.data['results'][0]['total'] == 6
         assert len(file_from_job.data['results'][0]['testscases']) > 0
 
+    # the results are read from the database, not from the store
+    file_from_job = user.get('/api/v1/jobs/%s/results' % job_user_id)
+    testscases = file_from_job.data['results'][0]['testscases']
+    assert [t['name'] for t in testscases] == ['test_%s' % i
+                                               for i in range(1, 7)]
+    assert testscases[1] == {'name': 'test_2',
+                             'classname': 'classname_1',
+                             'time': 0.91562318802,
+                             'action': 'error',
+                             'message': 'error message',
+                             'type': 'error',
+                             'value': 'test in error'}
+
+
+def test_get_results_by_job_id_filtered_and_paginated(user, job_user_id):
+    with mock.patch(SWIFT, spec=Swift) as mock_swift:
+        mockito = mock.MagicMock()
+        mockito.get.return_value = ['', JUNIT]
+        mock_swift.return_value = mockito
+        headers = {'DCI-JOB-ID': job_user_id,
+                   'Content-Type': 'application/junit',
+                   'DCI-MIME': 'application/junit',
+                   'DCI-NAME': 'res_junit.xml'}
+        user.post('/api/v1/files', headers=headers, data=JUNIT)
+
+    url = '/api/v1/jobs/%s/results' % job_user_id
+    results = user.get(url + '?where=action:failure').data
+    assert results['_meta']['testscases']['count'] == 1
+    assert results['results'][0]['total'] == 6
+    assert [t['name'] for t in results['results'][0]['testscases']] == \
+        ['test_3']
+
+    results = user.get(url + '?where=classname:classname_2').data
+    assert results['_meta']['testscases']['count'] == 0
+    assert results['results'][0]['testscases'] == []
+
+    results = user.get(url + '?limit=2&offset=2').data
+    assert results['_meta']['testscases']['count'] == 6
+    assert [t['name'] for t in results['results'][0]['testscases']] == \
+        ['test_3', 'test_4']
+
+    results = user.get(url + '?sort=-time&limit=1').data
+    assert [t['name'] for t in results['results'][0]['testscases']] == \
+        ['test_5']
+
+
+JUNIT_NEXT = """<testsuite errors="0" failures="1" name="pytest" tests="3">
+    <testcase classname="classname_1" name="test_2" time="0.1"/>
+    <testcase classname="classname_1" name="test_4" time="0.2">
+        <failure message="failure message" type="failure">failure</failure>
+    </testcase>
+    <testcase classname="classname_1" name="test_7" time="0.3"/>
+</testsuite>"""
+
+
+def _post_junit(client, job_id, content):
+    with mock.patch(SWIFT, spec=Swift) as mock_swift:
+        mockito = mock.MagicMock()
+        mockito.get.return_value = ['', content]
+        mock_swift.return_value = mockito
+        headers = {'DCI-JOB-ID': job_id,
+                   'Content-Type': 'application/junit',
+                   'DCI-MIME': 'application/junit',
+                   'DCI-NAME': 'res_junit.xml'}
+        file = client.post('/api/v1/files', headers=headers, data=content)
+        return file.data['file']['id']
+
+
+def test_get_results_without_deleted_files(user, job_user_id):
+    file_id = _post_junit(user, job_user_id, JUNIT)
+    _post_junit(user, job_user_id, JUNIT_NEXT)
+
+    url = '/api/v1/jobs/%s/results' % job_user_id
+    results = user.get(url).data
+    assert results['_meta']['count'] == 2
+    assert results['_meta']['testscases']['count'] == 9
+
+    user.delete('/api/v1/files/%s' % file_id)
+    results = user.get(url).data
+    assert results['_meta']['count'] == 1
+    assert results['results'][0]['total'] == 3
+    assert results['_meta']['testscases']['count'] == 3
+    assert [t['name'] for t in results['results'][0]['testscases']] == \
+        ['test_2', 'test_4', 'test_7']
+
+
+
+def test_get_results_not_ingested(app, user, job_user_id):
+    _post_junit(user, job_user_id, JUNIT.replace('</testcase>', '', 1))
+    app.config['JUNIT_ASYNC_INGESTION'] = True
+    with mock.patch.object(app, 'sender'):
+        _post_junit(user, job_user_id, JUNIT_NEXT)
+
+    results = user.get('/api/v1/jobs/%s/results' % job_user_id).data
+    assert results['_meta']['count'] == 2
+    assert [r['ingestion_status'] for r in results['results']] == \
+        ['error', 'pending']
+    for result in results['results']:
+        assert result['total'] is None
+        assert result['testscases'] == []
+
+@pytest.fixture
+def next_job_user_id(admin, jobdefinition_id, team_user_id, remoteci_user_id,
+                     components_ids, job_user_id):
+    data = {'jobdefinition_id': jobdefinition_id, 'team_id': team_user_id,
+            'remoteci_id': remoteci_user_id, 'components': components_ids,
+            'previous_job_id': job_user_id}
+    job = admin.post('/api/v1/jobs', data=data).data
+    return job['job']['id']
+
+
+def test_get_results_diff(user, job_user_id, next_job_user_id):
+    _post_junit(user, job_user_id, JUNIT)
+    _post_junit(user, next_job_user_id, JUNIT_NEXT)
+
+    url = '/api/v1/jobs/%s/results/diff' % next_job_user_id
+    for against in ('previous', 'last', job_user_id):
+        diff = user.get(url + '?against=%s' % against)
+        assert diff.status_code == 200
+        assert diff.data['against_job_id'] == job_user_id
+        assert diff.data['_meta']['count'] == 7
+        assert [(t['name'], t['action'], t['against_action'], t['status'])
+                for t in diff.data['testscases']] == [
+            ('test_1', None, 'skipped', 'removed'),
+            ('test_2', 'passed', 'error', 'fixed'),
+            ('test_3', None, 'failure', 'removed'),
+            ('test_4', 'failure', 'passed', 'regression'),
+            ('test_5', None, 'passed', 'removed'),
+            ('test_6', None, 'passed', 'removed'),
+            ('test_7', 'passed', None, 'added')]
+
+    diff = user.get(url + '?status=regression').data
+    assert [t['name'] for t in diff['testscases']] == ['test_4']
+
+    # the first job has nothing to be compared with
+    url = '/api/v1/jobs/%s/results/diff' % job_user_id
+    assert user.get(url).status_code == 404
+    assert user.get(url + '?against=last').status_code == 404
+    assert user.get(url + '?against=first').status_code == 400
+
+
+def test_get_flaky_tests(admin, user, topic_id, job_user_id,
+                         next_job_user_id):
+    _post_junit(user, job_user_id, JUNIT)
+    _post_junit(user, next_job_user_id, JUNIT_NEXT)
+
+    url = '/api/v1/topics/%s/results/flaky' % topic_id
+    flaky = admin.get(url)
+    assert flaky.status_code == 200
+    assert flaky.data['_meta']['count'] == 2
+    assert [(t['name'], t['jobs'], t['passed'], t['failed'])
+            for t in flaky.data['tests']] == [('test_2', 2, 1, 1),
+                                              ('test_4', 2, 1, 1)]
+
+    # only the last job is considered
+    flaky = admin.get(url + '?jobs=1')
+    assert flaky.data['_meta']['count'] == 0
+
+
+def test_get_results_diff_without_deleted_files(user, job_user_id,
+                                                next_job_user_id):
+    file_id = _post_junit(user, job_user_id, JUNIT)
+    _post_junit(user, next_job_user_id, JUNIT_NEXT)
+    user.delete('/api/v1/files/%s' % file_id)
+
+    url = '/api/v1/jobs/%s/results/diff' % next_job_user_id
+    diff = user.get(url).data
+    assert [(t['name'], t['status']) for t in diff['testscases']] == [
+        ('test_2', 'added'), ('test_4', 'added'), ('test_7', 'added')]
+
+
+def test_get_flaky_tests_without_deleted_files(admin, user, topic_id,
+                                               job_user_id,
+                                               next_job_user_id):
+    _post_junit(user, job_user_id, JUNIT)
+    file_id = _post_junit(user, next_job_user_id, JUNIT_NEXT)
+    user.delete('/api/v1/files/%s' % file_id)
+
+    url = '/api/v1/topics/%s/results/flaky' % topic_id
+    assert admin.get(url).data['_meta']['count'] == 0
+
+
+def test_get_flaky_tests_by_remoteci(admin, user, topic_id, job_user_id,
+                                     next_job_user_id, remoteci_user_id,
+                                     jobdefinition_id, remoteci_id,
+                                     components_ids):
+    _post_junit(user, job_user_id, JUNIT)
+    _post_junit(user, next_job_user_id, JUNIT_NEXT)
+    data = {'jobdefinition_id': jobdefinition_id,
+            'remoteci_id': remoteci_id,
+            'components': components_ids}
+    job_id = admin.post('/api/v1/jobs', data=data).data['job']['id']
+    _post_junit(admin, job_id, JUNIT)
+
+    url = '/api/v1/topics/%s/results/flaky' % topic_id
+    flaky = admin.get(url).data
+    assert [(t['name'], t['jobs'], t['passed'], t['failed'])
+            for t in flaky['tests']] == [('test_2', 3, 1, 2),
+                                         ('test_4', 3, 2, 1)]
+
+    flaky = admin.get(url + '?remoteci_id=%s' % remoteci_user_id).data
+    assert [(t['name'], t['jobs'], t['passed'], t['failed'])
+            for t in flaky['tests']] == [('test_2', 2, 1, 1),
+                                         ('test_4', 2, 1, 1)]
+
+    flaky = admin.get(url + '?remoteci_id=%s' % remoteci_id).data
+    assert flaky['_meta']['count'] == 0
+
 
 def test_job_search(user, jobdefinition_id, remoteci_id, components_ids):
 
@@ -14,6 +14,13 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
+import mock
+
+from dci.api.v1 import metrics
+from dci.db import models
+
 
 def test_metrics_admin(admin, remoteci_id, team_id):
     t = admin.post('/api/v1/topics', data={'name': 'foo'}).data
@@ -53,7 +60,116 @@ def test_metrics_admin(admin, remoteci_id, team_id):
     assert foo[0]['date'] < foo[1]['date']
     assert len(bar) == 0
 
+    res = admin.get('/api/v1/metrics/topics?topic_id=%s&percentiles=true'
+                    % t_id)
+    foo = res.data['topics']['foo']
+    assert res.status_code == 200
+    assert list(res.data['topics']) == ['foo']
+    assert foo[0]['p50'] is None
+    assert foo[1]['values'] == sorted(foo[1]['values'])
+    assert foo[1]['p50'] == foo[1]['values'][0]
+    assert foo[1]['p90'] == foo[1]['values'][1]
+
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    res = admin.get('/api/v1/metrics/topics?since=%s' % tomorrow.isoformat())
+    assert res.data['topics'] == {'foo': [], 'bar': []}
+    res = admin.get('/api/v1/metrics/topics?until=%s' % tomorrow.isoformat())
+    assert len(res.data['topics']['foo']) == 2
+
+    res = admin.get('/api/v1/metrics/topics?since=yesterday')
+    assert res.status_code == 400
+
 
 def test_metrics_user(user):
     res = user.get('/api/v1/metrics/topics')
     assert res.status_code == 401
+
+
+def test_metrics_jobs(admin, engine, topic_id, jobdefinition_id,
+                      remoteci_id, components_ids):
+    data = {'jobdefinition_id': jobdefinition_id,
+            'remoteci_id': remoteci_id,
+            'components': components_ids}
+    job_1 = admin.post('/api/v1/jobs', data=data).data['job']
+    job_2 = admin.post('/api/v1/jobs', data=data).data['job']
+    res = admin.get('/api/v1/metrics/jobs')
+    assert res.status_code == 200
+    assert res.data['jobs'] == []
+
+    job_1 = admin.get('/api/v1/jobs/%s' % job_1['id']).data['job']
+    admin.put('/api/v1/jobs/%s' % job_1['id'], data={'status': 'failure'},
+              headers={'If-match': job_1['etag']})
+    for status in ('running', 'success', 'failure'):
+        admin.post('/api/v1/jobstates',
+                   data={'status': status, 'job_id': job_2['id']})
+
+    stats = admin.get('/api/v1/metrics/jobs').data['jobs']
+    assert len(stats) == 3
+    assert set(s['component_id'] for s in stats) == set(components_ids)
+    for s in stats:
+        assert s['topic_id'] == topic_id
+        assert s['remoteci_id'] == remoteci_id
+        assert s['statuses'] == {'failure': 2}
+
+    job_1 = admin.get('/api/v1/jobs/%s' % job_1['id']).data['job']
+    admin.delete('/api/v1/jobs/%s' % job_1['id'],
+                 headers={'If-match': job_1['etag']})
+    res = admin.get('/api/v1/metrics/jobs?bucket=month&component_id=%s'
+                    % components_ids[0])
+    assert res.data['_meta']['count'] == 1
+    assert res.data['jobs'][0]['statuses'] == {'failure': 1}
+    assert res.data['jobs'][0]['date'].endswith('-01T00:00:00')
+
+    # the rebuild computes the same statistics from the jobs
+    stats = admin.get('/api/v1/metrics/jobs').data['jobs']
+    with engine.connect() as db_conn:
+        metrics.rebuild_jobs_stats(db_conn)
+    assert admin.get('/api/v1/metrics/jobs').data['jobs'] == stats
+
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    res = admin.get('/api/v1/metrics/jobs?since=%s' % tomorrow.isoformat())
+    assert res.data['jobs'] == []
+    res = admin.get('/api/v1/metrics/jobs?bucket=year')
+    assert res.status_code == 400
+
+    # the jobs of a deleted remoteci are removed from the statistics
+    remoteci = admin.get('/api/v1/remotecis/%s' % remoteci_id).data
+    admin.delete('/api/v1/remotecis/%s' % remoteci_id,
+                 headers={'If-match': remoteci['remoteci']['etag']})
+    assert admin.get('/api/v1/metrics/jobs').data['jobs'] == []
+    with engine.connect() as db_conn:
+        metrics.rebuild_jobs_stats(db_conn)
+    assert admin.get('/api/v1/metrics/jobs').data['jobs'] == []
+
+
+def test_metrics_jobs_concurrent_jobstate(admin, engine, jobdefinition_id,
+                                          remoteci_id, components_ids):
+    data = {'jobdefinition_id': jobdefinition_id,
+            'remoteci_id': remoteci_id,
+            'components': components_ids[:1]}
+    job = admin.post('/api/v1/jobs', data=data).data['job']
+
+    def concurrent_jobstate(user, values):
+        # a jobstate is created after the PUT read the job
+        with engine.connect() as db_conn:
+            with db_conn.begin():
+                db_conn.execute(models.JOBS.update()
+                                .where(models.JOBS.c.id == job['id'])
+                                .values(status='success'))
+                metrics.update_jobs_stats(db_conn, [job['id']], 'new',
+                                          'success')
+
+    with mock.patch('dci.api.v1.jobstates.insert_jobstate',
+                    side_effect=concurrent_jobstate):
+        res = admin.put('/api/v1/jobs/%s' % job['id'],
+                        data={'status': 'failure'},
+                        headers={'If-match': job['etag']})
+    assert res.status_code == 204
+
+    stats = admin.get('/api/v1/metrics/jobs').data['jobs']
+    assert [s['statuses'] for s in stats] == [{'failure': 1}]
+
+
+def test_metrics_jobs_user(user):
+    res = user.get('/api/v1/metrics/jobs')
+    assert res.status_code == 401
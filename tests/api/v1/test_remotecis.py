@@ -18,6 +18,8 @@ from __future__ import unicode_literals
 import pytest
 import uuid
 
+from tests import utils
+
 
 def test_create_remotecis(admin, team_id):
     pr = admin.post('/api/v1/remotecis',
@@ -602,3 +604,32 @@ def test_change_remoteci_to_invalid_state(admin, remoteci_id):
     current_remoteci = admin.get('/api/v1/remotecis/' + remoteci_id)
     assert current_remoteci.status_code == 200
     assert current_remoteci.data['remoteci']['state'] == 'active'
+
+
+def test_signature_auth_uses_remotecis_cache(admin, app, remoteci_id):
+    remoteci = admin.get('/api/v1/remotecis/%s' % remoteci_id).data
+    remoteci = remoteci['remoteci']
+    client = app.test_client()
+
+    def signed_get(url):
+        headers = utils.signature_headers(remoteci, 'GET', url)
+        return client.get(url, headers=headers)
+
+    assert signed_get('/api/v1/jobs').status_code == 200
+    stats = admin.get('/api/v1/metrics/caches').data['caches']['remotecis']
+    assert signed_get('/api/v1/jobs').status_code == 200
+    assert admin.get('/api/v1/metrics/caches').data['caches']['remotecis'] \
+        == {'hits': stats['hits'] + 1, 'misses': stats['misses'], 'size': 1}
+
+    # the old secret is refused as soon as it is renewed
+    new_secret = admin.put('/api/v1/remotecis/%s/api_secret' % remoteci_id,
+                           headers={'If-match': remoteci['etag']})
+    assert new_secret.status_code == 200
+    assert signed_get('/api/v1/jobs').status_code == 401
+    remoteci['api_secret'] = new_secret.data['api_secret']
+    assert signed_get('/api/v1/jobs').status_code == 200
+
+    etag = new_secret.data['etag']
+    admin.delete('/api/v1/remotecis/%s' % remoteci_id,
+                 headers={'If-match': etag})
+    assert signed_get('/api/v1/jobs').status_code == 401
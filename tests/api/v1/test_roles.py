@@ -16,6 +16,8 @@
 
 from __future__ import unicode_literals
 
+import uuid
+
 
 def test_success_create_role_admin(admin):
     data = {
@@ -284,6 +286,23 @@ def test_success_remove_permission_from_role_admin(admin, role, permission):
     assert len(result.data['role']['permissions']) == 0
 
 
+def test_roles_registry_is_refreshed(admin, app, role):
+    role_id = uuid.UUID(role['id'])
+    assert app.roles.ids[role['label']] == role_id
+
+    role = admin.get('/api/v1/roles/%s' % role['id']).data['role']
+    admin.put('/api/v1/roles/%s' % role['id'], data={'label': 'ALABEL'},
+              headers={'If-match': role['etag']})
+    assert app.roles.ids['ALABEL'] == role_id
+    assert role['label'] not in app.roles.ids
+
+
+def test_roles_registry_is_loaded_lazily(app, admin):
+    app.roles.ids = {}
+    assert admin.get('/api/v1/audits').status_code == 200
+    assert 'ADMIN' in app.roles.ids
+
+
 def test_fail_remove_permission_from_role_user_admin(admin, user_admin,
                                                      role, permission):
     data = {
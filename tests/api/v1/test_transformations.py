@@ -19,6 +19,7 @@ from uuid import UUID
 import mock
 from sqlalchemy import sql
 
+from dci.api.v1 import junit
 from dci.api.v1 import transformations
 from dci.db import models
 from dci.stores.swift import Swift
@@ -99,6 +100,26 @@ def test_junit2dict():
     assert result == JSONUNIT
 
 
+def test_junit2dict_chunks():
+    chunks = (JUNIT[i:i + 10].encode('utf-8')
+              for i in range(0, len(JUNIT), 10))
+    assert transformations.junit2dict(chunks) == JSONUNIT
+
+    result = transformations.junit2dict(iter([JUNIT]), with_testscases=False)
+    assert result['testscases'] == []
+    assert result['total'] == JSONUNIT['total']
+    assert result['time'] == JSONUNIT['time']
+
+
+def test_junit2dict_max_message_size():
+    result = transformations.junit2dict(JUNIT, max_message_size=4)
+    assert [t['value'] for t in result['testscases']] == \
+        ['test', 'test', 'test', '', 'STDO', 'STDE']
+
+    result = transformations.junit2dict(JUNIT, max_message_size=0)
+    assert all(not t['value'] for t in result['testscases'])
+
+
 def test_junit2dict_with_ansible_run_ovs_integration_tests_xml():
     with open('tests/data/ansible-run-ovs-integration-tests.xml', 'r') as f:
         content_file = f.read()
@@ -204,7 +225,7 @@ def test_create_file_fill_tests_results_table(engine, admin, job_id):
             'content-length': 7
         }
         mockito.head.return_value = head_result
-        mockito.get_object.return_value = content_file
+        mockito.get.return_value = ({}, iter([content_file]))
         mock_swift.return_value = mockito
 
         headers = {
@@ -229,3 +250,96 @@ def test_create_file_fill_tests_results_table(engine, admin, job_id):
     assert test_result['errors'] == 0
     assert test_result['success'] == 117
     assert test_result['time'] == 1308365
+
+
+def _post_junit(admin, job_id, content):
+    with mock.patch(SWIFT, spec=Swift) as mock_swift:
+        mockito = mock.MagicMock()
+        mockito.head.return_value = {'etag': utils.gen_etag(),
+                                     'content-type': 'stream',
+                                     'content-length': len(content)}
+        mockito.get.side_effect = lambda path: ({}, iter([content]))
+        mock_swift.return_value = mockito
+
+        headers = {'DCI-JOB-ID': job_id, 'DCI-NAME': 'junit_file.xml',
+                   'DCI-MIME': 'application/junit',
+                   'Content-Type': 'application/junit'}
+        file = admin.post('/api/v1/files', headers=headers, data=content)
+        return file.data['file'], mockito
+
+
+def test_create_file_ingestion_status(admin, job_id):
+    file, _ = _post_junit(admin, job_id, JUNIT)
+    assert file['ingestion_status'] == 'complete'
+
+    file, _ = _post_junit(admin, job_id, JUNIT.replace('</testcase>', '', 1))
+    assert file['ingestion_status'] == 'error'
+    file = admin.get('/api/v1/files/%s' % file['id']).data['file']
+    assert file['ingestion_status'] == 'error'
+
+
+def test_create_file_async_ingestion(app, engine, admin, job_id):
+    app.config['JUNIT_ASYNC_INGESTION'] = True
+    with mock.patch.object(app, 'sender') as sender:
+        file, mockito = _post_junit(admin, job_id, JUNIT)
+
+    assert file['ingestion_status'] == 'pending'
+    sender.send_json.assert_called_once_with({'event': 'junit_ingestion',
+                                              'file_id': file['id']})
+    query = sql.select([models.TESTS_RESULTS])
+    assert engine.execute(query).fetchall() == []
+
+    # what dci-worker does when it receives the message
+    with engine.connect() as db_conn:
+        assert junit.ingest(db_conn, mockito, file['id']) == 'complete'
+
+    file = admin.get('/api/v1/files/%s' % file['id']).data['file']
+    assert file['ingestion_status'] == 'complete'
+    tests_results = engine.execute(query).fetchall()
+    assert len(tests_results) == 1
+    assert tests_results[0]['total'] == 6
+
+
+def test_ingest_by_chunks(engine, admin, job_id):
+    with mock.patch.object(junit, '_CHUNK_SIZE', 4), \
+            mock.patch.object(junit, '_MAX_MESSAGE_SIZE', 5):
+        _post_junit(admin, job_id, JUNIT)
+        # the document is invalid once its testcases were inserted
+        file, _ = _post_junit(admin, job_id,
+                              JUNIT.replace('</testsuite>', ''))
+    assert file['ingestion_status'] == 'error'
+
+    query = (sql.select([models.TESTSCASES])
+             .order_by(models.TESTSCASES.c.position))
+    testscases = engine.execute(query).fetchall()
+    assert [t['position'] for t in testscases] == list(range(6))
+    assert testscases[1]['value'] == 'test '
+    query = sql.select([models.TESTS_RESULTS])
+    assert len(engine.execute(query).fetchall()) == 1
+
+
+def test_try_ingest_failure(app, engine, admin, job_id):
+    app.config['JUNIT_ASYNC_INGESTION'] = True
+    with mock.patch.object(app, 'sender'):
+        file, mockito = _post_junit(admin, job_id, JUNIT)
+
+    mockito.get.side_effect = Exception('store unavailable')
+    with engine.connect() as db_conn:
+        assert junit.try_ingest(db_conn, mockito, file['id']) == 'error'
+        assert junit.try_ingest(db_conn, mockito, utils.gen_uuid()) == 'error'
+
+    file = admin.get('/api/v1/files/%s' % file['id']).data['file']
+    assert file['ingestion_status'] == 'error'
+
+
+def test_get_files_to_ingest(app, engine, admin, job_id):
+    _post_junit(admin, job_id, JUNIT)
+    app.config['JUNIT_ASYNC_INGESTION'] = True
+    with mock.patch.object(app, 'sender'):
+        file, mockito = _post_junit(admin, job_id, JUNIT)
+
+    with engine.connect() as db_conn:
+        file_ids = junit.get_files_to_ingest(db_conn)
+        assert [str(file_id) for file_id in file_ids] == [file['id']]
+        junit.ingest(db_conn, mockito, file['id'])
+        assert junit.get_files_to_ingest(db_conn) == []
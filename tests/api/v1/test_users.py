@@ -17,6 +17,8 @@
 from __future__ import unicode_literals
 import uuid
 
+from tests import utils
+
 
 def test_create_users(admin, team_id, role_user):
     pu = admin.post('/api/v1/users',
@@ -281,6 +283,35 @@ def test_delete_user_by_id(admin, team_id):
     assert gu.status_code == 404
 
 
+def test_put_user_password_invalidates_auth_cache(admin, app, team_id):
+    pu = admin.post('/api/v1/users', data={'name': 'pname',
+                                           'password': 'ppass',
+                                           'team_id': team_id})
+    pu_etag = pu.headers.get("ETag")
+    pu_id = pu.data['user']['id']
+
+    pname = utils.generate_client(app, ('pname', 'ppass'))
+    assert pname.get('/api/v1/users/me').status_code == 200
+    hits = app.users_cache.stats()['hits']
+    assert pname.get('/api/v1/users/me').status_code == 200
+    assert app.users_cache.stats()['hits'] == hits + 1
+
+    ppu = admin.put('/api/v1/users/%s' % pu_id,
+                    data={'password': 'npass'},
+                    headers={'If-match': pu_etag})
+    assert ppu.status_code == 204
+
+    assert pname.get('/api/v1/users/me').status_code == 401
+    pname = utils.generate_client(app, ('pname', 'npass'))
+    assert pname.get('/api/v1/users/me').status_code == 200
+
+    pu_etag = admin.get('/api/v1/users/%s' % pu_id).headers.get("ETag")
+    deleted_user = admin.delete('/api/v1/users/%s' % pu_id,
+                                headers={'If-match': pu_etag})
+    assert deleted_user.status_code == 204
+    assert pname.get('/api/v1/users/me').status_code == 401
+
+
 def test_delete_user_not_found(admin):
     result = admin.delete('/api/v1/users/%s' % uuid.uuid4(),
                           headers={'If-match': 'mdr'})
@@ -0,0 +1,71 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2017 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from dci.common import cache
+
+
+class Timer(object):
+    def __init__(self):
+        self.now = 1000
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_and_set():
+    c = cache.TTLCache(10, 60)
+    assert c.get('key') is None
+    c.set('key', 'value')
+    assert c.get('key') == 'value'
+    assert c.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+
+def test_entries_expire():
+    timer = Timer()
+    c = cache.TTLCache(10, 60, timer=timer)
+    c.set('key', 'value')
+    timer.now += 59
+    assert c.get('key') == 'value'
+    timer.now += 1
+    assert c.get('key') is None
+    assert len(c) == 0
+
+
+def test_oldest_entries_are_evicted():
+    c = cache.TTLCache(2, 60)
+    c.set('key_1', 1)
+    c.set('key_2', 2)
+    c.set('key_3', 3)
+    assert c.get('key_1') is None
+    assert c.get('key_2') == 2
+    assert c.get('key_3') == 3
+
+
+def test_invalidate():
+    c = cache.TTLCache(10, 60)
+    c.set('key_1', {'id': 1, 'team_id': 1})
+    c.set('key_2', {'id': 2, 'team_id': 1})
+    c.set('key_3', {'id': 3, 'team_id': 2})
+    c.invalidate(lambda value: value['team_id'] == 1)
+    assert c.get('key_1') is None
+    assert c.get('key_2') is None
+    assert c.get('key_3') == {'id': 3, 'team_id': 2}
+
+
+def test_disabled_cache():
+    c = cache.TTLCache(10, 0)
+    c.set('key', 'value')
+    assert c.get('key') is None
@@ -706,7 +706,10 @@ class TestArgs(object):
         'offset': '10',
         'sort': 'field_1,field_2',
         'where': 'field_1:value_1,field_2:value_2',
-        'embed': 'resource_1,resource_2'
+        'embed': 'resource_1,resource_2',
+        'after': 'cursor',
+        'count': 'none',
+        'stream': 'true'
     }
 
     data_expected = {
@@ -714,7 +717,10 @@ class TestArgs(object):
         'offset': 10,
         'sort': ['field_1', 'field_2'],
         'where': ['field_1:value_1', 'field_2:value_2'],
-        'embed': ['resource_1', 'resource_2']
+        'embed': ['resource_1', 'resource_2'],
+        'after': 'cursor',
+        'count': 'none',
+        'stream': True
     }
 
     def test_extra_args(self):
@@ -727,17 +733,23 @@ class TestArgs(object):
             'offset': None,
             'sort': [],
             'where': [],
-            'embed': []
+            'embed': [],
+            'after': None,
+            'count': 'exact',
+            'stream': False
         }
         assert schemas.args({}) == expected
 
     def test_invalid_args(self):
         errors = {'limit': schemas.INVALID_LIMIT,
-                  'offset': schemas.INVALID_OFFSET}
+                  'offset': schemas.INVALID_OFFSET,
+                  'count': schemas.INVALID_COUNT,
+                  'stream': schemas.INVALID_BOOLEAN}
 
-        data = {'limit': -1, 'offset': -1}
+        data = {'limit': -1, 'offset': -1, 'count': 'all', 'stream': 'foo'}
         utils.invalid_args(data, errors)
-        data = {'limit': 'foo', 'offset': 'bar'}
+        data = {'limit': 'foo', 'offset': 'bar', 'count': 'all',
+                'stream': 'bar'}
         utils.invalid_args(data, errors)
 
     def test_args(self):
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import hashlib
+import io
+import os
+
+import pytest
+
+from dci.common import exceptions
+from dci.stores import filesystem
+
+
+@pytest.fixture
+def store(tmpdir):
+    return filesystem.FileSystem({'path': str(tmpdir), 'container': 'files'})
+
+
+def test_upload_stream(store, tmpdir):
+    content = b'x' * (store.chunk_size * 2 + 1)
+    file_path = store.build_file_path('team', 'job', 'file')
+    store.upload(file_path, io.BytesIO(content))
+
+    assert tmpdir.join('files', 'team', 'job', 'file').read_binary() == \
+        content
+    # no temporary file is left behind
+    assert sorted(os.listdir(str(tmpdir.join('files', 'team', 'job')))) == \
+        ['file', 'file.md5']
+    assert store.get_object(file_path) == content
+    assert b''.join(store.get(file_path)[1]) == content
+    assert store.head(file_path) == {
+        'etag': hashlib.md5(content).hexdigest(),
+        'content-type': 'application/octet-stream',
+        'content-length': len(content)}
+
+
+def test_upload_respects_umask(store, tmpdir):
+    umask = os.umask(0o027)
+    try:
+        store.upload('a', b'content')
+    finally:
+        os.umask(umask)
+    mode = os.stat(str(tmpdir.join('files', 'a'))).st_mode & 0o777
+    assert mode == 0o640
+
+
+def test_upload_data(store):
+    store.upload('a/b/c', u'content')
+    assert store.get_object('a/b/c') == b'content'
+    store.upload('a/b/c', [b'new ', b'content'])
+    assert store.get_object('a/b/c') == b'new content'
+
+
+def test_head_and_delete_missing_file(store):
+    store.upload('a/b/c', b'content')
+    store.delete('a/b/c')
+    with pytest.raises(exceptions.DCINotFound):
+        store.head('a/b/c')
+    with pytest.raises(exceptions.StoreExceptions):
+        store.delete('a/b/c')
+
+
+def test_get_range_and_bounded_object(store):
+    store.upload('a/b/c', b'0123456789')
+    assert b''.join(store.get('a/b/c', (2, 5))[1]) == b'234'
+    assert b''.join(store.get('a/b/c', (8, 10))[1]) == b'89'
+    assert store.get_object('a/b/c', max_size=10) == b'0123456789'
+    with pytest.raises(exceptions.StoreExceptions):
+        store.get_object('a/b/c', max_size=9)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from dci.stores import swift
+
+CONNECTION = 'swiftclient.client.Connection'
+CONF = {'os_username': 'user', 'os_password': 'password',
+        'os_tenant_name': 'tenant', 'os_auth_url': 'http://keystone',
+        'container': 'files'}
+
+
+def test_pool_reuses_connections_and_token():
+    with mock.patch(CONNECTION) as connection_class:
+        pool = swift.ConnectionPool(CONF, maxsize=1)
+        store = swift.Swift(CONF, pool=pool)
+
+        connection = connection_class.return_value
+        connection.url, connection.token = 'http://swift', 'token'
+        store.head('a')
+        store.delete('a')
+        assert connection_class.call_count == 1
+        assert connection_class.call_args[1]['preauthtoken'] is None
+
+        # a connection created while the other is busy reuses the token
+        busy = pool.acquire()
+        store.head('a')
+        assert connection_class.call_count == 2
+        assert connection_class.call_args[1]['preauthtoken'] == 'token'
+        assert 'retries' not in connection_class.call_args[1]
+
+        # the pool keeps at most maxsize idle connections
+        pool.release(busy)
+        assert connection.close.called
+
+
+def test_get_releases_connection_once_read():
+    with mock.patch(CONNECTION) as connection_class:
+        pool = swift.ConnectionPool(CONF)
+        store = swift.Swift(CONF, pool=pool)
+        connection_class.return_value.get_object.return_value = \
+            ({}, iter(['a', 'b']))
+
+        headers, body = store.get('a')
+        assert pool._idle == []
+        assert list(body) == ['a', 'b']
+        assert pool._idle == [connection_class.return_value]
+
+
+def test_get_closes_connection_not_read():
+    with mock.patch(CONNECTION) as connection_class:
+        pool = swift.ConnectionPool(CONF)
+        store = swift.Swift(CONF, pool=pool)
+        connection = connection_class.return_value
+        connection.get_object.return_value = ({}, iter(['a', 'b']))
+
+        headers, body = store.get('a')
+        assert next(body) == 'a'
+        body.close()
+        assert pool._idle == []
+        assert connection.close.called
+
+
+def test_get_range():
+    with mock.patch(CONNECTION) as connection_class:
+        store = swift.Swift(CONF)
+        get_object = connection_class.return_value.get_object
+        get_object.return_value = ({}, iter(['234']))
+
+        assert list(store.get('a', (2, 5))[1]) == ['234']
+        assert get_object.call_args[1]['headers'] == {'Range': 'bytes=2-4'}
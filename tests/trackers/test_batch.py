@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import threading
+import time
+
+import mock
+import pytest
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib.parse import parse_qs, urlparse
+
+from dci.trackers import batch
+
+BUG = """<bug>
+    <bug_id>%s</bug_id>
+    <short_desc>bug %s</short_desc>
+    <bug_status>NEW</bug_status>
+    <reporter>reporter</reporter>
+    <assigned_to>assignee</assigned_to>
+    <product>product</product>
+    <component>component</component>
+    <creation_ts>2017-08-01 10:00:00 -0400</creation_ts>
+    <delta_ts>2017-08-02 10:00:00 -0400</delta_ts>
+</bug>"""
+
+
+def _bug(bug_id):
+    if bug_id == '404':
+        return '<bug error="NotFound"><bug_id>404</bug_id></bug>'
+    if bug_id.startswith('CVE-'):
+        return (BUG % (42, bug_id)).replace(
+            '</bug_id>', '</bug_id><alias>%s</alias>' % bug_id)
+    return BUG % (bug_id, bug_id)
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.paths.append(self.path)
+            server.running += 1
+            server.max_running = max(server.max_running, server.running)
+        try:
+            time.sleep(0.05)
+            url = urlparse(self.path)
+            if url.path == '/show_bug.cgi':
+                bugs_ids = parse_qs(url.query)['id']
+                if '500' in bugs_ids:
+                    self._answer(500, '')
+                    return
+                bugs = [_bug(bug_id) for bug_id in bugs_ids
+                        if bug_id != 'missing']
+                self._answer(200, '<bugzilla>%s</bugzilla>' % ''.join(bugs))
+            elif url.path.endswith('/issues/404'):
+                self._answer(404, '{}')
+            elif url.path.endswith('/issues/403'):
+                self._answer(403, '{"message": "API rate limit exceeded"}')
+            elif url.path.endswith('/issues/503'):
+                self._answer(503, '')
+            elif url.path.endswith('/issues/408'):
+                time.sleep(1)
+                self._answer(404, '{}')
+            else:
+                number = int(url.path.rsplit('/', 1)[1])
+                self._answer(200, json.dumps({
+                    'title': 'issue %s' % number,
+                    'user': {'login': 'reporter'},
+                    'assignee': None,
+                    'state': 'open',
+                    'created_at': '2017-08-01T10:00:00Z',
+                    'updated_at': '2017-08-02T10:00:00Z',
+                    'closed_at': None}))
+        finally:
+            with server.lock:
+                server.running -= 1
+
+    def _answer(self, status_code, content):
+        content = content.encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+@pytest.fixture
+def tracker_server():
+    server = _Server(('127.0.0.1', 0), _Handler)
+    server.lock = threading.Lock()
+    server.paths = []
+    server.running = server.max_running = 0
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    base_url = 'http://127.0.0.1:%s' % server.server_address[1]
+    with mock.patch('dci.trackers.github._URL_BASE', base_url + '/repos'):
+        yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+
+def test_retrieve_bugzilla_bugs_at_once(tracker_server):
+    server, base_url = tracker_server
+    urls = ['%s/show_bug.cgi?id=%s' % (base_url, i) for i in (1, 2, 404)]
+
+    results = batch.retrieve([('bugzilla', url) for url in urls])
+
+    assert server.paths == ['/show_bug.cgi?ctype=xml&id=1&id=2&id=404']
+    assert results[urls[0]]['title'] == 'bug 1'
+    assert results[urls[0]]['issue_id'] == '1'
+    assert results[urls[0]]['status_code'] == 200
+    assert results[urls[0]]['closed_at'] is None
+    assert results[urls[1]]['title'] == 'bug 2'
+    assert results[urls[2]]['status_code'] == 404
+    assert results[urls[2]]['title'] is None
+
+
+def test_retrieve_github_issues_concurrently(tracker_server):
+    server, base_url = tracker_server
+    urls = ['https://github.com/redhat-cip/dci/issues/%s' % i
+            for i in range(1, 9)] + \
+        ['https://github.com/redhat-cip/dci/issues/404']
+
+    results = batch.retrieve([('github', url) for url in urls], per_host=3)
+
+    assert len(server.paths) == 9
+    assert 1 < server.max_running <= 3
+    assert results[urls[0]]['title'] == 'issue 1'
+    assert results[urls[0]]['reporter'] == 'reporter'
+    assert results[urls[0]]['product'] == 'redhat-cip'
+    assert results[urls[-1]]['title'] == 'private issue'
+    assert results[urls[-1]]['status_code'] == 404
+
+
+def test_retrieve_skips_the_trackers_not_answering(tracker_server):
+    server, base_url = tracker_server
+    urls = ['https://github.com/redhat-cip/dci/issues/1',
+            'https://github.com/redhat-cip/dci/issues/408']
+
+    results = batch.retrieve([('github', url) for url in urls], timeout=0.5)
+
+    assert list(results) == [urls[0]]
+
+
+def test_retrieve_skips_the_trackers_errors(tracker_server):
+    server, base_url = tracker_server
+    github_urls = ['https://github.com/redhat-cip/dci/issues/%s' % i
+                   for i in (1, 403, 503)]
+    bugzilla_urls = ['%s/show_bug.cgi?id=%s' % (base_url, i)
+                     for i in (1, 'missing')]
+    error_url = base_url.replace('127.0.0.1', 'localhost')
+    bugzilla_urls += ['%s/show_bug.cgi?id=%s' % (error_url, i)
+                      for i in (2, 500)]
+
+    results = batch.retrieve([('github', url) for url in github_urls] +
+                             [('bugzilla', url) for url in bugzilla_urls])
+
+    assert sorted(results) == sorted([github_urls[0], bugzilla_urls[0]])
+
+
+def test_retrieve_bugzilla_bugs_by_alias(tracker_server):
+    server, base_url = tracker_server
+    urls = ['%s/show_bug.cgi?id=%s' % (base_url, i)
+            for i in (1, 'CVE-2017-1234')]
+
+    results = batch.retrieve([('bugzilla', url) for url in urls])
+
+    assert len(server.paths) == 1
+    assert results[urls[1]]['issue_id'] == '42'
+    assert results[urls[1]]['title'] == 'bug CVE-2017-1234'
+    assert results[urls[1]]['status_code'] == 200
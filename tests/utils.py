@@ -16,6 +16,7 @@
 
 import base64
 import collections
+import datetime
 import flask
 import shutil
 
@@ -23,6 +24,7 @@ import mock
 import six
 
 import dci.auth as auth
+from dci.common import signature
 import dci.common.utils as utils
 import dci.db.models as models
 import dci.dci_config as config
@@ -77,6 +79,27 @@ def generate_client(app, credentials):
     return client
 
 
+def signature_headers(remoteci, http_verb, url, query_string=b'',
+                      payload=b'', content_type='application/json'):
+    """Headers of a request signed with the secret of the remoteci."""
+
+    timestamp = datetime.datetime.utcnow()
+    their_signature = signature.gen_signature(
+        secret=remoteci['api_secret'].encode('utf-8'),
+        http_verb=http_verb.encode('utf-8'),
+        content_type=content_type.encode('utf-8'),
+        timestamp=timestamp,
+        url=url.encode('utf-8'),
+        query_string=query_string,
+        payload=payload)
+    return {
+        'DCI-Client-Info': '%s/remoteci/%s' % (
+            timestamp.strftime('%Y-%m-%d %H:%M:%SZ'), remoteci['id']),
+        'DCI-Auth-Signature': their_signature,
+        'Content-Type': content_type
+    }
+
+
 def provision(db_conn):
     def db_insert(model_item, **kwargs):
         query = model_item.insert().values(**kwargs)